@@ -2,22 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import random
 import signal
 import sys
 import threading
 import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import httpx
 
 import config as config_module
 import fogos
+import metrics
+import outbox as outbox_module
+import profiling
 import render
+import schedule
+import sources
 import state as state_module
+import subscribers as subscribers_module
 from changes import NEW, RESOLVED, UPDATE, Event, detect
 from config import VERSION, Config
 from mailer import MailError, Mailer
+from subscribers import Registry, Subscriber
 
 logger = logging.getLogger("fogosptalerts")
 
@@ -56,6 +67,12 @@ def _next_delay(base_seconds: int, consecutive_failures: int) -> int:
     return round(delay * (1 + random.uniform(0, POLL_JITTER)))
 
 
+def _sleep_seconds(scheduler: schedule.Scheduler, consecutive_failures: int) -> int:
+    """`_next_delay` from the scheduler's interval, aligned to upstream while nothing is failing."""
+    delay = _next_delay(scheduler.interval(), consecutive_failures)
+    return delay if consecutive_failures else round(scheduler.align(delay))
+
+
 def _handle_signal(signum, _frame) -> None:
     logger.info("Received %s — finishing current cycle and exiting", signal.Signals(signum).name)
     _shutdown.set()
@@ -89,26 +106,131 @@ def _seed(cfg: Config, st: state_module.State, fires: list[fogos.Fire], mailer:
     logger.info("Seeded state with %d existing occurrence(s)", len(fires))
 
 
-def _dispatch(cfg: Config, st: state_module.State, events: list[Event], mailer: Mailer) -> set[str]:
-    """Send one email per event. Returns ids whose delivery failed."""
-    failed: set[str] = set()
-
+def _by_fire(events: list[Event]) -> dict[str, list[Event]]:
+    by_fire: dict[str, list[Event]] = {}
     for event in events:
-        fire_id = event.fire.id
-        thread_root = st.thread_id(fire_id, mailer.domain)
-        is_root = event.kind == NEW
+        by_fire.setdefault(event.fire.id, []).append(event)
+    return by_fire
+
+
+def _sighted(st: state_module.State, events: list[Event]) -> bool:
+    """Stamp when each fire about to be emailed was first seen. True if any had no stamp yet.
+
+    The stamp is part of every Message-ID about the fire, so it has to be on
+    disk before the first of them is queued.
+    """
+    now = int(time.time())
+    fresh = {event.fire.id for event in events} - set(st.first_seen)
+    for fire_id in fresh:
+        st.first_seen[fire_id] = now
+    return bool(fresh)
+
+
+def _event_key(st: state_module.State, event: Event, number: int) -> tuple[str, list]:
+    """What names an event's email: the fire, its sighting, how many emails about it went before, and the change."""
+    fire_id = event.fire.id
+    previous = event.previous.to_dict() if event.previous else None
+    return f"{fire_id}.{st.first_seen[fire_id]}.{number}", [event.kind, previous, event.fire.to_dict()]
+
+
+def _message_ids(st: state_module.State, events: list[Event], mailer: Mailer) -> list[str]:
+    """Message-IDs of one fire's events, in order. A NEW alert's is the thread root.
+
+    Rebuilt after a crash, the same events get the same IDs, so the outbox
+    queues them once; anything that changed since gets new ones.
+    """
+    fire_id = events[0].fire.id
+    return [
+        st.thread_id(fire_id, mailer.domain) if event.kind == NEW else mailer.message_id(*_event_key(st, event, number))
+        for number, event in enumerate(events, start=st.mailed.get(fire_id, 0))
+    ]
+
+
+@dataclass
+class _FireMail:
+    """One fire's emails for this cycle, in the order they must go out."""
+
+    events: list[Event]
+    thread_root: str
+    message_ids: list[str]
+
+
+@dataclass
+class _Plan:
+    """What one subscriber's cycle is to send, worked out before any I/O.
+
+    Deciding is the same for both engines; they differ only in how they
+    send and save, so that is all `_process` and `_process_async` do.
+    """
+
+    events: list[Event]
+    mails: dict[str, _FireMail]
+    # The batched events, and their digest unless its window is still open.
+    batched: list[Event]
+    digest: render.Message | None
+    held: set[str]
+    # First-seen stamps were added, and must be saved before anything is queued.
+    sighted: bool
+
+
+def _plan(sub: Subscriber, st: state_module.State, fires: list[fogos.Fire]) -> _Plan:
+    """Diff, stamp, split and render: everything in a cycle short of sending and saving."""
+    cfg, mailer = sub.config, sub.mailer
+    events = _detect(sub, st, fires)
+    sighted = _sighted(st, events)
+    urgent, batched = _split(cfg, events)
+
+    mails = {
+        fire_id: _FireMail(fire_events, st.thread_id(fire_id, mailer.domain), _message_ids(st, fire_events, mailer))
+        for fire_id, fire_events in _by_fire(urgent).items()
+    }
+    digest: render.Message | None = None
+    held: set[str] = set()
+    if not batched:
+        sub.digest.close()
+    elif sub.digest.holds(cfg.digest_minutes):
+        logger.debug("Holding %d event(s) for %s's digest", len(batched), sub.name)
+        # Held events are not lost: like failed ones, their fires keep the last
+        # reported snapshot, so the next cycle detects them again — already
+        # coalesced with whatever changed since.
+        held = {event.fire.id for event in batched}
+    else:
+        with metrics.RENDER_SECONDS.time(template="digest"):
+            digest = render.build_digest(batched, cfg)
+    return _Plan(events, mails, batched, digest, held, sighted)
+
+
+def _render_event(cfg: Config, event: Event) -> render.Message:
+    with metrics.RENDER_SECONDS.time(template="event"):
+        return render.build_message(event, cfg)
+
+
+def _not_sent(event: Event, exc: MailError) -> None:
+    logger.error("Could not notify %s for fire %s: %s", event.kind, event.fire.id, exc)
 
-        try:
-            mailer.send(render.build_message(event, cfg), thread_root=thread_root, is_root=is_root)
-        except MailError as exc:
-            logger.error("Could not notify %s for fire %s: %s", event.kind, fire_id, exc)
-            failed.add(fire_id)
-            continue
 
-        if event.kind == NEW:
-            st.first_seen.setdefault(fire_id, int(time.time()))
+def _mailed(st: state_module.State, by_fire: dict[str, _FireMail], sent: dict[str, bool]) -> set[str]:
+    """Count the emails sent about each fire. Returns ids whose delivery failed."""
+    for fire_id, ok in sent.items():
+        if ok:
+            st.mailed[fire_id] = st.mailed.get(fire_id, 0) + len(by_fire[fire_id].events)
+    return {fire_id for fire_id, ok in sent.items() if not ok}
 
-    return failed
+
+def _digest_id(st: state_module.State, events: list[Event], mailer: Mailer) -> str:
+    return mailer.message_id("resumo", [_event_key(st, event, st.mailed.get(event.fire.id, 0)) for event in events])
+
+
+def _digest_failed(events: list[Event], exc: MailError) -> set[str]:
+    logger.error("Could not send digest of %d event(s): %s", len(events), exc)
+    return {event.fire.id for event in events}
+
+
+def _digest_sent(sub: Subscriber, st: state_module.State, events: list[Event]) -> set[str]:
+    sub.digest.close()
+    for event in events:
+        st.mailed[event.fire.id] = st.mailed.get(event.fire.id, 0) + 1
+    return set()
 
 
 def _maybe_heartbeat(cfg: Config, st: state_module.State, mailer: Mailer) -> None:
@@ -128,47 +250,320 @@ def _maybe_heartbeat(cfg: Config, st: state_module.State, mailer: Mailer) -> Non
         note="Resumo periódico. O serviço está ativo e a monitorizar normalmente.",
     )
     try:
-        mailer.send(message)
+        # Named after the last one, so a heartbeat rebuilt after a crash is sent once.
+        mailer.send(message, message_id=mailer.message_id(f"estado.{st.last_heartbeat}"))
         st.last_heartbeat = now
     except MailError as exc:
         logger.error("Heartbeat email failed: %s", exc)
 
 
-def run_cycle(cfg: Config, client: httpx.Client, mailer: Mailer) -> None:
-    st = state_module.load(cfg.state_file)
-    fires = fogos.fetch(cfg, client)
+def _save(sub: Subscriber, st: state_module.State) -> None:
+    with metrics.STATE_SAVE_SECONDS.time():
+        sub.store.save()
+    metrics.TRACKED_FIRES.set(len(st.fires), subscriber=sub.name)
+
+
+def _idle(sub: Subscriber) -> None:
+    """A cycle with nothing new upstream: only the clock-driven work is left."""
+    cfg, mailer = sub.config, sub.mailer
+    st = sub.store.load()
+    last_heartbeat = st.last_heartbeat
+    _maybe_heartbeat(cfg, st, mailer)
+    if st.last_heartbeat != last_heartbeat:
+        _save(sub, st)
+    else:
+        sub.store.touch()
 
-    if not st.initialized:
-        _seed(cfg, st, fires, mailer)
-        state_module.save(cfg.state_file, st)
-        return
 
-    events = detect(fires, st.fires, cfg.min_severity)
+def _detect(sub: Subscriber, st: state_module.State, fires: list[fogos.Fire]) -> list[Event]:
+    with metrics.DETECT_SECONDS.time():
+        events = detect(fires, st.fires, sub.config.min_severity, sub.trends if sub.config.trends else None)
     if events:
         counts = {kind: sum(1 for e in events if e.kind == kind) for kind in (NEW, UPDATE, RESOLVED)}
-        logger.info("Changes: %d new, %d updated, %d resolved", *counts.values())
+        for kind, count in counts.items():
+            metrics.EVENTS.inc(count, subscriber=sub.name, kind=kind)
+        logger.info("Changes for %s: %d new, %d updated, %d resolved", sub.name, *counts.values())
+    return events
 
-    failed = _dispatch(cfg, st, events, mailer)
 
+def _split(cfg: Config, events: list[Event]) -> tuple[list[Event], list[Event]]:
+    """(urgent, batched). Without digests everything is urgent; a new MAJOR fire always is."""
+    urgent: list[Event] = []
+    batched: list[Event] = []
+    for event in events:
+        if not cfg.digest or (event.kind == NEW and event.severity == "major"):
+            urgent.append(event)
+        else:
+            batched.append(event)
+    return urgent, batched
+
+
+def _settle(
+    sub: Subscriber,
+    st: state_module.State,
+    fires: list[fogos.Fire],
+    events: list[Event],
+    unsent: set[str],
+) -> bool:
+    """Advance and persist the snapshot past what was sent. True when nothing is left to send."""
     # Only track fires we have actually reported on, so an occurrence held back
     # by FOGOS_MIN_SEVERITY still counts as new if it later escalates.
-    reported = {e.fire.id for e in events if e.kind in (NEW, UPDATE)}
+    reported = {e.fire.id for e in events if e.kind in (NEW, UPDATE)} - unsent
     next_fires: dict[str, fogos.Fire] = {}
     for fire in fires:
         if fire.id not in st.fires and fire.id not in reported:
             continue
-        # A failed send leaves the old snapshot in place so the next cycle retries.
-        next_fires[fire.id] = st.fires[fire.id] if fire.id in failed and fire.id in st.fires else fire
+        # An unsent event leaves the old snapshot in place so the next cycle retries.
+        next_fires[fire.id] = st.fires[fire.id] if fire.id in unsent and fire.id in st.fires else fire
 
     # Keep resolved-but-unnotified fires around for another attempt.
-    for fire_id in failed:
+    for fire_id in unsent:
         if fire_id not in next_fires and fire_id in st.fires:
             next_fires[fire_id] = st.fires[fire_id]
 
     st.fires = next_fires
-    st.prune(set(next_fires))
-    _maybe_heartbeat(cfg, st, mailer)
-    state_module.save(cfg.state_file, st)
+    # A new fire whose alert failed keeps its thread root, so the retry reuses it.
+    st.prune(set(next_fires) | unsent)
+    # Only now that its update is out may a gradual rise stop being reported.
+    sub.trends.delivered(reported)
+    _maybe_heartbeat(sub.config, st, sub.mailer)
+    _save(sub, st)
+    return not unsent
+
+
+def _send_fire(cfg: Config, mail: _FireMail, mailer: Mailer) -> bool:
+    """Send one fire's events in order. False as soon as one fails.
+
+    The rest are held back with it: an UPDATE that lands before its NEW would
+    start a thread of its own in the recipient's mail client.
+    """
+    for event, message_id in zip(mail.events, mail.message_ids):
+        try:
+            mailer.send(_render_event(cfg, event), thread_root=mail.thread_root, message_id=message_id)
+        except MailError as exc:
+            _not_sent(event, exc)
+            return False
+    return True
+
+
+def _dispatch(cfg: Config, st: state_module.State, by_fire: dict[str, _FireMail], mailer: Mailer) -> set[str]:
+    """Send every fire's emails, fires in parallel. Returns ids whose delivery failed."""
+    if cfg.dispatch_workers > 1 and len(by_fire) > 1:
+        with ThreadPoolExecutor(max_workers=min(cfg.dispatch_workers, len(by_fire))) as pool:
+            futures = {fire_id: pool.submit(_send_fire, cfg, mail, mailer) for fire_id, mail in by_fire.items()}
+            sent = {fire_id: future.result() for fire_id, future in futures.items()}
+    else:
+        sent = {fire_id: _send_fire(cfg, mail, mailer) for fire_id, mail in by_fire.items()}
+    return _mailed(st, by_fire, sent)
+
+
+def _send_digest(sub: Subscriber, st: state_module.State, events: list[Event], message: render.Message) -> set[str]:
+    """Digest mode: one email for all of `events` once the window closes. Returns ids whose delivery failed."""
+    try:
+        sub.mailer.send(message, message_id=_digest_id(st, events, sub.mailer))
+    except MailError as exc:
+        return _digest_failed(events, exc)
+    return _digest_sent(sub, st, events)
+
+
+def _process(sub: Subscriber, fires: list[fogos.Fire]) -> bool:
+    """Diff, notify and persist one subscriber. True when nothing is left to send."""
+    st = sub.store.load()
+
+    if not st.initialized:
+        _seed(sub.config, st, fires, sub.mailer)
+        _save(sub, st)
+        return True
+
+    plan = _plan(sub, st, fires)
+    if plan.sighted:
+        _save(sub, st)
+    failed = _dispatch(sub.config, st, plan.mails, sub.mailer)
+    if plan.digest is not None:
+        failed |= _send_digest(sub, st, plan.batched, plan.digest)
+    return _settle(sub, st, fires, plan.events, failed | plan.held)
+
+
+def _guard(sub: Subscriber, work: Callable[..., object], *args: object) -> bool:
+    """Run one subscriber's work. False if it raised or left something unsent."""
+    try:
+        return work(*args) is not False
+    except Exception:
+        # Whatever half-applied changes the memory copy holds, disk is the
+        # last consistent snapshot; start the next cycle from it.
+        sub.store.invalidate()
+        logger.exception("Unhandled error processing subscriber %s", sub.name)
+        return False
+
+
+def run_cycle(cfg: Config, client: httpx.Client, registry: Registry, upstream: sources.Feed) -> None:
+    """One upstream fetch, fanned out to every subscriber."""
+    records = upstream.fetch(client)
+
+    if records is None:
+        for sub in registry.subscribers:
+            _guard(sub, _idle, sub)
+        # An identical body may still bring fresh validators worth keeping.
+        upstream.commit()
+        return
+
+    routed = registry.route(records)
+    # One subscriber's broken volume or template must not starve the rest.
+    clean = [_guard(sub, _process, sub, routed[sub.name]) for sub in registry.subscribers]
+
+    # A failed send or a digest still collecting has to be retried against
+    # the same payload, so only a clean cycle may let the next one skip it.
+    if all(clean):
+        upstream.commit()
+
+
+def _cycle_failed(exc: Exception, consecutive_failures: int) -> None:
+    metrics.CYCLE_FAILURES.inc()
+    if isinstance(exc, fogos.FogosApiError):
+        logger.warning("Fogos API unavailable (attempt %d): %s", consecutive_failures, exc)
+    else:
+        logger.error("Unhandled error during cycle", exc_info=exc)
+
+
+async def _send_fire_async(cfg: Config, mail: _FireMail, mailer: Mailer) -> bool:
+    """`_send_fire` for the asyncio engine."""
+    for event, message_id in zip(mail.events, mail.message_ids):
+        try:
+            await mailer.send_async(_render_event(cfg, event), thread_root=mail.thread_root, message_id=message_id)
+        except MailError as exc:
+            _not_sent(event, exc)
+            return False
+    return True
+
+
+async def _dispatch_async(
+    cfg: Config, st: state_module.State, by_fire: dict[str, _FireMail], mailer: Mailer
+) -> set[str]:
+    """`_dispatch` as tasks: up to FOGOS_DISPATCH_WORKERS fires in flight, each fire's emails in order."""
+    slots = asyncio.Semaphore(cfg.dispatch_workers)
+
+    async def send(mail: _FireMail) -> bool:
+        async with slots:
+            return await _send_fire_async(cfg, mail, mailer)
+
+    results = await asyncio.gather(*(send(mail) for mail in by_fire.values()))
+    return _mailed(st, by_fire, dict(zip(by_fire, results)))
+
+
+async def _send_digest_async(
+    sub: Subscriber, st: state_module.State, events: list[Event], message: render.Message
+) -> set[str]:
+    """`_send_digest` for the asyncio engine."""
+    try:
+        await sub.mailer.send_async(message, message_id=_digest_id(st, events, sub.mailer))
+    except MailError as exc:
+        return _digest_failed(events, exc)
+    return _digest_sent(sub, st, events)
+
+
+async def _process_async(sub: Subscriber, fires: list[fogos.Fire]) -> bool:
+    """`_process` for the asyncio engine: sends as tasks, disk reads and writes off the loop."""
+    st = await asyncio.to_thread(sub.store.load)
+    if not st.initialized:
+        # One status email and a save; nothing here worth interleaving.
+        return await asyncio.to_thread(_process, sub, fires)
+
+    plan = _plan(sub, st, fires)
+    if plan.sighted:
+        await asyncio.to_thread(_save, sub, st)
+    failed = await _dispatch_async(sub.config, st, plan.mails, sub.mailer)
+    if plan.digest is not None:
+        failed |= await _send_digest_async(sub, st, plan.batched, plan.digest)
+    return await asyncio.to_thread(_settle, sub, st, fires, plan.events, failed | plan.held)
+
+
+async def _guarded(sub: Subscriber, work: Awaitable[object]) -> bool:
+    """`_guard` for a subscriber's awaitable work."""
+    try:
+        return await work is not False
+    except Exception:
+        sub.store.invalidate()
+        logger.exception("Unhandled error processing subscriber %s", sub.name)
+        return False
+
+
+async def run_cycle_async(
+    cfg: Config, client: httpx.AsyncClient, registry: Registry, upstream: sources.Feed
+) -> None:
+    """`run_cycle` for the asyncio engine, with every subscriber processed at once.
+
+    One subscriber's state save overlaps another's SMTP round trips, and the
+    courier keeps delivering earlier mail throughout.
+    """
+    records = await upstream.fetch_async(client)
+
+    if records is None:
+        await asyncio.gather(*(_guarded(sub, asyncio.to_thread(_idle, sub)) for sub in registry.subscribers))
+        upstream.commit()
+        return
+
+    routed = registry.route(records)
+    clean = await asyncio.gather(
+        *(_guarded(sub, _process_async(sub, routed[sub.name])) for sub in registry.subscribers)
+    )
+    if all(clean):
+        upstream.commit()
+
+
+async def _serve_async(cfg: Config, registry: Registry) -> int:
+    """The poll loop of FOGOS_ENGINE=asyncio: same cadence, signals through the event loop."""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+
+    def on_signal(signum: int) -> None:
+        _handle_signal(signum, None)
+        stop.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, on_signal, signum)
+
+    profiler = profiling.Profiler(cfg.profile_dir, cfg.profile_cycles, stacks=cfg.profile_stacks)
+    if hasattr(signal, "SIGUSR1"):
+        loop.add_signal_handler(signal.SIGUSR1, profiler.arm)
+    if cfg.profile_on_start:
+        profiler.arm()
+
+    courier = outbox_module.AsyncCourier([sub.mailer for sub in registry.subscribers], workers=cfg.dispatch_workers)
+    courier_task = loop.create_task(courier.run()) if courier.mailers else None
+
+    consecutive_failures = 0
+    upstream = sources.Feed(cfg)
+    scheduler = schedule.Scheduler(cfg)
+    async with fogos.build_async_client(cfg) as client:
+        while not stop.is_set():
+            try:
+                await profiler.call_async(run_cycle_async, cfg, client, registry, upstream)
+                consecutive_failures = 0
+                scheduler.observe(registry, upstream.changed, upstream.last_modified)
+            except Exception as exc:
+                consecutive_failures += 1
+                _cycle_failed(exc, consecutive_failures)
+            metrics.CONSECUTIVE_FAILURES.set(consecutive_failures)
+            courier.wake()
+
+            delay = _sleep_seconds(scheduler, consecutive_failures)
+            logger.debug("Sleeping %ds", delay)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    if courier_task is not None:
+        # Whatever is still queued stays on disk for the next start.
+        courier.stop()
+        try:
+            await asyncio.wait_for(courier_task, timeout=cfg.smtp.timeout)
+        except asyncio.TimeoutError:
+            pass
+    for sub in registry.subscribers:
+        await sub.mailer.aclose()
+    logger.info("Stopped cleanly")
+    return 0
 
 
 def main() -> int:
@@ -184,32 +579,68 @@ def main() -> int:
     for line in config_module.describe(cfg):
         logger.info("  %s", line)
 
-    mailer = Mailer(cfg.smtp, dry_run=cfg.dry_run)
-    if not mailer.verify():
+    try:
+        registry = Registry(subscribers_module.load(cfg))
+    except config_module.ConfigError as exc:
+        logger.error("Configuration error: %s", exc)
+        return 2
+    for sub in registry.subscribers:
+        logger.info("  Subscritor %s → %s", sub.name, ", ".join(sub.config.smtp.recipients))
+
+    if cfg.metrics_port:
+        try:
+            metrics.serve(cfg.metrics_port)
+        except OSError as exc:
+            logger.error("Cannot serve metrics on port %d: %s", cfg.metrics_port, exc)
+            return 2
+
+    # Every subscriber shares the one SMTP server; only the recipients differ.
+    if not registry.subscribers[0].mailer.verify():
         logger.error("Refusing to start with a broken SMTP configuration")
         return 3
 
+    if cfg.engine == "asyncio":
+        return asyncio.run(_serve_async(cfg, registry))
+
     signal.signal(signal.SIGTERM, _handle_signal)
     signal.signal(signal.SIGINT, _handle_signal)
 
-    consecutive_failures = 0
+    profiler = profiling.Profiler(cfg.profile_dir, cfg.profile_cycles, stacks=cfg.profile_stacks)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, profiler.arm)
+    if cfg.profile_on_start:
+        profiler.arm()
 
-    with fogos.build_client() as client:
+    consecutive_failures = 0
+    upstream = sources.Feed(cfg)
+    scheduler = schedule.Scheduler(cfg)
+    courier = outbox_module.Courier([sub.mailer for sub in registry.subscribers], workers=cfg.dispatch_workers)
+    if courier.mailers:
+        # Anything left queued by the last run goes out right away.
+        courier.start()
+
+    with fogos.build_client(cfg) as client:
         while not _shutdown.is_set():
             try:
-                run_cycle(cfg, client, mailer)
+                profiler.call(run_cycle, cfg, client, registry, upstream)
                 consecutive_failures = 0
-            except fogos.FogosApiError as exc:
-                consecutive_failures += 1
-                logger.warning("Fogos API unavailable (attempt %d): %s", consecutive_failures, exc)
-            except Exception:
+                scheduler.observe(registry, upstream.changed, upstream.last_modified)
+            except Exception as exc:
                 consecutive_failures += 1
-                logger.exception("Unhandled error during cycle")
+                _cycle_failed(exc, consecutive_failures)
+            metrics.CONSECUTIVE_FAILURES.set(consecutive_failures)
+            courier.wake()
 
-            delay = _next_delay(cfg.poll_seconds, consecutive_failures)
+            delay = _sleep_seconds(scheduler, consecutive_failures)
             logger.debug("Sleeping %ds", delay)
             _shutdown.wait(delay)
 
+    if courier.is_alive():
+        # Whatever is still queued stays on disk for the next start.
+        courier.stop()
+        courier.join(timeout=cfg.smtp.timeout)
+    for sub in registry.subscribers:
+        sub.mailer.close()
     logger.info("Stopped cleanly")
     return 0
 
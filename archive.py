@@ -0,0 +1,120 @@
+"""On-disk archive of raw upstream payloads, for replaying fire seasons offline.
+
+With FOGOS_ARCHIVE on, every distinct body a source sends is written,
+gzipped, under FOGOS_STATE_DIR/archive/ in one directory per UTC day and
+named by when it arrived:
+
+    archive/2025-08-01/20250801T120512.345Z-fogos.json.gz
+
+A body identical to the last one archived for the same source is not
+written again, so at a one-minute poll the archive grows with upstream's
+refreshes, not with the poll rate. Day directories older than
+FOGOS_ARCHIVE_DAYS are deleted as each new day starts. replay.py reads it
+back.
+"""
+
+from __future__ import annotations
+
+import calendar
+import gzip
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Iterator, NamedTuple
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+# Enough to shrink the KML polygons by an order of magnitude; the higher
+# levels cost several times the CPU for a few percent more.
+COMPRESS_LEVEL = 6
+
+_NAME = re.compile(r"^(\d{8}T\d{6})\.(\d{3})Z-(.+)\.json\.gz$")
+_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class Payload(NamedTuple):
+    at: float
+    source: str
+    path: str
+
+    def read(self) -> bytes:
+        with gzip.open(self.path, "rb") as handle:
+            return handle.read()
+
+
+class Archive:
+    """Writes bodies as they arrive. Never raises: a full disk must not cost a cycle.
+
+    `keep_days` is how many days before today to keep; 0 keeps everything.
+    """
+
+    def __init__(self, directory: str, keep_days: int = 0) -> None:
+        self.directory = directory
+        self.keep_days = keep_days
+        self._last: dict[str, str] = {}
+        self._pruned: str | None = None
+
+    def record(self, source: str, chunks: list[bytes], digest: str) -> None:
+        if self._last.get(source) == digest:
+            return
+        at = time.time()
+        today = time.strftime("%Y-%m-%d", time.gmtime(at))
+        if today != self._pruned:
+            self.prune(at)
+            self._pruned = today
+        day = os.path.join(self.directory, today)
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(at))}.{int(at % 1 * 1000):03d}Z-{source}.json.gz"
+        try:
+            os.makedirs(day, exist_ok=True)
+            handle = tempfile.NamedTemporaryFile(dir=day, prefix=".archive-", suffix=".tmp", delete=False)
+            try:
+                with handle, gzip.GzipFile(fileobj=handle, mode="wb", compresslevel=COMPRESS_LEVEL) as out:
+                    for chunk in chunks:
+                        out.write(chunk)
+                os.replace(handle.name, os.path.join(day, name))
+            except OSError:
+                os.unlink(handle.name)
+                raise
+        except OSError as exc:
+            logger.error("Could not archive payload from %s: %s", source, exc)
+            return
+        self._last[source] = digest
+
+    def prune(self, now: float) -> None:
+        """Delete the day directories older than `keep_days` before `now`."""
+        if not self.keep_days:
+            return
+        oldest = time.strftime("%Y-%m-%d", time.gmtime(now - self.keep_days * 86400))
+        try:
+            days = sorted(day for day in os.listdir(self.directory) if _DAY.match(day) and day < oldest)
+        except FileNotFoundError:
+            return
+        except OSError as exc:
+            logger.error("Could not list the archive at %s: %s", self.directory, exc)
+            return
+        for day in days:
+            try:
+                shutil.rmtree(os.path.join(self.directory, day))
+            except OSError as exc:
+                logger.error("Could not prune archived payloads from %s: %s", day, exc)
+        if days:
+            logger.info("Pruned %d day(s) of archived payloads, up to %s", len(days), days[-1])
+
+
+def payloads(directory: str, since: float = 0.0, until: float = float("inf")) -> Iterator[Payload]:
+    """Every archived body in [since, until), oldest first."""
+    for day in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, day)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            match = _NAME.match(name)
+            if match is None:
+                continue
+            stamp, millis, source = match.groups()
+            at = calendar.timegm(time.strptime(stamp, "%Y%m%dT%H%M%S")) + int(millis) / 1000
+            if since <= at < until:
+                yield Payload(at, source, os.path.join(folder, name))
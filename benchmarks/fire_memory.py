@@ -0,0 +1,98 @@
+"""Memory held by 10k fogos.Fire objects, against the same data unslotted.
+
+The baseline is a plain dataclass with Fire's persisted fields — the layout
+Fire had before it was slotted and its text fields interned. Both are built
+from freshly parsed JSON, so every string starts out as its own object, just
+as it does when a payload comes off the wire.
+
+    python3 benchmarks/fire_memory.py [fires]
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fogos import Fire
+
+DISTRICTS = {
+    "Leiria": ["Óbidos", "Caldas da Rainha", "Bombarral", "Peniche", "Alcobaça"],
+    "Viseu": ["Vouzela", "São Pedro do Sul", "Tondela", "Mangualde"],
+    "Castelo Branco": ["Sertã", "Oleiros", "Proença-a-Nova", "Fundão"],
+    "Faro": ["Monchique", "Loulé", "Silves", "Tavira"],
+}
+STATUSES = [(3, "Em Curso"), (4, "Em Resolução"), (5, "Em Conclusão"), (7, "Vigilância")]
+
+PlainFire = dataclasses.make_dataclass(
+    "PlainFire", [(f.name, f.type) for f in dataclasses.fields(Fire) if f.init]
+)
+
+
+def records(count: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    rows = []
+    for index in range(count):
+        district = rnd.choice(list(DISTRICTS))
+        concelho = rnd.choice(DISTRICTS[district])
+        code, status = rnd.choice(STATUSES)
+        rows.append(
+            {
+                "id": f"2025{index:09d}",
+                "started_at": 1_750_000_000 + rnd.randrange(86_400),
+                "status": status,
+                "status_code": code,
+                "district": district,
+                "concelho": concelho,
+                "freguesia": f"{concelho} (freguesia {rnd.randrange(8)})",
+                "detail_location": f"Estrada {index}",
+                "natureza": rnd.choice(["Mato", "Povoamento Florestal", "Agrícola"]),
+                "lat": 39.0 + rnd.random(),
+                "lng": -9.0 - rnd.random(),
+                "distance_km": round(rnd.uniform(0.5, 50), 1),
+                "bearing": rnd.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
+                "man": rnd.randrange(0, 120),
+                "terrain": rnd.randrange(0, 40),
+                "aerial": rnd.randrange(0, 4),
+                "aquatic": rnd.randrange(0, 2),
+                "important": rnd.random() < 0.1,
+                "matched_by": "radius",
+            }
+        )
+    return json.dumps(rows)
+
+
+def measure(cls, payload: str) -> tuple[int, list]:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    rows = json.loads(payload)
+    fires = [cls(**row) for row in rows]
+    # Everything else the rows held can go; only what the objects keep counts.
+    del rows
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, fires
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    payload = records(count)
+
+    plain, _ = measure(PlainFire, payload)
+    compact, _ = measure(Fire, payload)
+
+    print(f"{count} fires")
+    print(f"  plain dataclass : {plain / 1024:8.0f} KiB  ({plain / count:5.0f} B/fire)")
+    print(f"  fogos.Fire      : {compact / 1024:8.0f} KiB  ({compact / count:5.0f} B/fire, {1 - compact / plain:.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
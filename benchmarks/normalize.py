@@ -0,0 +1,49 @@
+"""Micro-benchmark: memoised geo.normalize against the uncached fold.
+
+Feeds both the same stream of place names, shaped like a real cycle — a few
+hundred distinct names, each seen many times.
+
+    python3 benchmarks/normalize.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import geo
+
+NAMES = [
+    "Óbidos", "Vouzela", "Bombarral", "Cambra E Carvalhal De Vermilhas", "São Pedro do Sul",
+    "Castelo Branco", "Vila Nova de Foz Côa", "Mação", "Pedrógão Grande", "Monchique",
+    "Sertã", "Oleiros", "Proença-a-Nova", "Santarém", "Évora", "Guarda", "Viseu", "Leiria",
+]
+
+
+def workload(distinct: int = 400, total: int = 20_000, seed: int = 1) -> list[str]:
+    rnd = random.Random(seed)
+    pool = [f"{rnd.choice(NAMES)} | {rnd.choice(NAMES)} | Freguesia {i}" for i in range(distinct)]
+    return [rnd.choice(pool) for _ in range(total)]
+
+
+def main() -> None:
+    texts = workload()
+    geo._fold_cached.cache_clear()
+
+    uncached = min(timeit.repeat(lambda: [geo._fold(t) for t in texts], number=1, repeat=5))
+    cached = min(timeit.repeat(lambda: [geo.normalize(t) for t in texts], number=1, repeat=5))
+
+    info = geo.normalize_cache_info()
+    per_call = 1e9 / len(texts)
+    print(f"{len(texts)} calls over {len({*texts})} distinct strings")
+    print(f"  uncached : {uncached * per_call:8.0f} ns/call")
+    print(f"  memoised : {cached * per_call:8.0f} ns/call  ({uncached / cached:.1f}x)")
+    print(f"  cache    : {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries")
+
+
+if __name__ == "__main__":
+    main()
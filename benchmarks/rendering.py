@@ -0,0 +1,104 @@
+"""Micro-benchmark: render.build_message over a burst of events.
+
+Builds a realistic mix of NEW, UPDATE and RESOLVED events (1000 by default)
+through changes.detect, then times rendering every one of them, plus the
+digest and status emails built from the same fires.
+
+    python3 benchmarks/rendering.py [events]
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("EMAIL_TO", "bench@example.com")
+os.environ.setdefault("FOGOS_DRY_RUN", "true")
+os.environ.setdefault("FOGOS_MAX_DISTANCE_KM", "50")
+os.environ.setdefault("FOGOS_CENTER_LAT", "39.36")
+os.environ.setdefault("FOGOS_CENTER_LON", "-9.16")
+
+import config
+import render
+from changes import detect
+from fogos import Fire
+
+PLACES = [
+    ("Leiria", "Óbidos", "A dos Negros"),
+    ("Viseu", "Vouzela", "Cambra E Carvalhal De Vermilhas"),
+    ("Lisboa", "Sintra", "Colares"),
+    ("Faro", "Monchique", "Alferce"),
+    ("Castelo Branco", "Sertã", "Cernache do Bonjardim"),
+]
+STATUSES = [(3, "Em Curso"), (4, "Em Resolução"), (5, "Em Conclusão"), (7, "Vigilância")]
+
+
+def _fire(rnd: random.Random, index: int) -> Fire:
+    district, concelho, freguesia = rnd.choice(PLACES)
+    code, status = rnd.choice(STATUSES)
+    return Fire(
+        id=f"2025{index:09d}",
+        started_at=1_750_000_000 + rnd.randrange(86_400),
+        status=status,
+        status_code=code,
+        district=district,
+        concelho=concelho,
+        freguesia=freguesia,
+        detail_location=f"{freguesia} <estrada {index}>",
+        natureza="Mato",
+        lat=39.0 + rnd.random(),
+        lng=-9.0 - rnd.random(),
+        distance_km=round(rnd.uniform(0.5, 50), 1),
+        bearing=rnd.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
+        man=rnd.randrange(0, 120),
+        terrain=rnd.randrange(0, 40),
+        aerial=rnd.randrange(0, 4),
+        aquatic=rnd.randrange(0, 2),
+        important=rnd.random() < 0.1,
+        matched_by=rnd.choice(["radius", f"location:{concelho}"]),
+    )
+
+
+def workload(events: int, seed: int = 1) -> list:
+    """About a third each of new, updated and resolved fires."""
+    rnd = random.Random(seed)
+    previous: dict[str, Fire] = {}
+    current: list[Fire] = []
+    index = 0
+    while len(detect(current, previous, "info")) < events:
+        index += 1
+        fire = _fire(rnd, index)
+        roll = index % 3
+        if roll == 0:
+            current.append(fire)
+        elif roll == 1:
+            before = _fire(random.Random(index), index)
+            previous[fire.id] = before
+            current.append(fire)
+        else:
+            previous[fire.id] = fire
+    return detect(current, previous, "info")[:events]
+
+
+def main() -> None:
+    events = workload(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    cfg = config.load()
+    fires = [event.fire for event in events]
+
+    single = min(timeit.repeat(lambda: [render.build_message(e, cfg) for e in events], number=1, repeat=9))
+    digest = min(timeit.repeat(lambda: render.build_digest(events, cfg), number=1, repeat=9))
+    status = min(timeit.repeat(lambda: render.build_status_message(cfg, fires, "Resumo", "Nota"), number=1, repeat=9))
+
+    per_event = 1e6 / len(events)
+    print(f"{len(events)} events")
+    print(f"  build_message       : {single * per_event:7.1f} µs/message")
+    print(f"  build_digest        : {digest * per_event:7.1f} µs/event")
+    print(f"  build_status_message: {status * per_event:7.1f} µs/fire")
+
+
+if __name__ == "__main__":
+    main()
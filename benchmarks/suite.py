@@ -0,0 +1,261 @@
+"""Benchmark suite: every stage of a poll cycle, at 100, 1k and 10k records.
+
+Each stage runs on the same synthetic fogos.pt payload (seeded, so two runs
+of the suite see identical data) and is timed as the best of several
+repeats. Results are written as JSON keyed by stage and payload size, along
+with the commit they were measured at, so runs from two commits can be set
+side by side:
+
+    python3 benchmarks/suite.py -o before.json
+    git checkout other-branch
+    python3 benchmarks/suite.py -o after.json
+    python3 benchmarks/suite.py --compare before.json after.json
+
+Stages that depend on earlier ones (detect, render, state, send) get their
+input from running the real pipeline once up front, never from timed code.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import functools
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+# A radius that covers the whole synthetic area, so every record goes all
+# the way through the pipeline, plus a few names for the location matcher.
+os.environ.setdefault("EMAIL_TO", "bench@example.com")
+os.environ.setdefault("FOGOS_DRY_RUN", "true")
+os.environ.setdefault("FOGOS_MAX_DISTANCE_KM", "400")
+os.environ.setdefault("FOGOS_CENTER_LAT", "39.5")
+os.environ.setdefault("FOGOS_CENTER_LON", "-8.0")
+os.environ.setdefault("FOGOS_LOCATIONS", "Óbidos,Colares,Monchique")
+
+import httpx
+
+import changes
+import config
+import fogos
+import geo
+import render
+import state
+import trends
+from mailer import Mailer
+
+SIZES = (100, 1_000, 10_000)
+SAMPLE_SECONDS = 0.05
+
+PLACES = [
+    ("Leiria", "Óbidos", "A dos Negros"),
+    ("Viseu", "Vouzela", "Cambra E Carvalhal De Vermilhas"),
+    ("Lisboa", "Sintra", "Colares"),
+    ("Faro", "Monchique", "Alferce"),
+    ("Castelo Branco", "Sertã", "Cernache do Bonjardim"),
+    ("Santarém", "Mação", "Envendos"),
+]
+STATUSES = [(3, "Em Curso"), (4, "Em Resolução"), (5, "Em Conclusão"), (7, "Vigilância"), (8, "Encerrada")]
+
+
+def payload(count: int, seed: int = 1) -> bytes:
+    """A /new/fires body shaped like the real one, polygons and all."""
+    rnd = random.Random(seed)
+    data = []
+    for index in range(count):
+        district, concelho, freguesia = rnd.choice(PLACES)
+        code, status = rnd.choice(STATUSES)
+        data.append(
+            {
+                "id": f"2025{index:09d}",
+                "sadoId": str(index),
+                "lat": 39.5 + rnd.uniform(-2.5, 2.5),
+                "lng": -8.0 + rnd.uniform(-1.2, 1.2),
+                "dateTime": {"sec": 1_750_000_000 + rnd.randrange(86_400)},
+                "date": "01-08-2025",
+                "hour": "12:00",
+                "status": status,
+                "statusCode": code,
+                "location": f"{district}, {concelho}, {freguesia}",
+                "district": district,
+                "concelho": concelho,
+                "freguesia": freguesia,
+                "localidade": freguesia,
+                "detailLocation": f"LatLong(1,2) - Estrada {index}",
+                "natureza": rnd.choice(["Mato", "Povoamento Florestal", "Agrícola"]),
+                "man": rnd.randrange(0, 120),
+                "terrain": rnd.randrange(0, 40),
+                "aerial": rnd.randrange(0, 4),
+                "meios_aquaticos": rnd.randrange(0, 2),
+                "important": rnd.random() < 0.1,
+                "kml": "<kml>" + "-8.1,39.4 " * rnd.randrange(10, 300) + "</kml>",
+                "icnf": {"burnArea": {"total": rnd.random() * 100}},
+            }
+        )
+    return json.dumps({"success": True, "data": data}, ensure_ascii=False).encode("utf-8")
+
+
+def _previous(fires: list[fogos.Fire], seed: int = 2) -> dict[str, fogos.Fire]:
+    """A last snapshot to diff against: some fires new, some changed, some gone."""
+    rnd = random.Random(seed)
+    previous: dict[str, fogos.Fire] = {}
+    for fire in fires:
+        roll = rnd.random()
+        if roll < 0.3:
+            continue  # NEW
+        if roll < 0.6:
+            fire = dataclasses.replace(fire, man=fire.man + 10, status_code=3, status="Em Curso")
+        previous[fire.id] = fire
+    for index in range(len(fires) // 10):  # RESOLVED
+        gone = dataclasses.replace(fires[index % len(fires)], id=f"gone-{index}")
+        previous[gone.id] = gone
+    return previous
+
+
+def _respond(body: bytes, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=body)
+
+
+def _best(func: Callable[[], object], items: int, repeat: int) -> dict:
+    # Enough calls per sample (about SAMPLE_SECONDS) that fast stages are not
+    # all timer noise, without letting slow ones drag the suite out.
+    once = timeit.timeit(func, number=1)
+    number = max(1, int(SAMPLE_SECONDS / max(once, 1e-9)))
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    return {"items": items, "seconds": best, "us_per_item": best * 1e6 / max(items, 1)}
+
+
+def run(sizes: tuple[int, ...], repeat: int) -> dict[str, dict[str, dict]]:
+    cfg = config.load()
+    mailer = Mailer(cfg.smtp, dry_run=True)
+    results: dict[str, dict[str, dict]] = {}
+
+    def record(stage: str, size: int, func: Callable[[], object], items: int) -> None:
+        results.setdefault(stage, {})[str(size)] = _best(func, items, repeat)
+        print(f"  {stage:<18} {size:>6}: {results[stage][str(size)]['us_per_item']:9.2f} µs/item", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="fogos-bench-") as scratch:
+        for size in sizes:
+            body = payload(size)
+            chunks = [body[i : i + fogos.STREAM_CHUNK] for i in range(0, len(body), fogos.STREAM_CHUNK)]
+            transport = httpx.MockTransport(functools.partial(_respond, body))
+            client = httpx.Client(transport=transport)
+
+            records = fogos._parse_streaming(chunks, "utf-8")
+            fires = fogos.select(records, cfg)
+            previous = _previous(fires)
+            events = changes.detect(fires, previous, "info")
+            messages = [render.build_message(event, cfg) for event in events]
+            snapshot = state.State(fires={fire.id: fire for fire in fires}, initialized=True)
+            path = os.path.join(scratch, f"state-{size}.json")
+            state.save(path, snapshot)
+            coords = [fogos.coordinates(raw) for raw in records]
+            lats = [lat for lat, _ in coords]
+            lons = [lng for _, lng in coords]
+            lat0, lon0 = cfg.center_lat, cfg.center_lon
+
+            # Every stage binds what it uses now: timeit calls it after the loop has moved on.
+            # A fresh Upstream each call, or the digest check would skip the parse.
+            record("fetch", size, lambda client=client: fogos.fetch(cfg, client, fogos.Upstream()), size)
+            record("parse_streaming", size, functools.partial(fogos._parse_streaming, chunks, "utf-8"), size)
+            record("parse_buffered", size, functools.partial(fogos._parse_buffered, chunks), size)
+            record(
+                "haversine_km",
+                size,
+                lambda coords=coords, lat0=lat0, lon0=lon0: [geo.haversine_km(lat0, lon0, a, b) for a, b in coords],
+                size,
+            )
+            record("haversine_batch", size, functools.partial(geo.haversine_bearing_batch, lat0, lon0, lats, lons), size)
+            record(
+                "matched_location",
+                size,
+                lambda records=records: [fogos._matched_location(raw, cfg.location_matcher) for raw in records],
+                size,
+            )
+            record("select", size, functools.partial(fogos.select, records, cfg), size)
+            record("detect", size, functools.partial(changes.detect, fires, previous, "info"), len(events))
+            # Warmed once, so every timed call pushes into a series that exists.
+            tracker = trends.Tracker()
+            changes.detect(fires, previous, "info", tracker)
+            record("detect_trends", size, functools.partial(changes.detect, fires, previous, "info", tracker), len(events))
+            record("build_message", size, lambda events=events: [render.build_message(e, cfg) for e in events], len(events))
+            record("state_save", size, functools.partial(state.save, path, snapshot), len(fires))
+            record("state_load", size, functools.partial(state.load, path), len(fires))
+            record("mailer_send", size, lambda messages=messages: [mailer.send(m) for m in messages], len(messages))
+            client.close()
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "-C", REPO, "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path, "r", encoding="utf-8") as handle:
+        before = json.load(handle)
+    with open(after_path, "r", encoding="utf-8") as handle:
+        after = json.load(handle)
+
+    print(f"{'stage':<18} {'size':>6} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12}  change")
+    for stage, by_size in after["results"].items():
+        for size, result in by_size.items():
+            old = before["results"].get(stage, {}).get(size)
+            new = result["us_per_item"]
+            if old is None:
+                print(f"{stage:<18} {size:>6} {'—':>12} {new:12.2f}")
+                continue
+            delta = new / old["us_per_item"] - 1 if old["us_per_item"] else 0.0
+            print(f"{stage:<18} {size:>6} {old['us_per_item']:12.2f} {new:12.2f}  {delta:+6.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated record counts")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per stage; the best one counts")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Dry-run sends log every message; that is I/O, not what is measured.
+    logging.basicConfig(level=logging.WARNING)
+    sizes = tuple(int(size) for size in args.sizes.split(",") if size.strip())
+    results = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "numpy": geo.np is not None,
+        "repeat": args.repeat,
+        "results": run(sizes, args.repeat),
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
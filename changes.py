@@ -11,6 +11,7 @@ from dataclasses import dataclass, field
 
 from config import SEVERITY_ORDER
 from fogos import Fire
+from trends import Tracker
 
 # A resource change counts as meaningful when it moves at least this fraction
 # AND this many units, so both small and large fires get sensible thresholds.
@@ -59,6 +60,11 @@ def _severity_rank(fire: Fire) -> int:
     return SEVERITY_ORDER.index(fire.severity)
 
 
+def _threshold(old: int) -> int:
+    """How far a resource count has to move from `old` to be worth telling anyone."""
+    return max(ABSOLUTE_THRESHOLD, round(old * RELATIVE_THRESHOLD))
+
+
 def _resource_change(label: str, old: int, new: int) -> Change | None:
     delta = new - old
     if delta == 0:
@@ -66,7 +72,7 @@ def _resource_change(label: str, old: int, new: int) -> Change | None:
 
     # Crossing zero always matters — aircraft arriving or leaving is the story.
     crossed_zero = (old == 0) != (new == 0)
-    significant = abs(delta) >= max(ABSOLUTE_THRESHOLD, round(old * RELATIVE_THRESHOLD))
+    significant = abs(delta) >= _threshold(old)
     if not (crossed_zero or significant):
         return None
 
@@ -126,12 +132,28 @@ def _diff(previous: Fire, current: Fire) -> list[Change]:
     return changes
 
 
-def detect(current: list[Fire], previous: dict[str, Fire], min_severity: str) -> list[Event]:
+def _gradual_change(label: str, old: int, new: int, hours: float) -> Change:
+    span = f"{hours:.1f} h" if hours < 10 else f"{hours:.0f} h"
+    return Change(
+        label=label,
+        old=str(old),
+        new=str(new),
+        headline=f"subida gradual de {label.lower()} ({old} → {new} em {span})",
+        escalation=1,
+    )
+
+
+def detect(
+    current: list[Fire], previous: dict[str, Fire], min_severity: str, trends: Tracker | None = None
+) -> list[Event]:
     """Compare live fires against the last snapshot and produce events.
 
     `min_severity` gates NEW fires only. Once a fire has been reported, its
     updates and resolution are always reported — going quiet halfway through
     an incident is worse than never having started.
+
+    With `trends`, reported fires also carry a short history, and a resource
+    that crept up across many payloads is reported once the creep adds up.
     """
     threshold = SEVERITY_ORDER.index(min_severity)
     events: list[Event] = []
@@ -144,9 +166,17 @@ def detect(current: list[Fire], previous: dict[str, Fire], min_severity: str) ->
                 events.append(Event(kind=NEW, fire=fire))
             continue
 
-        if changes := _diff(prior, fire):
+        changes = _diff(prior, fire)
+        if trends is not None:
+            changes += [
+                _gradual_change(*rise) for rise in trends.observe(fire, bool(changes), _threshold)
+            ]
+        if changes:
             events.append(Event(kind=UPDATE, fire=fire, previous=prior, changes=changes))
 
+    if trends is not None:
+        trends.prune(live_ids & previous.keys())
+
     for fire_id, prior in previous.items():
         if fire_id not in live_ids:
             events.append(Event(kind=RESOLVED, fire=prior, previous=prior))
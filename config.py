@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass, field
 
-from geo import normalize
+from geo import LocationMatcher, normalize
 
 VERSION = "2.0.0"
 
@@ -76,12 +77,55 @@ class Config:
     log_level: str
     smtp: SmtpConfig
     dry_run: bool
+    stream_parse: bool
+    subscribers_file: str
+    state_journal: bool
+    state_backend: str
+    dispatch_workers: int
+    digest: bool
+    digest_minutes: int
+    outbox: bool
+    metrics_port: int
+    profile_cycles: int
+    profile_on_start: bool
+    profile_stacks: bool
+    engine: str
+    extra_sources: list[tuple[str, str]]
+    http2: bool
+    compression: bool
+    adaptive_poll: bool
+    poll_floor_seconds: int
+    poll_quiet_minutes: int
+    near_km: float
+    archive: bool
+    archive_days: int
+    history_days: int
+    trends: bool
     locations_normalized: list[str] = field(default_factory=list, repr=False)
+    location_matcher: LocationMatcher = field(
+        default_factory=lambda: LocationMatcher([]), repr=False, compare=False
+    )
 
     @property
     def state_file(self) -> str:
         return os.path.join(self.state_dir, "state.json")
 
+    @property
+    def state_db_file(self) -> str:
+        return os.path.join(self.state_dir, "state.db")
+
+    @property
+    def outbox_dir(self) -> str:
+        return os.path.join(self.state_dir, "outbox")
+
+    @property
+    def profile_dir(self) -> str:
+        return os.path.join(self.state_dir, "profiles")
+
+    @property
+    def archive_dir(self) -> str:
+        return os.path.join(self.state_dir, "archive")
+
     @property
     def poll_seconds(self) -> int:
         return self.poll_minutes * 60
@@ -89,6 +133,31 @@ class Config:
 
 SEVERITY_ORDER = ["info", "elevated", "major"]
 
+STATE_BACKENDS = ["json", "sqlite"]
+
+ENGINES = ["threads", "asyncio"]
+
+_SOURCE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+def _sources(name: str) -> list[tuple[str, str]]:
+    """`label=url` pairs, comma-separated."""
+    sources: list[tuple[str, str]] = []
+    for entry in _csv(name):
+        label, sep, url = entry.partition("=")
+        label, url = label.strip().casefold(), url.strip()
+        if not sep or not _SOURCE_NAME.match(label) or not url.startswith(("http://", "https://")):
+            raise ConfigError(f"{name} entries must look like name=https://..., got {entry!r}")
+        if label in {"fogos"} | {seen for seen, _ in sources}:
+            raise ConfigError(f"{name}: source name {label!r} is used twice")
+        sources.append((label, url))
+    return sources
+
+
+def compile_locations(locations: list[str]) -> LocationMatcher:
+    """Compile FOGOS_LOCATIONS once, labelled as the user wrote them."""
+    return LocationMatcher([(normalize(loc), loc) for loc in locations])
+
 
 def _load_dotenv_if_present() -> None:
     """Convenience for local runs, so stack.env is the single config file.
@@ -113,10 +182,12 @@ def load() -> Config:
 
     locations = _csv("FOGOS_LOCATIONS")
     max_distance = _float("FOGOS_MAX_DISTANCE_KM", 0.0)
+    subscribers_file = _raw("FOGOS_SUBSCRIBERS_FILE", "") or ""
 
-    if max_distance <= 0 and not locations:
+    if max_distance <= 0 and not locations and not subscribers_file:
         raise ConfigError(
-            "Nothing to monitor: set FOGOS_MAX_DISTANCE_KM above 0, FOGOS_LOCATIONS, or both"
+            "Nothing to monitor: set FOGOS_MAX_DISTANCE_KM above 0, FOGOS_LOCATIONS, "
+            "or FOGOS_SUBSCRIBERS_FILE"
         )
 
     center_lat = _float("FOGOS_CENTER_LAT", 0.0)
@@ -132,14 +203,60 @@ def load() -> Config:
     if poll_minutes < 1:
         raise ConfigError("FOGOS_POLL_MINUTES must be at least 1 (be kind to the upstream API)")
 
+    # Only read by the adaptive scheduler; without it they must not stop a
+    # configuration that predates them from loading.
+    adaptive_poll = _bool("FOGOS_ADAPTIVE_POLL", False)
+    poll_floor_seconds = _int("FOGOS_POLL_FLOOR_SECONDS", 30)
+    poll_quiet_minutes = _int("FOGOS_POLL_QUIET_MINUTES", max(10, poll_minutes))
+    near_km = _float("FOGOS_NEAR_KM", 10.0)
+    if adaptive_poll:
+        if not 15 <= poll_floor_seconds <= poll_minutes * 60:
+            raise ConfigError("FOGOS_POLL_FLOOR_SECONDS must be between 15 and FOGOS_POLL_MINUTES")
+        if poll_quiet_minutes < poll_minutes:
+            raise ConfigError("FOGOS_POLL_QUIET_MINUTES must be at least FOGOS_POLL_MINUTES")
+        if near_km < 0:
+            raise ConfigError("FOGOS_NEAR_KM must be 0 (disabled) or more")
+
     min_severity = (_raw("FOGOS_MIN_SEVERITY", "info") or "info").casefold()
     if min_severity not in SEVERITY_ORDER:
         raise ConfigError(f"FOGOS_MIN_SEVERITY must be one of {SEVERITY_ORDER}")
 
     recipients = _csv("EMAIL_TO")
-    if not recipients:
+    if not recipients and not subscribers_file:
         raise ConfigError("EMAIL_TO is required (comma-separated list of recipients)")
 
+    state_backend = (_raw("FOGOS_STATE_BACKEND", "json") or "json").casefold()
+    if state_backend not in STATE_BACKENDS:
+        raise ConfigError(f"FOGOS_STATE_BACKEND must be one of {STATE_BACKENDS}")
+
+    dispatch_workers = _int("FOGOS_DISPATCH_WORKERS", 4)
+    if dispatch_workers < 1:
+        raise ConfigError("FOGOS_DISPATCH_WORKERS must be at least 1")
+
+    digest_minutes = _int("FOGOS_DIGEST_MINUTES", 0)
+    if digest_minutes < 0:
+        raise ConfigError("FOGOS_DIGEST_MINUTES must be 0 (every cycle) or more")
+
+    archive_days = _int("FOGOS_ARCHIVE_DAYS", 7)
+    if archive_days < 0:
+        raise ConfigError("FOGOS_ARCHIVE_DAYS must be 0 (keep everything) or more")
+
+    history_days = _int("FOGOS_HISTORY_DAYS", 30)
+    if history_days < 0:
+        raise ConfigError("FOGOS_HISTORY_DAYS must be 0 (keep everything) or more")
+
+    metrics_port = _int("FOGOS_METRICS_PORT", 0)
+    if not 0 <= metrics_port <= 65535:
+        raise ConfigError("FOGOS_METRICS_PORT must be 0 (disabled) or a TCP port")
+
+    engine = (_raw("FOGOS_ENGINE", "threads") or "threads").casefold()
+    if engine not in ENGINES:
+        raise ConfigError(f"FOGOS_ENGINE must be one of {ENGINES}")
+
+    profile_cycles = _int("FOGOS_PROFILE_CYCLES", 3)
+    if profile_cycles < 1:
+        raise ConfigError("FOGOS_PROFILE_CYCLES must be at least 1")
+
     dry_run = _bool("FOGOS_DRY_RUN", False)
     smtp_host = _raw("SMTP_HOST", "") or ""
     if not smtp_host and not dry_run:
@@ -166,6 +283,7 @@ def load() -> Config:
         max_distance_km=max_distance,
         locations=locations,
         locations_normalized=[normalize(loc) for loc in locations],
+        location_matcher=compile_locations(locations),
         poll_minutes=poll_minutes,
         min_severity=min_severity,
         heartbeat_hours=_float("FOGOS_HEARTBEAT_HOURS", 24.0),
@@ -174,22 +292,94 @@ def load() -> Config:
         log_level=(_raw("LOG_LEVEL", "INFO") or "INFO").upper(),
         smtp=smtp,
         dry_run=dry_run,
+        stream_parse=_bool("FOGOS_STREAM_PARSE", True),
+        subscribers_file=subscribers_file,
+        state_journal=_bool("FOGOS_STATE_JOURNAL", False),
+        state_backend=state_backend,
+        dispatch_workers=dispatch_workers,
+        digest=_bool("FOGOS_DIGEST", False),
+        digest_minutes=digest_minutes,
+        outbox=_bool("FOGOS_OUTBOX", False),
+        metrics_port=metrics_port,
+        profile_cycles=profile_cycles,
+        profile_on_start=_bool("FOGOS_PROFILE_ON_START", False),
+        profile_stacks=_bool("FOGOS_PROFILE_STACKS", False),
+        engine=engine,
+        extra_sources=_sources("FOGOS_EXTRA_SOURCES"),
+        http2=_bool("FOGOS_HTTP2", False),
+        compression=_bool("FOGOS_COMPRESSION", True),
+        adaptive_poll=adaptive_poll,
+        poll_floor_seconds=poll_floor_seconds,
+        poll_quiet_minutes=poll_quiet_minutes,
+        near_km=near_km,
+        archive=_bool("FOGOS_ARCHIVE", False),
+        archive_days=archive_days,
+        history_days=history_days,
+        trends=_bool("FOGOS_TRENDS", False),
+    )
+
+
+def _state_location(config: Config) -> str:
+    if config.state_backend == "sqlite":
+        kept = f"histórico de {config.history_days} dias" if config.history_days else "histórico sem limite"
+        return f"{config.state_db_file} (SQLite, {kept})"
+    return f"{config.state_file}{' (+ journal)' if config.state_journal else ''}"
+
+
+def _digest_mode(config: Config) -> str:
+    if not config.digest:
+        return "desativado (um email por evento)"
+    window = f"janela de {config.digest_minutes} min" if config.digest_minutes else "cada ciclo"
+    return f"{window}; novos 'major' seguem de imediato"
+
+
+def _interval(config: Config) -> str:
+    if not config.adaptive_poll:
+        return f"{config.poll_minutes} min"
+    return (
+        f"adaptativo: {config.poll_floor_seconds}s com fogos graves ou a menos de {config.near_km:g} km, "
+        f"{config.poll_minutes} min, {config.poll_quiet_minutes} min sem atividade ou no inverno"
     )
 
 
+def _archive(config: Config) -> str:
+    if not config.archive:
+        return "desativado"
+    kept = f"últimos {config.archive_days} dias" if config.archive_days else "sem limite"
+    return f"{config.archive_dir} ({kept})"
+
+
+def _profiling(config: Config) -> str:
+    when = "arranque e SIGUSR1" if config.profile_on_start else "SIGUSR1"
+    what = "cProfile + pilhas" if config.profile_stacks else "cProfile"
+    return f"{config.profile_cycles} ciclo(s) após {when}, {what} em {config.profile_dir}"
+
+
 def describe(config: Config) -> list[str]:
     """Human-readable config summary for the startup log (no secrets)."""
     radius = f"{config.max_distance_km:g} km de ({config.center_lat:.4f}, {config.center_lon:.4f})"
     return [
         f"Raio            : {radius if config.max_distance_km > 0 else 'desativado'}",
         f"Localidades     : {', '.join(config.locations) or 'nenhuma'}",
-        f"Intervalo       : {config.poll_minutes} min",
+        f"Intervalo       : {_interval(config)}",
+        f"Motor           : {config.engine}",
         f"Severidade min. : {config.min_severity}",
+        f"Resumo          : {_digest_mode(config)}",
+        f"Tendências      : {'subidas graduais' if config.trends else 'desativado'}",
         f"Heartbeat       : {f'{config.heartbeat_hours:g}h' if config.heartbeat_hours > 0 else 'desativado'}",
-        f"Estado          : {config.state_file}",
+        f"Estado          : {_state_location(config)}",
         f"SMTP            : {config.smtp.host}:{config.smtp.port} "
         f"({'SSL' if config.smtp.use_ssl else 'STARTTLS' if config.smtp.use_starttls else 'plain'})",
+        f"Envio           : até {config.dispatch_workers} em paralelo"
+        f"{f', via {config.outbox_dir}' if config.outbox else ''}",
         f"De              : {config.smtp.sender}",
         f"Para            : {', '.join(config.smtp.recipients)}",
         f"Dry run         : {config.dry_run}",
+        f"Parse           : {'streaming' if config.stream_parse else 'buffered'}",
+        f"Fontes          : {', '.join(['fogos', *(name for name, _ in config.extra_sources)])}",
+        f"Transferência   : {'HTTP/2' if config.http2 else 'HTTP/1.1'}, {'comprimida' if config.compression else 'sem compressão'}",
+        f"Subscritores    : {config.subscribers_file or 'desativado'}",
+        f"Perfil          : {_profiling(config)}",
+        f"Arquivo         : {_archive(config)}",
+        f"Métricas        : {f'porta {config.metrics_port} (/metrics)' if config.metrics_port else 'desativado'}",
     ]
@@ -2,15 +2,35 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
+import functools
+import hashlib
+import importlib.util
+import json
 import logging
 import re
-from dataclasses import asdict, dataclass
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timezone
+from typing import Callable, Iterator
 
 import httpx
 
+import jsonstream
+import metrics
 from config import Config
-from geo import bearing_label, haversine_km, normalize
+from geo import (
+    ROUNDING_SLACK_KM,
+    LocationMatcher,
+    bounding_box,
+    haversine_bearing_batch,
+    normalize,
+)
 
 logger = logging.getLogger(f"fogosptalerts.{__name__}")
 
@@ -20,6 +40,31 @@ USER_AGENT = "FogosPtAlerts/2.0 (+https://github.com/xhico/FogosPtAlerts)"
 # to serialise, but a hung connect should fail fast so the loop can back off.
 TIMEOUT = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
 
+# Size of each read. Large enough that the per-chunk overhead vanishes, small
+# enough that the streaming parser's scan buffer stays a rounding error.
+STREAM_CHUNK = 64 * 1024
+
+# Every field _build reads. In streaming mode nothing else is ever decoded,
+# which is what keeps the KML polygons from being built as Python objects.
+RECORD_FIELDS = frozenset(
+    {
+        "id", "sadoId", "lat", "lng", "dateTime", "date", "hour", "status", "statusCode",
+        "location", "district", "concelho", "freguesia", "localidade", "detailLocation",
+        "natureza", "man", "terrain", "aerial", "meios_aquaticos", "important",
+    }
+)
+
+# One parse in this many is traced for its heap peak: roughly hourly at a
+# one-minute poll.
+HEAP_SAMPLE_PARSES = 60
+
+# Record fields searched for FOGOS_LOCATIONS, in haystack order.
+LOCATION_KEYS = ("location", "district", "concelho", "freguesia", "localidade")
+
+# Distinct field values remembered by each prefilter. Place names repeat every
+# cycle, so this is only ever reached by the free-text "location" field.
+PREFILTER_MEMO_LIMIT = 20_000
+
 # Occurrence lifecycle, in order. Codes 3-6 are active response; from
 # "Em Resolução" onwards the incident is winding down rather than escalating.
 COOLING_STATUS_CODES = {7, 8, 9, 10}
@@ -32,9 +77,19 @@ class FogosApiError(Exception):
     """The upstream API was unreachable or returned something unusable."""
 
 
-@dataclass
+# Low-cardinality text fields. Interned, ten thousand fires share a few
+# hundred string objects instead of holding a copy each.
+_INTERNED = ("status", "district", "concelho", "freguesia", "natureza", "bearing", "matched_by")
+
+
+@dataclass(slots=True)
 class Fire:
-    """The subset of an occurrence we care about, normalized and enriched."""
+    """The subset of an occurrence we care about, normalized and enriched.
+
+    Slotted, and never mutated once built: `place`, `full_place`, `is_cooling`
+    and `severity` are worked out once in __post_init__ rather than on every
+    read — detect, the sort keys and every renderer read them repeatedly.
+    """
 
     id: str
     started_at: int | None
@@ -54,27 +109,36 @@ class Fire:
     aerial: int
     aquatic: int
     important: bool
-    matched_by: str
-
-    @property
-    def place(self) -> str:
-        """Shortest label that still identifies where this is.
-
-        Portuguese freguesia names get very long ("Cambra E Carvalhal De
-        Vermilhas"); past the notification-preview budget the concelho alone
-        carries more information than a truncated pair.
-        """
+    matched_by: str  # "radius", or "location:<place as configured>"
+
+    # Derived from the fields above; never persisted or compared.
+    place: str = field(init=False, repr=False, compare=False)
+    full_place: str = field(init=False, repr=False, compare=False)
+    is_cooling: bool = field(init=False, repr=False, compare=False)
+    severity: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for name in _INTERNED:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
+        # place: the shortest label that still identifies where this is.
+        # Portuguese freguesia names get very long ("Cambra E Carvalhal De
+        # Vermilhas"); past the notification-preview budget the concelho alone
+        # carries more information than a truncated pair. full_place is the
+        # untruncated label, for the email body.
         parts = list(dict.fromkeys(part for part in (self.concelho, self.freguesia) if part))
         full = " · ".join(parts)
+        self.full_place = sys.intern(full or self.district or "Local desconhecido")
         if len(full) <= PLACE_BUDGET or not parts:
-            return full or self.district or "Local desconhecido"
-        return parts[0] if len(parts[0]) <= PLACE_BUDGET else parts[0][: PLACE_BUDGET - 1] + "…"
+            self.place = self.full_place
+        else:
+            place = parts[0] if len(parts[0]) <= PLACE_BUDGET else parts[0][: PLACE_BUDGET - 1] + "…"
+            self.place = sys.intern(place)
 
-    @property
-    def full_place(self) -> str:
-        """Untruncated label — the email body has room the subject line does not."""
-        parts = dict.fromkeys(part for part in (self.concelho, self.freguesia) if part)
-        return " · ".join(parts) or self.district or "Local desconhecido"
+        self.is_cooling = self.status_code in COOLING_STATUS_CODES
+        self.severity = self._severity()
 
     @property
     def detail_url(self) -> str:
@@ -90,12 +154,7 @@ class Fire:
             return "desconhecido"
         return datetime.fromtimestamp(self.started_at, tz=timezone.utc).strftime("%d/%m %H:%M")
 
-    @property
-    def is_cooling(self) -> bool:
-        return self.status_code in COOLING_STATUS_CODES
-
-    @property
-    def severity(self) -> str:
+    def _severity(self) -> str:
         """Coarse 'does this deserve to wake me' band."""
         if self.is_cooling:
             return "info"
@@ -106,12 +165,15 @@ class Fire:
         return "info"
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        """The state schema v2 record: persisted fields only, in declaration order."""
+        return {name: getattr(self, name) for name in _PERSISTED}
 
     @classmethod
     def from_dict(cls, data: dict) -> "Fire":
-        known = {f for f in cls.__dataclass_fields__}  # type: ignore[attr-defined]
-        return cls(**{k: v for k, v in data.items() if k in known})
+        return cls(**{name: data[name] for name in _PERSISTED if name in data})
+
+
+_PERSISTED = tuple(f.name for f in fields(Fire) if f.init)
 
 
 def _as_int(value) -> int:
@@ -135,6 +197,11 @@ def _started_at(raw: dict) -> int | None:
 _LATLONG_PREFIX = re.compile(r"^\s*LatLong\([^)]*\)\s*[-–]\s*", re.IGNORECASE)
 
 
+def occurrence_id(raw: dict) -> str:
+    """The record's id, which every fogos.pt feed shares for the same occurrence."""
+    return str(raw.get("id") or raw.get("sadoId") or "")
+
+
 def _clean_detail(raw: dict) -> str:
     """Tidy detailLocation, which is sometimes a raw reverse-geocoder dump."""
     detail = _LATLONG_PREFIX.sub("", str(raw.get("detailLocation") or "")).strip(" .-")
@@ -146,39 +213,85 @@ def _clean_detail(raw: dict) -> str:
     return detail or locality
 
 
-def _matches_location(raw: dict, wanted: list[str]) -> bool:
-    if not wanted:
-        return False
-    haystack = normalize(
-        " | ".join(
-            str(raw.get(key) or "")
-            for key in ("location", "district", "concelho", "freguesia", "localidade")
-        )
-    )
-    return any(loc in haystack for loc in wanted)
-
-
-def _build(raw: dict, config: Config) -> Fire | None:
-    """Convert one API record into a Fire, or None if it is outside our geofence."""
+def _matched_location(raw: dict, matcher: LocationMatcher) -> str | None:
+    """Which configured location this record names, if any."""
+    if not matcher:
+        return None
+    return matcher.find(normalize(" | ".join(str(raw.get(key) or "") for key in LOCATION_KEYS)))
+
+
+class _Prefilter:
+    """First-stage geofence test: cheap, and never rejects what _build would keep.
+
+    Radius matches are screened with a lat/lng box around the circle. Name
+    matches are screened field by field, memoised on the raw value: district,
+    concelho and freguesia strings recur on every record of every cycle, so
+    after the first poll each is a dict lookup instead of a normalize().
+    """
+
+    def __init__(self, lat: float, lon: float, radius_km: float, matcher: LocationMatcher) -> None:
+        self.box = bounding_box(lat, lon, radius_km + ROUNDING_SLACK_KM) if radius_km > 0 else None
+        self.matcher = matcher
+        # A location containing the " | " joint can match the joined haystack
+        # without matching any one field; then only the exact check can tell.
+        self.fieldwise = not any("|" in pattern for pattern in matcher.patterns)
+        self._memo: dict[str, bool] = {}
+
+    def _field_matches(self, value: str) -> bool:
+        hit = self._memo.get(value)
+        if hit is None:
+            if len(self._memo) >= PREFILTER_MEMO_LIMIT:
+                self._memo.clear()
+            hit = self._memo[value] = self.matcher.find(normalize(value)) is not None
+        return hit
+
+    def admits(self, raw: dict, lat: float, lng: float) -> bool:
+        if self.box is not None and (lat != 0.0 or lng != 0.0):
+            min_lat, max_lat, min_lon, max_lon = self.box
+            if min_lat <= lat <= max_lat and min_lon <= lng <= max_lon:
+                return True
+        if not self.matcher:
+            return False
+        if not self.fieldwise:
+            return True
+        return any(self._field_matches(str(raw.get(key) or "")) for key in LOCATION_KEYS)
+
+
+@functools.lru_cache(maxsize=256)
+def _prefilter(lat: float, lon: float, radius_km: float, matcher: LocationMatcher) -> _Prefilter:
+    """One prefilter per geofence, built on first use and kept for its memo."""
+    return _Prefilter(lat, lon, radius_km, matcher)
+
+
+def coordinates(raw: dict) -> tuple[float, float]:
+    """A record's (lat, lng), with (0, 0) standing in for missing or garbled values."""
     try:
-        lat, lng = float(raw["lat"]), float(raw["lng"])
+        return float(raw["lat"]), float(raw["lng"])
     except (KeyError, TypeError, ValueError):
-        lat = lng = 0.0
-
-    has_coords = lat != 0.0 or lng != 0.0
-    distance = (
-        haversine_km(config.center_lat, config.center_lon, lat, lng) if has_coords else None
-    )
-
-    by_name = _matches_location(raw, config.locations_normalized)
+        return 0.0, 0.0
+
+
+def _build(
+    raw: dict,
+    config: Config,
+    lat: float,
+    lng: float,
+    distance: float | None,
+    bearing: str | None,
+) -> Fire | None:
+    """Convert one API record into a Fire, or None if it is outside our geofence.
+
+    Geometry comes in precomputed: `select` works it out for the whole batch.
+    """
+    by_name = _matched_location(raw, config.location_matcher)
     by_radius = (
         config.max_distance_km > 0 and distance is not None and distance <= config.max_distance_km
     )
-    if not (by_name or by_radius):
+    if by_name is None and not by_radius:
         return None
 
     return Fire(
-        id=str(raw.get("id") or raw.get("sadoId") or ""),
+        id=occurrence_id(raw),
         started_at=_started_at(raw),
         status=str(raw.get("status") or "Desconhecido"),
         status_code=_as_int(raw.get("statusCode")),
@@ -190,37 +303,300 @@ def _build(raw: dict, config: Config) -> Fire | None:
         lat=lat,
         lng=lng,
         distance_km=distance,
-        bearing=(
-            bearing_label(config.center_lat, config.center_lon, lat, lng) if has_coords else None
-        ),
+        bearing=bearing,
         man=_as_int(raw.get("man")),
         terrain=_as_int(raw.get("terrain")),
         aerial=_as_int(raw.get("aerial")),
         aquatic=_as_int(raw.get("meios_aquaticos")),
         important=bool(raw.get("important")),
-        matched_by="radius" if by_radius else "location",
+        matched_by="radius" if by_radius else f"location:{by_name}",
     )
 
 
-def build_client() -> httpx.Client:
-    """Long-lived client — keeps the connection pool warm across cycles."""
-    return httpx.Client(
-        timeout=TIMEOUT,
-        follow_redirects=True,
-        headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+def _installed(*modules: str) -> bool:
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+
+def accept_encoding() -> str:
+    """Every content coding httpx can decode here, best compression first.
+
+    The payload is mostly KML coordinates, which zstd and brotli shrink well
+    past what gzip manages. Each needs its package (`zstandard`, `brotli`)
+    installed; gzip is always there.
+    """
+    codings = [
+        coding
+        for coding, available in (
+            ("zstd", _installed("zstandard")),
+            ("br", _installed("brotli", "brotlicffi")),
+            ("gzip", True),
+        )
+        if available
+    ]
+    # Servers may ignore the order of the list, but not the weights.
+    return ", ".join(
+        coding if index == 0 else f"{coding};q={1 - index / 10:.1f}"
+        for index, coding in enumerate(codings)
     )
 
 
-def fetch(config: Config, client: httpx.Client) -> list[Fire]:
-    """Fetch live occurrences and return the ones inside our geofence."""
-    try:
-        response = client.get(config.api_url)
+def _client_options(config: Config) -> dict:
+    http2 = config.http2
+    if http2 and not _installed("h2"):
+        logger.warning("FOGOS_HTTP2 is set but the h2 package is not installed — staying on HTTP/1.1")
+        http2 = False
+    return {
+        "timeout": TIMEOUT,
+        "follow_redirects": True,
+        "http2": http2,
+        "headers": {
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json",
+            "Accept-Encoding": accept_encoding() if config.compression else "identity",
+        },
+    }
+
+
+def build_client(config: Config) -> httpx.Client:
+    """Long-lived client — keeps the connection pool warm across cycles."""
+    return httpx.Client(**_client_options(config))
+
+
+def build_async_client(config: Config) -> httpx.AsyncClient:
+    """`build_client` for the asyncio engine."""
+    return httpx.AsyncClient(**_client_options(config))
+
+
+class _HeapPeaks:
+    """How much the Python heap grows while a parse runs, from tracemalloc.
+
+    Tracing makes the streaming parse several times slower, so only one
+    parse in HEAP_SAMPLE_PARSES is traced, the first among them. The sources
+    of a cycle are parsed at the same time. A parse that starts while
+    another is traced is measured too, and tracing stops when the last of
+    them ends. Parses share tracemalloc's one peak, so each reports the most
+    the heap grew while it ran.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._parses = 0
+        self._active = 0
+        self._owned = False
+
+    @contextmanager
+    def measure(self, body: _Body) -> Iterator[None]:
+        with self._lock:
+            traced = self._active > 0 or self._parses % HEAP_SAMPLE_PARSES == 0
+            self._parses += 1
+            if traced:
+                if not self._active:
+                    # Someone else's tracing (PYTHONTRACEMALLOC) is left running.
+                    self._owned = not tracemalloc.is_tracing()
+                    if self._owned:
+                        tracemalloc.start()
+                    tracemalloc.reset_peak()
+                self._active += 1
+                baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            if traced:
+                with self._lock:
+                    body.peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+                    self._active -= 1
+                    if not self._active and self._owned:
+                        tracemalloc.stop()
+
+
+_heap_peaks = _HeapPeaks()
+
+
+@dataclass(frozen=True)
+class Transfer:
+    """One response body, as it came over the wire and once decoded."""
+
+    wire: int
+    decoded: int
+    encoding: str
+    http_version: str
+
+    @classmethod
+    def of(cls, response: httpx.Response, decoded: int) -> Transfer:
+        transfer = cls(
+            wire=response.num_bytes_downloaded,
+            decoded=decoded,
+            encoding=response.headers.get("Content-Encoding", "identity").strip().lower() or "identity",
+            http_version=response.http_version,
+        )
+        metrics.WIRE_BYTES.inc(transfer.wire, encoding=transfer.encoding)
+        metrics.DECODED_BYTES.inc(transfer.decoded)
+        metrics.PAYLOAD_BYTES.set(transfer.decoded)
+        return transfer
+
+    def describe(self) -> str:
+        if self.encoding == "identity":
+            return f"{human_bytes(self.wire)} uncompressed over {self.http_version}"
+        return f"{human_bytes(self.wire)} {self.encoding} → {human_bytes(self.decoded)} over {self.http_version}"
+
+
+@dataclass(frozen=True)
+class Parse:
+    """One body's parse: the time spent in the parser and, if traced, how far it grew the heap."""
+
+    seconds: float
+    peak: int | None
+
+    @classmethod
+    def of(cls, body: _Body) -> Parse:
+        # A traced parse is slowed down by the tracing; it would skew the histogram.
+        if body.peak is None:
+            metrics.PARSE_SECONDS.observe(body.parse_seconds)
+        return cls(seconds=body.parse_seconds, peak=body.peak)
+
+    def describe(self) -> str:
+        if self.peak is None:
+            return f"parsed in {self.seconds * 1000:.0f} ms"
+        return f"parsed in {self.seconds * 1000:.0f} ms under tracemalloc, heap peak {human_bytes(self.peak)}"
+
+
+@dataclass
+class Upstream:
+    """What we know about the last payload a cycle fully processed.
+
+    Validators and digest are staged by `fetch` and only promoted by `commit`
+    once the cycle that consumed them has finished — a crash or a failed send
+    halfway through must not let the next poll skip the same payload.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+    fetched: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    # The last response: body bytes as sent, then as decoded, and how.
+    transfer: Transfer | None = None
+    # How the last new body was parsed.
+    parse: Parse | None = None
+    # Called with every new body and its digest, before it is parsed.
+    recorder: Callable[[list[bytes], str], None] | None = field(default=None, repr=False)
+    _pending: tuple[str | None, str | None, str] | None = field(default=None, repr=False)
+
+    @property
+    def skipped(self) -> int:
+        return self.not_modified + self.unchanged
+
+    @property
+    def staged(self) -> tuple[str | None, str | None, str] | None:
+        """ETag, Last-Modified and digest of the payload this cycle fetched, until committed."""
+        return self._pending
+
+    def validators(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def commit(self) -> None:
+        if self._pending is not None:
+            self.etag, self.last_modified, self.digest = self._pending
+            self._pending = None
+
+
+class _Body:
+    """A response body taken in as it arrives: hashed, sized and kept.
+
+    Nothing is parsed until the whole body is in and its digest has been
+    compared with the last one, so a repeat costs a hash and no parse. The
+    streaming parser then walks the kept chunks record by record, which
+    still keeps the KML polygons from ever being built.
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.size = 0
+        self.chunks: list[bytes] = []
+        self.parse_seconds = 0.0
+        # Set by _HeapPeaks when this body's parse was traced.
+        self.peak: int | None = None
+
+    def take(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        self.chunks.append(chunk)
+
+    def parse(self, stream: bool) -> list[dict]:
+        started = time.perf_counter()
+        with _heap_peaks.measure(self):
+            records = _parse_streaming(self.chunks, self.encoding) if stream else _parse_buffered(self.chunks)
+        self.parse_seconds = time.perf_counter() - started
+        return records
+
+
+def _download(config: Config, client: httpx.Client, url: str, upstream: Upstream) -> list[dict] | None:
+    """The records of a new body, or None if upstream has not changed."""
+    upstream._pending = upstream.transfer = None
+    with client.stream("GET", url, headers=upstream.validators()) as response:
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            upstream.not_modified += 1
+            upstream.transfer = Transfer.of(response, 0)
+            return None
         response.raise_for_status()
-        payload = response.json()
-    except httpx.HTTPError as exc:
-        raise FogosApiError(f"request failed: {exc}") from exc
-    except ValueError as exc:
-        raise FogosApiError(f"response was not valid JSON: {exc}") from exc
+
+        body = _Body(response.encoding or "utf-8")
+        for chunk in response.iter_bytes(STREAM_CHUNK):
+            body.take(chunk)
+
+    return _received(config, upstream, response, body)
+
+
+async def _download_async(
+    config: Config, client: httpx.AsyncClient, url: str, upstream: Upstream
+) -> list[dict] | None:
+    """`_download` over an AsyncClient.
+
+    The body is checked and parsed in a worker thread, so a new payload
+    does not stall the other feeds' downloads.
+    """
+    upstream._pending = upstream.transfer = None
+    async with client.stream("GET", url, headers=upstream.validators()) as response:
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            upstream.not_modified += 1
+            upstream.transfer = Transfer.of(response, 0)
+            return None
+        response.raise_for_status()
+
+        body = _Body(response.encoding or "utf-8")
+        async for chunk in response.aiter_bytes(STREAM_CHUNK):
+            body.take(chunk)
+
+    return await asyncio.to_thread(_received, config, upstream, response, body)
+
+
+def _received(config: Config, upstream: Upstream, response: httpx.Response, body: _Body) -> list[dict] | None:
+    upstream.fetched += 1
+    upstream.transfer = Transfer.of(response, body.size)
+    upstream._pending = (
+        response.headers.get("ETag"),
+        response.headers.get("Last-Modified"),
+        body.digest.hexdigest(),
+    )
+    if upstream.digest == upstream._pending[2]:
+        upstream.unchanged += 1
+        return None
+    if upstream.recorder is not None:
+        upstream.recorder(body.chunks, upstream._pending[2])
+    records = body.parse(config.stream_parse)
+    upstream.parse = Parse.of(body)
+    return records
+
+
+def _parse_buffered(chunks: list[bytes]) -> list[dict]:
+    payload = json.loads(b"".join(chunks))
 
     if not isinstance(payload, dict) or not payload.get("success"):
         raise FogosApiError("API reported success=false")
@@ -229,6 +605,128 @@ def fetch(config: Config, client: httpx.Client) -> list[Fire]:
     if not isinstance(records, list):
         raise FogosApiError("API payload had no 'data' list")
 
-    fires = [fire for raw in records if (fire := _build(raw, config)) and fire.id]
-    logger.info("Fetched %d occurrences, %d inside geofence", len(records), len(fires))
+    # Strip to what _build reads, so the polygons can be freed right away.
+    return [
+        {key: raw[key] for key in RECORD_FIELDS if key in raw}
+        for raw in records
+        if isinstance(raw, dict)
+    ]
+
+
+def _parse_streaming(chunks: list[bytes], encoding: str) -> list[dict]:
+    payload = jsonstream.Payload(codecs.iterdecode(chunks, encoding), "data", RECORD_FIELDS)
+    records = [raw for raw in payload.records() if isinstance(raw, dict)]
+
+    # Checked last: "success" may follow "data", and is only known once the body is read.
+    if not payload.meta.get("success"):
+        raise FogosApiError("API reported success=false")
+    if not payload.has_array:
+        raise FogosApiError("API payload had no 'data' list")
+
+    return records
+
+
+def _unchanged(url: str, upstream: Upstream) -> None:
+    logger.debug(
+        "%s unchanged (%d not modified, %d identical, %d fetched)",
+        url,
+        upstream.not_modified,
+        upstream.unchanged,
+        upstream.fetched,
+    )
+
+
+def fetch(config: Config, client: httpx.Client, upstream: Upstream, url: str | None = None) -> list[dict] | None:
+    """Fetch live occurrences, reduced to the fields `select` needs.
+
+    Returns None when upstream answered 304 or sent a byte-identical body:
+    nothing downstream of this call can produce a different result. `url`
+    defaults to FOGOS_API_URL.
+    """
+    url = url or config.api_url
+    started = time.perf_counter()
+    try:
+        records = _download(config, client, url, upstream)
+    except httpx.HTTPError as exc:
+        raise FogosApiError(f"request failed: {exc}") from exc
+    except ValueError as exc:
+        raise FogosApiError(f"response was not valid JSON: {exc}") from exc
+    if records is None:
+        _unchanged(url, upstream)
+    else:
+        _fetched(url, records, started, upstream)
+    return records
+
+
+async def fetch_async(
+    config: Config, client: httpx.AsyncClient, upstream: Upstream, url: str | None = None
+) -> list[dict] | None:
+    """`fetch` over an AsyncClient."""
+    url = url or config.api_url
+    started = time.perf_counter()
+    try:
+        records = await _download_async(config, client, url, upstream)
+    except httpx.HTTPError as exc:
+        raise FogosApiError(f"request failed: {exc}") from exc
+    except ValueError as exc:
+        raise FogosApiError(f"response was not valid JSON: {exc}") from exc
+    if records is None:
+        _unchanged(url, upstream)
+    else:
+        _fetched(url, records, started, upstream)
+    return records
+
+
+def _fetched(url: str, records: list[dict], started: float, upstream: Upstream) -> None:
+    elapsed = time.perf_counter() - started
+    metrics.FETCH_SECONDS.observe(elapsed)
+    logger.info(
+        "Fetched %d occurrences from %s (%.0f ms, %s, %s)",
+        len(records),
+        url,
+        elapsed * 1000,
+        upstream.transfer.describe() if upstream.transfer is not None else "size unknown",
+        upstream.parse.describe() if upstream.parse is not None else "not parsed",
+    )
+
+
+def human_bytes(count: int) -> str:
+    if count < 1024 * 1024:
+        return f"{count / 1024:.0f} kB"
+    return f"{count / (1024 * 1024):.1f} MB"
+
+
+def select(records: list[dict], config: Config) -> list[Fire]:
+    """The records inside `config`'s geofence, as Fires."""
+    prefilter = _prefilter(
+        config.center_lat,
+        config.center_lon,
+        config.max_distance_km,
+        config.location_matcher,
+    )
+    coords = [coordinates(raw) for raw in records]
+    survivors = [i for i, raw in enumerate(records) if prefilter.admits(raw, *coords[i])]
+    if records:
+        logger.debug(
+            "Prefilter rejected %d of %d record(s) (%.0f%%)",
+            len(records) - len(survivors),
+            len(records),
+            100 * (len(records) - len(survivors)) / len(records),
+        )
+
+    located = [i for i in survivors if coords[i] != (0.0, 0.0)]
+    distances, bearings = haversine_bearing_batch(
+        config.center_lat,
+        config.center_lon,
+        [coords[i][0] for i in located],
+        [coords[i][1] for i in located],
+    )
+    geometry = dict(zip(located, zip(distances, bearings)))
+
+    fires: list[Fire] = []
+    for i in survivors:
+        distance, bearing = geometry.get(i, (None, None))
+        fire = _build(records[i], config, *coords[i], distance, bearing)
+        if fire and fire.id:
+            fires.append(fire)
     return fires
@@ -2,11 +2,35 @@
 
 from __future__ import annotations
 
+import functools
 import math
 import unicodedata
 
+try:
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # optional: the pure-Python batch path gives identical results
+    np = None
+
 EARTH_RADIUS_KM = 6371.0
 
+# haversine_km rounds to 2 decimals, so a point this far past a radius can
+# still come out inside it. Anything that prefilters by radius pads by this.
+ROUNDING_SLACK_KM = 0.01
+
+# Distinct strings normalize() remembers. Portugal has ~3000 freguesias; the
+# rest of the budget absorbs the free-text fields that change between fires.
+NORMALIZE_CACHE_SIZE = 8192
+
+COMPASS_POINTS = ["N", "NE", "E", "SE", "S", "SO", "O", "NO"]
+
+# Below this many points NumPy's per-call overhead outweighs the vector maths.
+NUMPY_MIN_BATCH = 64
+
+# How close to a rounding tie a vectorised result may land before it is
+# recomputed with the scalar function. NumPy's sin/cos/atan2 can differ from
+# libm in the last bit, and that only matters right on a tie.
+_TIE_TOLERANCE = 1e-6
+
 
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Great-circle distance between two WGS84 points, in kilometres."""
@@ -18,12 +42,98 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return round(EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)), 2)
 
 
-def normalize(text: str) -> str:
-    """Casefold and strip accents, so 'Óbidos' matches 'obidos'."""
-    decomposed = unicodedata.normalize("NFKD", text or "")
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
     return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
 
 
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _fold_cached(text: str) -> str:
+    return _fold(text)
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents, so 'Óbidos' matches 'obidos'.
+
+    Memoised: the same district, concelho and freguesia names come round on
+    every record of every cycle, and folding one is a per-character walk.
+    """
+    return _fold_cached(text or "")
+
+
+def normalize_cache_info() -> functools._CacheInfo:
+    """Hits, misses and size of the normalize() cache, for the debug log."""
+    return _fold_cached.cache_info()
+
+
+class LocationMatcher:
+    """Aho-Corasick automaton over normalized place names.
+
+    Finds any of hundreds of names in one left-to-right pass over the text,
+    where `any(name in text for name in names)` would make one pass per name.
+    Built once at config load; `find` reports which name matched, by the
+    label it was configured with, the first configured when several do.
+    """
+
+    def __init__(self, names: list[tuple[str, str]]) -> None:
+        """`names` is (normalized pattern, display label) pairs, in configured order."""
+        # Each state's output is the index of the earliest-configured name
+        # ending there; len(names) stands for none.
+        none = len(names)
+        goto: list[dict[str, int]] = [{}]
+        out = [none]
+        for index, (pattern, _) in enumerate(names):
+            state = 0
+            for char in pattern:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    out.append(none)
+                state = nxt
+            out[state] = min(out[state], index)
+
+        # Breadth-first, so every fail target is finished before it is used.
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[nxt] = goto[target].get(char, 0)
+                out[nxt] = min(out[nxt], out[fail[nxt]])
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._labels = tuple(label for _, label in names)
+        self.patterns = tuple(pattern for pattern, _ in names)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def find(self, text: str) -> str | None:
+        """Label of the earliest-configured name found in `text`, or None.
+
+        The same answer as trying each name in turn with `in`, so the place an
+        alert names does not depend on where in the text it was found.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        best = out[0]
+        state = 0
+        for char in text:
+            if not best:
+                break
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            best = min(best, out[state])
+        return self._labels[best] if best < len(self._labels) else None
+
+
 def bearing_label(lat1: float, lon1: float, lat2: float, lon2: float) -> str:
     """Compass direction from point 1 to point 2, in Portuguese abbreviations."""
     p1, p2 = math.radians(lat1), math.radians(lat2)
@@ -33,5 +143,128 @@ def bearing_label(lat1: float, lon1: float, lat2: float, lon2: float) -> str:
     x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dlambda)
     degrees = (math.degrees(math.atan2(y, x)) + 360) % 360
 
-    points = ["N", "NE", "E", "SE", "S", "SO", "O", "NO"]
-    return points[round(degrees / 45) % 8]
+    return COMPASS_POINTS[round(degrees / 45) % 8]
+
+
+def _batch_python(
+    lat: float, lon: float, lats: list[float], lons: list[float]
+) -> tuple[list[float], list[str]]:
+    """haversine_km and bearing_label with the origin's trigonometry hoisted out.
+
+    Same expressions in the same order as the scalar functions, so the floats
+    come out bit-identical.
+    """
+    p1 = math.radians(lat)
+    cos_p1, sin_p1 = math.cos(p1), math.sin(p1)
+    distances: list[float] = []
+    bearings: list[str] = []
+
+    for lat2, lon2 in zip(lats, lons):
+        p2 = math.radians(lat2)
+        cos_p2 = math.cos(p2)
+        dlambda = math.radians(lon2 - lon)
+
+        a = math.sin((p2 - p1) / 2) ** 2 + cos_p1 * cos_p2 * math.sin(dlambda / 2) ** 2
+        distances.append(round(EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)), 2))
+
+        y = math.sin(dlambda) * cos_p2
+        x = cos_p1 * math.sin(p2) - sin_p1 * cos_p2 * math.cos(dlambda)
+        degrees = (math.degrees(math.atan2(y, x)) + 360) % 360
+        bearings.append(COMPASS_POINTS[round(degrees / 45) % 8])
+
+    return distances, bearings
+
+
+def _batch_numpy(
+    lat: float, lon: float, lats: list[float], lons: list[float]
+) -> tuple[list[float], list[str]]:
+    p1 = math.radians(lat)
+    p2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlambda = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    cos_p2 = np.cos(p2)
+
+    a = np.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * cos_p2 * np.sin(dlambda / 2) ** 2
+    raw_km = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    y = np.sin(dlambda) * cos_p2
+    x = math.cos(p1) * np.sin(p2) - math.sin(p1) * cos_p2 * np.cos(dlambda)
+    octants = ((np.degrees(np.arctan2(y, x)) + 360) % 360) / 45
+
+    # rint(x * 100) / 100 is exactly round(x, 2) everywhere except on a tie,
+    # and round-half-even agrees with round() likewise. Ties go to the scalar path.
+    scaled = raw_km * 100
+    suspect = (np.abs(scaled - np.floor(scaled) - 0.5) < _TIE_TOLERANCE) | (
+        np.abs(octants - np.floor(octants) - 0.5) < _TIE_TOLERANCE
+    )
+    distances = (np.rint(scaled) / 100).tolist()
+    bearings = [COMPASS_POINTS[i] for i in (np.rint(octants).astype(np.int64) % 8).tolist()]
+
+    for i in np.flatnonzero(suspect).tolist():
+        distances[i] = haversine_km(lat, lon, lats[i], lons[i])
+        bearings[i] = bearing_label(lat, lon, lats[i], lons[i])
+    return distances, bearings
+
+
+def haversine_bearing_batch(
+    lat: float, lon: float, lats: list[float], lons: list[float]
+) -> tuple[list[float], list[str]]:
+    """Distances (km) and compass labels from one origin to many points at once.
+
+    Element-for-element equal to calling haversine_km and bearing_label in a
+    loop, 2-decimal rounding included. Uses NumPy when it is installed and the
+    batch is big enough to benefit.
+    """
+    if np is not None and len(lats) >= NUMPY_MIN_BATCH:
+        return _batch_numpy(lat, lon, lats, lons)
+    return _batch_python(lat, lon, lats, lons)
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) enclosing every point within `radius_km`.
+
+    Exact spherical bounds, so nothing inside the circle falls outside the
+    box. Spans that reach a pole or cross the antimeridian fall back to the
+    full longitude range rather than wrapping.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    min_lat, max_lat = lat_r - angular, lat_r + angular
+
+    if min_lat <= -math.pi / 2 or max_lat >= math.pi / 2 or angular >= math.pi / 2:
+        return math.degrees(max(min_lat, -math.pi / 2)), math.degrees(min(max_lat, math.pi / 2)), -180.0, 180.0
+
+    ratio = math.sin(angular) / math.cos(lat_r)
+    if ratio >= 1:
+        return math.degrees(min_lat), math.degrees(max_lat), -180.0, 180.0
+    dlon = math.asin(ratio)
+    min_lon, max_lon = lon_r - dlon, lon_r + dlon
+    if min_lon < -math.pi or max_lon > math.pi:
+        return math.degrees(min_lat), math.degrees(max_lat), -180.0, 180.0
+    return math.degrees(min_lat), math.degrees(max_lat), math.degrees(min_lon), math.degrees(max_lon)
+
+
+class GridIndex:
+    """Fixed-size lat/lng buckets of circles, for 'which areas could cover this point'.
+
+    Each circle is entered into every cell its bounding box touches, so a
+    lookup is one dict hit and never misses a circle that covers the point.
+    It may return circles that do not — callers still run the exact check.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1) -> None:
+        self.cell_degrees = cell_degrees
+        self._cells: dict[tuple[int, int], list] = {}
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def add(self, item, lat: float, lon: float, radius_km: float) -> None:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        lat_lo, lon_lo = self._cell(min_lat, min_lon)
+        lat_hi, lon_hi = self._cell(max_lat, max_lon)
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lon_lo, lon_hi + 1):
+                self._cells.setdefault((i, j), []).append(item)
+
+    def query(self, lat: float, lon: float) -> list:
+        return self._cells.get(self._cell(lat, lon), [])
@@ -0,0 +1,240 @@
+"""Incremental scanner for the fogos.pt payload.
+
+The upstream body is one JSON object whose `data` array carries every active
+occurrence, each with a KML polygon attached. `json.loads` turns all of that
+into Python objects only for almost every record to be dropped a moment later.
+
+This scanner reads the body a chunk at a time and walks the array one record
+at a time. Fields the caller asked for are decoded; everything else — the KML,
+the history blobs — is skipped over by position without ever being built. The
+buffer only ever holds the record being scanned plus one chunk.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_MEMBER = re.compile(r'[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+_SCALAR = re.compile(r"[^,\]}\s]+")
+# A flat array (coordinate pairs, mostly) is skipped as one token.
+_STRUCTURAL = re.compile(r'"|\[[^\[\]{}"]*\]|[\[\]{}]')
+
+_decoder = json.JSONDecoder()
+
+
+class _NeedMore(Exception):
+    """The buffer ends mid-token; read another chunk and retry the step."""
+
+
+def _ws(buf: str, pos: int) -> int:
+    return _WHITESPACE.match(buf, pos).end()  # type: ignore[union-attr]
+
+
+def _peek(buf: str, pos: int) -> str:
+    if pos >= len(buf):
+        raise _NeedMore
+    return buf[pos]
+
+
+def _skip_string(buf: str, pos: int) -> int:
+    # str.find runs at memchr speed, which matters on multi-kilobyte KML strings.
+    end = pos
+    while True:
+        end = buf.find('"', end + 1)
+        if end < 0:
+            raise _NeedMore
+        escapes = end - 1
+        while buf[escapes] == "\\":
+            escapes -= 1
+        if (end - 1 - escapes) % 2 == 0:
+            return end + 1
+
+
+def _skip_value(buf: str, pos: int) -> int:
+    """End offset of the value at `pos`, without building it."""
+    char = _peek(buf, pos)
+    if char == '"':
+        return _skip_string(buf, pos)
+
+    if char in "[{":
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                raise _NeedMore
+            token = match.group()
+            if token == '"':
+                pos = _skip_string(buf, match.start())
+                continue
+            pos = match.end()
+            if len(token) > 1:
+                if depth == 0:
+                    return pos
+                continue
+            depth += 1 if token in "[{" else -1
+            if depth == 0:
+                return pos
+
+    match = _SCALAR.match(buf, pos)
+    if match is None:
+        raise ValueError(f"unexpected {char!r} at offset {pos}")
+    # A number cut by the chunk boundary looks complete; only a delimiter proves it is.
+    if match.end() >= len(buf):
+        raise _NeedMore
+    return match.end()
+
+
+def _decode_value(buf: str, pos: int) -> tuple[object, int]:
+    end = _skip_value(buf, pos)
+    value, _ = _decoder.raw_decode(buf[pos:end])
+    return value, end
+
+
+def _expect(buf: str, pos: int, char: str) -> int:
+    if _peek(buf, pos) != char:
+        raise ValueError(f"expected {char!r} at offset {pos}, got {buf[pos]!r}")
+    return pos + 1
+
+
+def _object(buf: str, pos: int, fields: frozenset[str]) -> tuple[dict, int]:
+    """Scan one object, decoding only the keys in `fields`."""
+    pos = _ws(buf, _expect(buf, pos, "{"))
+    record: dict = {}
+    if _peek(buf, pos) == "}":
+        return record, pos + 1
+
+    while True:
+        member = _MEMBER.match(buf, pos)
+        if member is None:
+            _expect(buf, _ws(buf, pos), '"')  # a key that has started but not ended
+            raise _NeedMore
+        key = member.group(1)
+        if "\\" in key:
+            key = json.decoder.scanstring(buf, member.start(1))[0]
+        pos = member.end()
+
+        if key in fields:
+            if _peek(buf, pos) in "-0123456789":
+                _skip_value(buf, pos)  # "38." parses as 38 — wait for the delimiter
+            try:
+                record[key], pos = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                raise _NeedMore from None
+        else:
+            pos = _skip_value(buf, pos)
+
+        separator = _SEPARATOR.match(buf, pos)
+        if separator is None:
+            _peek(buf, _ws(buf, pos))
+            raise ValueError(f"expected ',' or '}}' at offset {pos}")
+        if separator.group(1) == "}":
+            return record, separator.end()
+        pos = separator.end()
+
+
+class Payload:
+    """One streamed JSON object whose `array_key` member is iterated lazily.
+
+    Top-level members other than the array are decoded into `meta` as they
+    are passed; when they come after the array they are only available once
+    `records()` has been exhausted.
+    """
+
+    def __init__(self, chunks: Iterable[str], array_key: str, fields: frozenset[str]) -> None:
+        self._chunks = iter(chunks)
+        self._array_key = array_key
+        self._fields = fields
+        self._buf = ""
+        self._pos = 0
+        self.meta: dict = {}
+        self.has_array = False
+
+    def _step(self, scan: Callable[[str, int], tuple[T, int]]) -> T:
+        while True:
+            try:
+                value, self._pos = scan(self._buf, self._pos)
+                return value
+            except _NeedMore:
+                self._fill()
+
+    def _fill(self) -> None:
+        """Read at least as much again as the pending step has already scanned.
+
+        Each retry restarts the step from the top, so geometric growth is what
+        keeps a record spanning many chunks linear to scan.
+        """
+        wanted = max(1, len(self._buf) - self._pos)
+        parts: list[str] = []
+        received = 0
+        while received < wanted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            received += len(chunk)
+        if not received:
+            raise ValueError("response body ended mid-document")
+        self._buf += "".join(parts)
+
+    def _advance(self, buf: str, pos: int) -> tuple[str, int]:
+        """Skip whitespace and return the next structural character."""
+        pos = _ws(buf, pos)
+        return _peek(buf, pos), pos + 1
+
+    def _compact(self) -> None:
+        # Drop what has been consumed, so memory tracks one record, not the body.
+        self._buf = self._buf[self._pos :]
+        self._pos = 0
+
+    def records(self) -> Iterator[object]:
+        if self._step(self._advance) != "{":
+            raise ValueError("payload is not a JSON object")
+
+        token = self._step(self._advance)
+        while token != "}":
+            if token != '"':
+                raise ValueError(f"expected a key, got {token!r}")
+            self._pos -= 1
+            key = self._step(lambda buf, pos: _decode_value(buf, pos))
+            if self._step(self._advance) != ":":
+                raise ValueError(f"expected ':' after {key!r}")
+
+            if key == self._array_key and self._step(self._advance) == "[":
+                self.has_array = True
+                yield from self._array()
+            else:
+                if key == self._array_key:
+                    self._pos -= 1
+                self.meta[key] = self._step(lambda buf, pos: _decode_value(buf, _ws(buf, pos)))
+            self._compact()
+
+            token = self._step(self._advance)
+            if token == ",":
+                token = self._step(self._advance)
+            elif token != "}":
+                raise ValueError(f"expected ',' or '}}', got {token!r}")
+
+    def _array(self) -> Iterator[object]:
+        token = self._step(self._advance)
+        if token == "]":
+            return
+        self._pos -= 1
+
+        while True:
+            self._compact()
+            if self._step(lambda buf, pos: (_peek(buf, _ws(buf, pos)), pos)) == "{":
+                yield self._step(lambda buf, pos: _object(buf, _ws(buf, pos), self._fields))
+            else:
+                yield self._step(lambda buf, pos: _decode_value(buf, _ws(buf, pos)))
+
+            token = self._step(self._advance)
+            if token == "]":
+                return
+            if token != ",":
+                raise ValueError(f"expected ',' or ']' in array, got {token!r}")
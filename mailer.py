@@ -2,17 +2,30 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
 import smtplib
 import ssl
-from contextlib import contextmanager
+import threading
+import time
 from email.message import EmailMessage
 from email.utils import formatdate, make_msgid
-from typing import Iterator
+from typing import TYPE_CHECKING
 
+import metrics
 from config import SmtpConfig
 from render import Message
 
+try:
+    import aiosmtplib  # type: ignore[import-not-found]
+except ImportError:  # the asyncio engine then sends through SmtpPool in a worker thread
+    aiosmtplib = None
+
+if TYPE_CHECKING:
+    from outbox import Outbox
+
 logger = logging.getLogger(f"fogosptalerts.{__name__}")
 
 
@@ -20,21 +33,39 @@ class MailError(Exception):
     """Delivery failed; the caller should not advance state for this event."""
 
 
-class Mailer:
-    def __init__(self, config: SmtpConfig, dry_run: bool = False) -> None:
-        self.config = config
-        self.dry_run = dry_run
+# Drop a connection nobody has used for this long rather than probe it: servers
+# commonly hang up on idle clients after five minutes (RFC 5321 §4.5.3.2.7).
+SESSION_IDLE_SECONDS = 240
+# Within a burst the connection was just used; past this, NOOP it first.
+SESSION_PROBE_SECONDS = 10
 
-    @property
-    def domain(self) -> str:
-        """Domain used to mint Message-IDs — keeps threading stable across restarts."""
-        _, _, domain = self.config.sender.rpartition("@")
-        return domain.strip("> ").strip() or "fogosptalerts.local"
+_SMTP_ERRORS = (smtplib.SMTPException, OSError, ssl.SSLError)
+_ASYNC_SMTP_ERRORS = (aiosmtplib.SMTPException, OSError, ssl.SSLError) if aiosmtplib else ()
 
-    @contextmanager
-    def _connect(self) -> Iterator[smtplib.SMTP]:
+
+class SmtpPool:
+    """Authenticated SMTP connections, kept open across sends.
+
+    Opening one costs a TCP and TLS handshake, EHLO, STARTTLS and LOGIN —
+    several round trips that used to be paid for every single email. The pool
+    is shared by every Mailer talking to the same server. Each send borrows a
+    connection for the length of one transaction, so concurrent sends never
+    interleave on the wire; up to `size` connections are kept for reuse.
+    """
+
+    def __init__(self, config: SmtpConfig, size: int = 1) -> None:
+        self.config = config
+        self.size = max(1, size)
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._context: ssl.SSLContext | None = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> smtplib.SMTP:
         cfg = self.config
-        context = ssl.create_default_context()
+        with self._lock:
+            if self._context is None:
+                self._context = ssl.create_default_context()
+            context = self._context
 
         if cfg.use_ssl:
             server: smtplib.SMTP = smtplib.SMTP_SSL(
@@ -43,17 +74,225 @@ class Mailer:
         else:
             server = smtplib.SMTP(cfg.host, cfg.port, timeout=cfg.timeout)
 
-        with server:
+        try:
             server.ehlo()
             if not cfg.use_ssl and cfg.use_starttls:
                 server.starttls(context=context)
                 server.ehlo()
             if cfg.username:
                 server.login(cfg.username, cfg.password)
-            yield server
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except _SMTP_ERRORS:
+            server.close()
+
+    def _acquire(self) -> tuple[smtplib.SMTP, bool]:
+        """A usable connection, and whether it was reused."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            idle = time.monotonic() - last_used
+            if idle > SESSION_IDLE_SECONDS:
+                self._quit(server)
+                continue
+            if idle > SESSION_PROBE_SECONDS:
+                try:
+                    code, _ = server.noop()
+                except _SMTP_ERRORS:
+                    code = 0
+                if code != 250:
+                    logger.debug("SMTP connection went stale — dropping it")
+                    self._quit(server)
+                    continue
+            return server, True
+        return self._open(), False
+
+    def _release(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._quit(server)
+
+    def send(self, mail: EmailMessage, to_addrs: list[str]) -> bool:
+        """Send over a pooled connection, reconnecting once if the server hung up. True if reused."""
+        server, reused = self._acquire()
+        try:
+            try:
+                server.send_message(mail, to_addrs=to_addrs)
+            except smtplib.SMTPServerDisconnected:
+                # A reused connection may have been dropped since the last
+                # check; a fresh one failing the same way is a real error.
+                server.close()
+                if not reused:
+                    raise
+                server, reused = self._open(), False
+                server.send_message(mail, to_addrs=to_addrs)
+        except _SMTP_ERRORS:
+            # After a failed transaction the connection's state is unknown.
+            self._quit(server)
+            raise
+        self._release(server)
+        return reused
+
+    def connect(self) -> None:
+        """Open a connection now and keep it — doubles as a credentials check."""
+        self._release(self._open())
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+
+
+class AsyncSmtpPool:
+    """SmtpPool for the asyncio engine, on aiosmtplib.
+
+    Same rules: a connection is borrowed for one transaction, probed with
+    NOOP after SESSION_PROBE_SECONDS idle, dropped after SESSION_IDLE_SECONDS,
+    and a send that finds the server gone is retried once on a fresh one.
+    Connections belong to the event loop that opened them.
+    """
+
+    def __init__(self, config: SmtpConfig, size: int = 1) -> None:
+        self.config = config
+        self.size = max(1, size)
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._context: ssl.SSLContext | None = None
+
+    async def _open(self) -> aiosmtplib.SMTP:
+        cfg = self.config
+        if self._context is None:
+            self._context = ssl.create_default_context()
+        server = aiosmtplib.SMTP(
+            hostname=cfg.host,
+            port=cfg.port,
+            timeout=cfg.timeout,
+            use_tls=cfg.use_ssl,
+            start_tls=not cfg.use_ssl and cfg.use_starttls,
+            tls_context=self._context,
+        )
+        await server.connect()
+        try:
+            if cfg.username:
+                await server.login(cfg.username, cfg.password)
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    async def _quit(server: aiosmtplib.SMTP) -> None:
+        try:
+            await server.quit()
+        except _ASYNC_SMTP_ERRORS:
+            server.close()
+
+    async def _acquire(self) -> tuple[aiosmtplib.SMTP, bool]:
+        while self._idle:
+            server, last_used = self._idle.pop()
+            idle = time.monotonic() - last_used
+            if idle > SESSION_IDLE_SECONDS:
+                await self._quit(server)
+                continue
+            if idle > SESSION_PROBE_SECONDS:
+                try:
+                    code = (await server.noop()).code
+                except _ASYNC_SMTP_ERRORS:
+                    code = 0
+                if code != 250:
+                    logger.debug("SMTP connection went stale — dropping it")
+                    await self._quit(server)
+                    continue
+            return server, True
+        return await self._open(), False
 
-    def send(self, message: Message, thread_root: str | None = None, is_root: bool = False) -> None:
-        """Deliver one message. `thread_root` groups a fire's updates into a thread."""
+    async def send(self, mail: EmailMessage, to_addrs: list[str]) -> bool:
+        server, reused = await self._acquire()
+        try:
+            try:
+                await server.send_message(mail, recipients=to_addrs)
+            except aiosmtplib.SMTPServerDisconnected:
+                server.close()
+                if not reused:
+                    raise
+                server, reused = await self._open(), False
+                await server.send_message(mail, recipients=to_addrs)
+        except _ASYNC_SMTP_ERRORS:
+            await self._quit(server)
+            raise
+        if len(self._idle) < self.size:
+            self._idle.append((server, time.monotonic()))
+        else:
+            await self._quit(server)
+        return reused
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for server, _ in idle:
+            await self._quit(server)
+
+
+def build_async_pool(config: SmtpConfig, size: int) -> AsyncSmtpPool | None:
+    """An AsyncSmtpPool, or None when aiosmtplib is not installed."""
+    return AsyncSmtpPool(config, size) if aiosmtplib is not None else None
+
+
+class Mailer:
+    def __init__(
+        self,
+        config: SmtpConfig,
+        dry_run: bool = False,
+        pool: SmtpPool | None = None,
+        outbox: Outbox | None = None,
+        async_pool: AsyncSmtpPool | None = None,
+    ) -> None:
+        self.config = config
+        self.dry_run = dry_run
+        # Only the connection settings of `config` matter to the pool, so
+        # mailers that differ just in recipients can share one.
+        self.pool = pool or SmtpPool(config)
+        # With an outbox, send() only queues; outbox.Courier calls deliver().
+        self.outbox = outbox
+        # Used by the asyncio engine; without it, async sends use `pool` in a thread.
+        self.async_pool = async_pool
+
+    @property
+    def domain(self) -> str:
+        """Domain of every Message-ID: the sender's, so IDs derived from the same event match across restarts."""
+        _, _, domain = self.config.sender.rpartition("@")
+        return domain.strip("> ").strip() or "fogosptalerts.local"
+
+    def message_id(self, idstring: str, content: object = None) -> str:
+        """`<idstring.hash@domain>`, the hash taken over JSON-serialisable `content`.
+
+        The same arguments always give the same Message-ID, which is what lets
+        the outbox recognise an email rebuilt after a crash as one it already has.
+        """
+        if content is not None:
+            encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+            idstring += "." + hashlib.blake2b(encoded.encode("utf-8"), digest_size=6).hexdigest()
+        return f"<{idstring}@{self.domain}>"
+
+    def compose(
+        self, message: Message, thread_root: str | None = None, message_id: str | None = None
+    ) -> EmailMessage:
+        """The email as it will be sent, Message-ID included.
+
+        Without `message_id` a random one is minted. An email whose
+        `message_id` is its `thread_root` starts the thread.
+        """
         mail = EmailMessage()
         mail["Subject"] = message.subject
         mail["From"] = self.config.sender
@@ -66,33 +305,90 @@ class Mailer:
         mail["Auto-Submitted"] = "auto-generated"
         mail["X-Mailer"] = "FogosPtAlerts"
 
-        if thread_root and is_root:
-            mail["Message-ID"] = thread_root
-        else:
-            mail["Message-ID"] = make_msgid(domain=self.domain)
-            if thread_root:
-                mail["In-Reply-To"] = thread_root
-                mail["References"] = thread_root
+        mail["Message-ID"] = message_id or make_msgid(domain=self.domain)
+        if thread_root and thread_root != message_id:
+            mail["In-Reply-To"] = thread_root
+            mail["References"] = thread_root
 
         mail.set_content(message.text_body)
         mail.add_alternative(message.html_body, subtype="html")
+        return mail
+
+    def send(self, message: Message, thread_root: str | None = None, message_id: str | None = None) -> None:
+        """Deliver (or queue) one message. `thread_root` groups a fire's updates into a thread."""
+        mail = self.compose(message, thread_root=thread_root, message_id=message_id)
+        if self.outbox is None:
+            self.deliver(mail)
+            return
+        try:
+            self.outbox.put(mail, self.config.recipients)
+        except OSError as exc:
+            metrics.MAIL_FAILURES.inc()
+            raise MailError(f"Could not queue email: {exc}") from exc
 
+    async def send_async(
+        self, message: Message, thread_root: str | None = None, message_id: str | None = None
+    ) -> None:
+        """`send` for the asyncio engine."""
+        mail = self.compose(message, thread_root=thread_root, message_id=message_id)
+        if self.outbox is None:
+            await self.deliver_async(mail)
+            return
+        try:
+            # The fsync that makes it durable would otherwise stall the loop.
+            await asyncio.to_thread(self.outbox.put, mail, self.config.recipients)
+        except OSError as exc:
+            metrics.MAIL_FAILURES.inc()
+            raise MailError(f"Could not queue email: {exc}") from exc
+
+    def deliver(self, mail: EmailMessage, to: list[str] | None = None) -> None:
+        """Hand a composed email to the SMTP server now."""
+        recipients = to or self.config.recipients
         if self.dry_run:
-            logger.info(
-                "[dry-run] would send %r to %s", message.subject, ", ".join(self.config.recipients)
-            )
+            logger.info("[dry-run] would send %r to %s", mail["Subject"], ", ".join(recipients))
             return
 
+        started = time.perf_counter()
         try:
-            with self._connect() as server:
-                # Pass the envelope explicitly: left to itself send_message()
-                # derives it from To + Cc + Bcc, which would deliver twice to
-                # whoever is both a recipient and the sender.
-                server.send_message(mail, to_addrs=self.config.recipients)
-        except (smtplib.SMTPException, OSError, ssl.SSLError) as exc:
+            # Pass the envelope explicitly: left to itself send_message()
+            # derives it from To + Cc + Bcc, which would deliver twice to
+            # whoever is both a recipient and the sender.
+            reused = self.pool.send(mail, to_addrs=recipients)
+        except _SMTP_ERRORS as exc:
+            metrics.MAIL_FAILURES.inc()
             raise MailError(f"SMTP delivery failed: {exc}") from exc
+        finally:
+            metrics.SMTP_SECONDS.observe(time.perf_counter() - started)
+        self._sent(mail, recipients, started, reused)
 
-        logger.info("Sent %r to %d recipient(s)", message.subject, len(self.config.recipients))
+    async def deliver_async(self, mail: EmailMessage, to: list[str] | None = None) -> None:
+        """`deliver` for the asyncio engine."""
+        if self.dry_run:
+            self.deliver(mail, to)
+            return
+        if self.async_pool is None:
+            await asyncio.to_thread(self.deliver, mail, to)
+            return
+
+        recipients = to or self.config.recipients
+        started = time.perf_counter()
+        try:
+            reused = await self.async_pool.send(mail, to_addrs=recipients)
+        except _ASYNC_SMTP_ERRORS as exc:
+            metrics.MAIL_FAILURES.inc()
+            raise MailError(f"SMTP delivery failed: {exc}") from exc
+        finally:
+            metrics.SMTP_SECONDS.observe(time.perf_counter() - started)
+        self._sent(mail, recipients, started, reused)
+
+    def _sent(self, mail: EmailMessage, recipients: list[str], started: float, reused: bool) -> None:
+        logger.info(
+            "Sent %r to %d recipient(s) in %.0f ms (%s connection)",
+            mail["Subject"],
+            len(recipients),
+            (time.perf_counter() - started) * 1000,
+            "reused" if reused else "new",
+        )
 
     def verify(self) -> bool:
         """Probe the SMTP server at startup so misconfiguration fails loudly."""
@@ -100,10 +396,17 @@ class Mailer:
             logger.info("Dry run enabled — skipping SMTP check")
             return True
         try:
-            with self._connect():
-                pass
-        except (smtplib.SMTPException, OSError, ssl.SSLError) as exc:
+            self.pool.connect()
+        except _SMTP_ERRORS as exc:
             logger.error("SMTP check failed for %s:%s — %s", self.config.host, self.config.port, exc)
             return False
         logger.info("SMTP check OK (%s:%s)", self.config.host, self.config.port)
         return True
+
+    def close(self) -> None:
+        self.pool.close()
+
+    async def aclose(self) -> None:
+        if self.async_pool is not None:
+            await self.async_pool.close()
+        self.close()
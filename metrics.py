@@ -0,0 +1,192 @@
+"""Prometheus metrics for what happens inside a cycle.
+
+Timings and counts are always recorded — it costs a lock and an addition —
+and served in the Prometheus text format when FOGOS_METRICS_PORT is set.
+No client library: the handful of metric types used here fit in this file,
+and the image stays at one dependency.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+# Seconds. Upstream and SMTP are the slow ends; anything past a minute is an
+# outage, not a latency.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.doc = doc
+        self.labelnames = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, doc, labels)
+        self._values: dict[tuple[str, ...], float] = {} if labels else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (the last one is +Inf), then the sum.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe how long the block took, whether or not it raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines: list[str] = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+FETCH_SECONDS = Histogram("fogos_fetch_seconds", "Upstream fetch, download and parse together.")
+PARSE_SECONDS = Histogram("fogos_parse_seconds", "Parsing the upstream payload.")
+PAYLOAD_BYTES = Gauge("fogos_payload_bytes", "Size of the last upstream body downloaded, decoded.")
+WIRE_BYTES = Counter(
+    "fogos_upstream_wire_bytes_total", "Upstream body bytes as sent, by content coding.", labels=("encoding",)
+)
+DECODED_BYTES = Counter("fogos_upstream_decoded_bytes_total", "Upstream body bytes once decoded.")
+DETECT_SECONDS = Histogram("fogos_detect_seconds", "Diffing live fires against the last snapshot.")
+RENDER_SECONDS = Histogram(
+    "fogos_render_seconds", "Rendering one email, per event or per digest.", labels=("template",)
+)
+SMTP_SECONDS = Histogram("fogos_smtp_send_seconds", "Handing one email to the SMTP server.")
+STATE_SAVE_SECONDS = Histogram("fogos_state_save_seconds", "Persisting a subscriber's state.")
+EVENTS = Counter("fogos_events_total", "Events detected, by kind.", labels=("subscriber", "kind"))
+MAIL_FAILURES = Counter("fogos_mail_failures_total", "Emails that could not be sent or queued.")
+CYCLE_FAILURES = Counter("fogos_cycle_failures_total", "Cycles that failed outright.")
+CONSECUTIVE_FAILURES = Gauge("fogos_consecutive_failures", "Failed cycles since the last good one.")
+TRACKED_FIRES = Gauge("fogos_tracked_fires", "Fires each subscriber is tracking.", labels=("subscriber",))
+POLL_INTERVAL_SECONDS = Gauge("fogos_poll_interval_seconds", "Interval the adaptive scheduler is polling at.")
+
+
+def exposition() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Every scrape would otherwise land on stderr.
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(port: int, host: str = "") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread. Raises OSError if the port is taken."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on port %d at /metrics", server.server_address[1])
+    return server
@@ -0,0 +1,397 @@
+"""Durable queue between the poll loop and the SMTP server.
+
+With the outbox on, `Mailer.send` only renders the email and writes it to
+disk; a background courier does the talking to SMTP. A slow or failing relay
+then never holds up a poll cycle, and a message that cannot be delivered is
+retried on its own schedule with exponential backoff — the next cycle does
+not have to rediscover the event just to send it again.
+
+Delivery is at-least-once. Every queued file carries its final Message-ID,
+and IDs already delivered are remembered on disk, so a message queued twice
+or left behind by a crash between sending and dequeuing is not sent again.
+Nor is one rebuilt after a crash between queuing it and saving the state:
+Message-IDs are derived from the fire, its sighting, how many emails about
+it went before, and the event's content, so the same event gets the same ID.
+That relies on a Message-ID never naming two different emails: a change
+that recurs is a later email and numbered as such, and an occurrence id
+that reappears after resolving is a new sighting with a new thread root.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import email
+import email.policy
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import EmailMessage
+
+from mailer import MailError, Mailer
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+# Retry delays double from BACKOFF_BASE up to BACKOFF_MAX seconds, plus up to
+# 25% of random buffer so a recovering relay is not hit by everything at once.
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+
+# After this many failed attempts — about a day at BACKOFF_MAX — an email is
+# moved to the outbox's failed/ directory instead of being retried again.
+MAX_ATTEMPTS = 30
+
+# How many delivered Message-IDs to remember. Far more than one outage's worth.
+DELIVERED_KEEP = 2000
+
+# The courier rechecks the queue at least this often even if nothing wakes it.
+COURIER_POLL_SECONDS = 60
+
+
+@dataclass
+class Entry:
+    path: str
+    message_id: str
+    thread: str
+    created: int
+    attempts: int
+    next_attempt: float
+    to: list[str]
+    mail: bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "message_id": self.message_id,
+            "thread": self.thread,
+            "created": self.created,
+            "attempts": self.attempts,
+            "next_attempt": self.next_attempt,
+            "to": self.to,
+            "mail": base64.b64encode(self.mail).decode("ascii"),
+        }
+
+
+def _write(path: str, payload: dict) -> None:
+    """Write atomically, like state.save — a torn queue file would be a lost email."""
+    directory = os.path.dirname(path)
+    handle = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, prefix=".outbox-", suffix=".tmp", delete=False
+    )
+    try:
+        with handle:
+            json.dump(payload, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, path)
+    except OSError:
+        os.unlink(handle.name)
+        raise
+
+
+class Outbox:
+    """One subscriber's queue: a directory with a JSON file per message."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._ledger = os.path.join(directory, "delivered.log")
+        self.failed_directory = os.path.join(directory, "failed")
+        self._delivered: deque[str] = deque(maxlen=DELIVERED_KEEP)
+        self._ledger_lines = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self._ledger, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        self._delivered.append(line.strip())
+                        self._ledger_lines += 1
+        except FileNotFoundError:
+            pass
+
+    def _path(self, message_id: str) -> str:
+        key = hashlib.blake2b(message_id.encode("utf-8"), digest_size=12).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def put(self, mail: EmailMessage, to: list[str]) -> None:
+        """Queue a composed email. Raises OSError if it could not be made durable."""
+        message_id = str(mail["Message-ID"])
+        path = self._path(message_id)
+        with self._lock:
+            if message_id in self._delivered or os.path.exists(path):
+                logger.info("Already queued or delivered, not queuing again: %s", message_id)
+                return
+        # Replies name their thread's root in References; a root is its own.
+        thread = str(mail["References"] or message_id)
+        entry = Entry(path, message_id, thread, time.time_ns(), 0, 0.0, list(to), mail.as_bytes())
+        _write(path, entry.to_dict())
+        logger.debug("Queued %r (%s)", mail["Subject"], message_id)
+
+    def pending(self) -> list[Entry]:
+        """Everything queued, oldest first."""
+        entries: list[Entry] = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as handle:
+                    raw = json.load(handle)
+                entries.append(
+                    Entry(
+                        path=path,
+                        message_id=raw["message_id"],
+                        thread=raw["thread"],
+                        created=int(raw["created"]),
+                        attempts=int(raw["attempts"]),
+                        next_attempt=float(raw["next_attempt"]),
+                        to=list(raw["to"]),
+                        mail=base64.b64decode(raw["mail"]),
+                    )
+                )
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                logger.error("Skipping unreadable outbox file %s: %s", path, exc)
+        entries.sort(key=lambda entry: entry.created)
+        return entries
+
+    def _remember(self, message_id: str) -> None:
+        with self._lock:
+            self._delivered.append(message_id)
+            # Compact the ledger once it holds twice what is remembered.
+            if self._ledger_lines >= 2 * DELIVERED_KEEP:
+                _rewrite_lines(self._ledger, self._delivered)
+                self._ledger_lines = len(self._delivered)
+                return
+            with open(self._ledger, "a", encoding="utf-8") as handle:
+                handle.write(message_id + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._ledger_lines += 1
+
+    def delivered(self, entry: Entry) -> None:
+        # Remember before unlinking: a crash in between leaves a file the
+        # next pass recognises as delivered and drops instead of resending.
+        self._remember(entry.message_id)
+        os.unlink(entry.path)
+
+    def retry_later(self, entry: Entry) -> float:
+        entry.attempts += 1
+        delay = min(BACKOFF_BASE * 2 ** (entry.attempts - 1), BACKOFF_MAX)
+        entry.next_attempt = time.time() + delay * (1 + random.uniform(0, 0.25))
+        _write(entry.path, entry.to_dict())
+        return entry.next_attempt - time.time()
+
+    def give_up(self, entry: Entry) -> str:
+        """Take an entry off the queue into failed/, where it is kept for inspection. Returns its new path."""
+        entry.attempts += 1
+        os.makedirs(self.failed_directory, exist_ok=True)
+        target = os.path.join(self.failed_directory, os.path.basename(entry.path))
+        _write(target, entry.to_dict())
+        os.unlink(entry.path)
+        return target
+
+    def is_delivered(self, message_id: str) -> bool:
+        with self._lock:
+            return message_id in self._delivered
+
+
+def _rewrite_lines(path: str, lines: deque[str]) -> None:
+    directory = os.path.dirname(path)
+    handle = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, prefix=".outbox-", suffix=".tmp", delete=False
+    )
+    try:
+        with handle:
+            handle.writelines(line + "\n" for line in lines)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, path)
+    except OSError:
+        os.unlink(handle.name)
+        raise
+
+
+def _due(mailers: list[Mailer], now: float) -> tuple[list[tuple[Mailer, Entry]], float]:
+    """The head of every thread whose retry is due, and seconds until the next one is."""
+    wait = float(COURIER_POLL_SECONDS)
+    due: list[tuple[Mailer, Entry]] = []
+    for mailer in mailers:
+        heads: set[str] = set()
+        for entry in mailer.outbox.pending():  # type: ignore[union-attr]
+            if entry.thread in heads:
+                continue
+            heads.add(entry.thread)
+            if entry.next_attempt <= now:
+                due.append((mailer, entry))
+            else:
+                wait = min(wait, entry.next_attempt - now)
+    return due, wait
+
+
+def _unpack(mailer: Mailer, entry: Entry) -> EmailMessage | None:
+    """The queued email, or None if it already went out and only its file was left."""
+    outbox = mailer.outbox
+    assert outbox is not None
+    if outbox.is_delivered(entry.message_id):
+        os.unlink(entry.path)
+        return None
+    return email.message_from_bytes(entry.mail, _class=EmailMessage, policy=email.policy.default)  # type: ignore[return-value]
+
+
+def _failed(mailer: Mailer, entry: Entry, mail: EmailMessage, exc: MailError) -> float | None:
+    """Schedule a retry: seconds until it is due, or None once out of attempts and off the queue."""
+    outbox = mailer.outbox
+    assert outbox is not None
+    if entry.attempts + 1 >= MAX_ATTEMPTS:
+        path = outbox.give_up(entry)
+        logger.error("Giving up on %r after %d attempts, moved to %s: %s", mail["Subject"], entry.attempts, path, exc)
+        return None
+    wait = outbox.retry_later(entry)
+    logger.warning(
+        "Could not deliver %r (attempt %d), retrying in %.0fs: %s",
+        mail["Subject"],
+        entry.attempts,
+        wait,
+        exc,
+    )
+    return wait
+
+
+def _settle(wait: float, results: list[float | None], due: int) -> float | None:
+    """Seconds to sleep after a pass, or None to go round again right away."""
+    retries = [result for result in results if result is not None]
+    if retries:
+        wait = min(wait, *retries)
+    # Nothing went through; the queue is unchanged until a retry is due.
+    return max(wait, 0.0) if len(retries) == due else None
+
+
+class Courier(threading.Thread):
+    """Background sender draining every subscriber's outbox.
+
+    A thread's messages go out strictly in order: while the head of one is
+    waiting out its backoff, the rest of that thread waits behind it, so an
+    UPDATE never overtakes its NEW. Heads of different threads are sent in
+    parallel, up to `workers` at a time.
+    """
+
+    def __init__(self, mailers: list[Mailer], workers: int = 1) -> None:
+        super().__init__(name="courier", daemon=True)
+        self.mailers = [mailer for mailer in mailers if mailer.outbox is not None]
+        self.workers = max(1, workers)
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                wait = self.flush()
+            except Exception:
+                logger.exception("Courier pass failed")
+                wait = COURIER_POLL_SECONDS
+            self._wake.wait(min(wait, COURIER_POLL_SECONDS))
+            self._wake.clear()
+
+    def _deliver(self, mailer: Mailer, entry: Entry) -> float | None:
+        """Send one entry. None once it is off the queue, else seconds until its retry."""
+        mail = _unpack(mailer, entry)
+        if mail is None:
+            return None
+        try:
+            mailer.deliver(mail, entry.to)
+        except MailError as exc:
+            return _failed(mailer, entry, mail, exc)
+        mailer.outbox.delivered(entry)  # type: ignore[union-attr]
+        return None
+
+    def flush(self) -> float:
+        """Send whatever is due. Returns seconds until something else will be."""
+        while not self._stopping.is_set():
+            due, wait = _due(self.mailers, time.time())
+            if not due:
+                return max(wait, 0.0)
+
+            if self.workers > 1 and len(due) > 1:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(due))) as pool:
+                    results = list(pool.map(lambda job: self._deliver(*job), due))
+            else:
+                results = [self._deliver(*job) for job in due]
+
+            settled = _settle(wait, results, len(due))
+            if settled is not None:
+                return settled
+        return 0.0
+
+
+class AsyncCourier:
+    """Courier as an asyncio task, for the asyncio engine. Same ordering rules.
+
+    The outbox's own file reads and writes, each with its fsync, run in
+    worker threads, so a slow volume never stalls the loop's SMTP traffic.
+    """
+
+    def __init__(self, mailers: list[Mailer], workers: int = 1) -> None:
+        self.mailers = [mailer for mailer in mailers if mailer.outbox is not None]
+        self.workers = max(1, workers)
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                wait = await self.flush()
+            except Exception:
+                logger.exception("Courier pass failed")
+                wait = COURIER_POLL_SECONDS
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(wait, COURIER_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _deliver(self, mailer: Mailer, entry: Entry, slots: asyncio.Semaphore) -> float | None:
+        mail = await asyncio.to_thread(_unpack, mailer, entry)
+        if mail is None:
+            return None
+        try:
+            async with slots:
+                await mailer.deliver_async(mail, entry.to)
+        except MailError as exc:
+            return await asyncio.to_thread(_failed, mailer, entry, mail, exc)
+        await asyncio.to_thread(mailer.outbox.delivered, entry)  # type: ignore[union-attr]
+        return None
+
+    async def flush(self) -> float:
+        slots = asyncio.Semaphore(self.workers)
+        while not self._stopping.is_set():
+            due, wait = await asyncio.to_thread(_due, self.mailers, time.time())
+            if not due:
+                return max(wait, 0.0)
+            results = await asyncio.gather(*(self._deliver(mailer, entry, slots) for mailer, entry in due))
+            settled = _settle(wait, list(results), len(due))
+            if settled is not None:
+                return settled
+        return 0.0
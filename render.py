@@ -10,7 +10,9 @@ survives Gmail, Outlook and Apple Mail intact.
 
 from __future__ import annotations
 
+import functools
 import html
+import re
 import time
 from dataclasses import dataclass
 
@@ -25,6 +27,9 @@ PALETTE = {
     "resolved": ("#067647", "#ECFDF3", "✅"),
 }
 
+# Digest cards are ordered by this, worst first.
+SEVERITY_RANK = {"resolved": 0, "info": 1, "elevated": 2, "major": 3}
+
 EVENT_LABEL = {
     NEW: "Novo incêndio",
     UPDATE: "Atualização",
@@ -86,155 +91,294 @@ def build_subject(event: Event) -> str:
     return f"{arrow} {fire.place} · {event.headline or 'atualização'}"
 
 
-def _stat_cell(label: str, value: int, accent: str) -> str:
-    dim = "" if value else "opacity:0.45;"
-    return f"""
-      <td width="25%" align="center" style="padding:12px 4px;{dim}">
-        <div style="font:700 22px/1.1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:{accent};">{value}</div>
-        <div style="font:400 11px/1.4 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;text-transform:uppercase;letter-spacing:.4px;padding-top:4px;">{html.escape(label)}</div>
-      </td>"""
+_SLOT = re.compile(r"\{\{(\w+)\}\}")
 
 
-def _changes_block(event: Event) -> str:
-    if not event.changes:
-        return ""
+class _Template:
+    """Markup split once, at import, into static text and named slots.
 
-    rows = []
-    for change in event.changes:
-        arrow_color = "#B42318" if change.escalation > 0 else "#067647" if change.escalation < 0 else "#475467"
-        rows.append(
-            f"""
+    Rendering joins the constant parts with the slot values in one go, so it
+    costs about what a hand-written f-string does, without re-deriving
+    anything constant. `partial` fills some slots ahead of time and merges
+    the text around them — that is how the per-palette variants are cached.
+    Slot values are inserted as given: escape them first.
+    """
+
+    __slots__ = ("_parts", "_slots", "render")
+
+    def __init__(self, parts: list[str], slots: list[str]) -> None:
+        """`parts` is the text around the slots, so it holds one more item than `slots`."""
+        self._parts, self._slots = tuple(parts), tuple(slots)
+        head, pairs = self._parts[0], tuple(zip(self._slots, self._parts[1:]))
+
+        def render(**values: str) -> str:
+            pieces = [head]
+            for slot, part in pairs:
+                pieces += (values[slot], part)
+            return "".join(pieces)
+
+        self.render = render
+
+    @classmethod
+    def parse(cls, source: str) -> _Template:
+        """A template from markup with `{{name}}` slots."""
+        pieces = _SLOT.split(source)
+        return cls(pieces[0::2], pieces[1::2])
+
+    def partial(self, **values: str) -> _Template:
+        parts, slots = [self._parts[0]], []
+        for slot, part in zip(self._slots, self._parts[1:]):
+            if slot in values:
+                parts[-1] += values[slot] + part
+            else:
+                slots.append(slot)
+                parts.append(part)
+        return _Template(parts, slots)
+
+
+# Place names, statuses and natureza repeat across fires and cycles.
+_escape = functools.lru_cache(maxsize=4096)(html.escape)
+
+
+@dataclass
+class _Facts:
+    """What the subject, HTML and text of one event all need, worked out once."""
+
+    place: str
+    distance: str
+    started: str
+    duration: str
+
+    @classmethod
+    def of(cls, fire: Fire) -> _Facts:
+        return cls(fire.full_place, _distance_text(fire), fire.started_display, _duration(fire.started_at))
+
+
+_STAT_CELL = _Template.parse("""
+      <td width="25%" align="center" style="padding:12px 4px;{{dim}}">
+        <div style="font:700 22px/1.1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:{{accent}};">{{value}}</div>
+        <div style="font:400 11px/1.4 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;text-transform:uppercase;letter-spacing:.4px;padding-top:4px;">{{label}}</div>
+      </td>""")
+
+
+_STAT_LABELS = ("Operacionais", "Terrestres", "Aéreos", "Aquáticos")
+
+
+def _stat_cell(template: _Template, value: int) -> str:
+    return template.render(dim="" if value else "opacity:0.45;", value=str(value))
+
+
+_CHANGE_ROW = _Template.parse("""
         <tr>
-          <td style="padding:6px 0;font:600 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#344054;white-space:nowrap;">{html.escape(change.label)}</td>
+          <td style="padding:6px 0;font:600 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#344054;white-space:nowrap;">{{label}}</td>
           <td align="right" style="padding:6px 0;font:400 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;">
-            <span style="text-decoration:line-through;">{html.escape(change.old)}</span>
-            <span style="color:{arrow_color};padding:0 6px;">→</span>
-            <span style="color:{arrow_color};font-weight:700;">{html.escape(change.new)}</span>
+            <span style="text-decoration:line-through;">{{old}}</span>
+            <span style="color:{{arrow_color}};padding:0 6px;">→</span>
+            <span style="color:{{arrow_color}};font-weight:700;">{{new}}</span>
           </td>
-        </tr>"""
-        )
+        </tr>""")
 
-    return f"""
+_CHANGES = _Template.parse("""
     <tr><td style="padding:0 24px 4px;">
       <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#F9FAFB;border:1px solid #EAECF0;border-radius:10px;">
         <tr><td style="padding:14px 16px 4px;font:700 11px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;text-transform:uppercase;letter-spacing:.6px;">O que mudou</td></tr>
         <tr><td style="padding:0 16px 10px;">
-          <table role="presentation" width="100%" cellpadding="0" cellspacing="0">{"".join(rows)}</table>
+          <table role="presentation" width="100%" cellpadding="0" cellspacing="0">{{rows}}</table>
         </td></tr>
       </table>
-    </td></tr>"""
-
-
-def _detail_rows(fire: Fire, event: Event) -> str:
-    until = int(time.time()) if event.kind != RESOLVED else None
-    entries = [
-        ("Estado", fire.status),
-        ("Natureza", fire.natureza or "—"),
-        ("Distância", _distance_text(fire)),
-        ("Local", fire.detail_location or "—"),
-        ("Freguesia", fire.freguesia or "—"),
-        ("Concelho", fire.concelho or "—"),
-        ("Distrito", fire.district or "—"),
-        ("Início", fire.started_display),
-        ("Duração", _duration(fire.started_at, until)),
-        ("Ocorrência", fire.id),
-    ]
-    return "".join(
-        f"""
-        <tr>
-          <td width="38%" style="padding:7px 0;border-bottom:1px solid #F2F4F7;font:400 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;">{html.escape(label)}</td>
-          <td style="padding:7px 0;border-bottom:1px solid #F2F4F7;font:600 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#101828;">{html.escape(str(value))}</td>
-        </tr>"""
-        for label, value in entries
-    )
+    </td></tr>""")
 
 
-def build_html(event: Event, config: Config) -> str:
-    fire = event.fire
-    palette_key = "resolved" if event.kind == RESOLVED else event.severity
-    accent, tint, icon = PALETTE[palette_key]
-    label = EVENT_LABEL[event.kind]
+def _changes_block(event: Event) -> str:
+    if not event.changes:
+        return ""
 
-    headline = event.headline if event.kind == UPDATE and event.headline else fire.status
-    matched = "no raio monitorizado" if fire.matched_by == "radius" else "numa localidade monitorizada"
+    rows = []
+    for change in event.changes:
+        arrow_color = "#B42318" if change.escalation > 0 else "#067647" if change.escalation < 0 else "#475467"
+        rows.append(
+            _CHANGE_ROW.render(
+                label=_escape(change.label),
+                old=_escape(change.old),
+                new=_escape(change.new),
+                arrow_color=arrow_color,
+            )
+        )
+    return _CHANGES.render(rows="".join(rows))
 
-    return f"""<!DOCTYPE html>
-<html lang="pt"><head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width,initial-scale=1">
-<meta name="color-scheme" content="light">
-<title>{html.escape(build_subject(event))}</title>
-</head>
-<body style="margin:0;padding:0;background:#F2F4F7;">
-<div style="display:none;max-height:0;overflow:hidden;opacity:0;">{html.escape(fire.full_place)} · {html.escape(headline)} · {html.escape(_distance_text(fire))}</div>
-<table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#F2F4F7;padding:24px 12px;">
-<tr><td align="center">
-  <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="max-width:560px;background:#FFFFFF;border-radius:14px;overflow:hidden;box-shadow:0 1px 3px rgba(16,24,40,.1);">
 
-    <tr><td style="background:{accent};padding:18px 24px;">
-      <div style="font:700 12px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;text-transform:uppercase;letter-spacing:1.2px;opacity:.85;">{icon}&nbsp;&nbsp;{html.escape(label)}</div>
-      <div style="font:700 24px/1.25 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;padding-top:6px;">{html.escape(fire.full_place)}</div>
+_DETAIL_ROW = _Template.parse("""
+        <tr>
+          <td width="38%" style="padding:7px 0;border-bottom:1px solid #F2F4F7;font:400 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#667085;">{{label}}</td>
+          <td style="padding:7px 0;border-bottom:1px solid #F2F4F7;font:600 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#101828;">{{value}}</td>
+        </tr>""")
+
+_DETAIL_LABELS = (
+    "Estado", "Natureza", "Distância", "Local", "Freguesia",
+    "Concelho", "Distrito", "Início", "Duração", "Ocorrência",
+)
+_DETAIL_ROWS = tuple(_DETAIL_ROW.partial(label=html.escape(label)) for label in _DETAIL_LABELS)
+
+
+def _detail_rows(fire: Fire, facts: _Facts) -> str:
+    values = (
+        fire.status,
+        fire.natureza or "—",
+        facts.distance,
+        fire.detail_location or "—",
+        fire.freguesia or "—",
+        fire.concelho or "—",
+        fire.district or "—",
+        facts.started,
+        facts.duration,
+        fire.id,
+    )
+    return "".join(row.render(value=_escape(value)) for row, value in zip(_DETAIL_ROWS, values))
+
+
+_CARD = _Template.parse("""<table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="max-width:560px;background:#FFFFFF;border-radius:14px;overflow:hidden;box-shadow:0 1px 3px rgba(16,24,40,.1);">
+
+    <tr><td style="background:{{accent}};padding:18px 24px;">
+      <div style="font:700 12px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;text-transform:uppercase;letter-spacing:1.2px;opacity:.85;">{{icon}}&nbsp;&nbsp;{{label}}</div>
+      <div style="font:700 24px/1.25 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;padding-top:6px;">{{place}}</div>
     </td></tr>
 
-    <tr><td style="background:{tint};padding:14px 24px;border-bottom:1px solid #EAECF0;">
-      <div style="font:600 15px/1.4 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:{accent};">{html.escape(headline)}</div>
-      <div style="font:400 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#475467;padding-top:3px;">{html.escape(_distance_text(fire))} &middot; início {html.escape(fire.started_display)} &middot; {html.escape(fire.natureza or 'natureza desconhecida')}</div>
+    <tr><td style="background:{{tint}};padding:14px 24px;border-bottom:1px solid #EAECF0;">
+      <div style="font:600 15px/1.4 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:{{accent}};">{{headline}}</div>
+      <div style="font:400 13px/1.5 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#475467;padding-top:3px;">{{distance}} &middot; início {{started}} &middot; {{natureza}}</div>
     </td></tr>
 
-    {_changes_block(event)}
+    {{changes}}
 
     <tr><td style="padding:8px 20px 0;">
       <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="border:1px solid #EAECF0;border-radius:10px;">
         <tr>
-          {_stat_cell("Operacionais", fire.man, accent)}
-          {_stat_cell("Terrestres", fire.terrain, accent)}
-          {_stat_cell("Aéreos", fire.aerial, accent)}
-          {_stat_cell("Aquáticos", fire.aquatic, accent)}
+          {{man}}
+          {{terrain}}
+          {{aerial}}
+          {{aquatic}}
         </tr>
       </table>
     </td></tr>
 
     <tr><td style="padding:16px 24px 4px;">
-      <table role="presentation" width="100%" cellpadding="0" cellspacing="0">{_detail_rows(fire, event)}</table>
+      <table role="presentation" width="100%" cellpadding="0" cellspacing="0">{{details}}</table>
     </td></tr>
 
     <tr><td style="padding:20px 24px 24px;">
       <table role="presentation" cellpadding="0" cellspacing="0">
         <tr>
-          <td style="border-radius:8px;background:{accent};">
-            <a href="{html.escape(fire.detail_url)}" style="display:inline-block;padding:11px 20px;font:600 14px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;text-decoration:none;">Ver no fogos.pt</a>
+          <td style="border-radius:8px;background:{{accent}};">
+            <a href="{{detail_url}}" style="display:inline-block;padding:11px 20px;font:600 14px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;text-decoration:none;">Ver no fogos.pt</a>
           </td>
           <td width="10"></td>
           <td style="border-radius:8px;border:1px solid #D0D5DD;">
-            <a href="{html.escape(fire.map_url)}" style="display:inline-block;padding:10px 20px;font:600 14px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#344054;text-decoration:none;">Abrir mapa</a>
+            <a href="{{map_url}}" style="display:inline-block;padding:10px 20px;font:600 14px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#344054;text-decoration:none;">Abrir mapa</a>
           </td>
         </tr>
       </table>
     </td></tr>
 
     <tr><td style="padding:14px 24px;background:#F9FAFB;border-top:1px solid #EAECF0;font:400 11px/1.6 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#98A2B3;">
-      Detetado {html.escape(matched)}. Dados de <a href="https://fogos.pt" style="color:#667085;">fogos.pt</a> / ANEPC, atualizados a cada {config.poll_minutes} min.<br>
+      Detetado {{matched}}. Dados de <a href="https://fogos.pt" style="color:#667085;">fogos.pt</a> / ANEPC, atualizados a cada {{poll_minutes}} min.<br>
       Informação indicativa — em emergência ligue <strong style="color:#667085;">112</strong>.
     </td></tr>
 
-  </table>
+  </table>""")
+
+
+@functools.lru_cache(maxsize=None)
+def _card_templates(palette_key: str, kind: str) -> tuple[_Template, tuple[_Template, ...]]:
+    """The card and its stat cells, with everything that depends only on palette and kind filled in."""
+    accent, tint, icon = PALETTE[palette_key]
+    card = _CARD.partial(accent=accent, tint=tint, icon=icon, label=html.escape(EVENT_LABEL[kind]))
+    stats = tuple(_STAT_CELL.partial(label=html.escape(label), accent=accent) for label in _STAT_LABELS)
+    return card, stats
+
+
+def _palette_key(event: Event) -> str:
+    return "resolved" if event.kind == RESOLVED else event.severity
+
+
+def _headline(event: Event) -> str:
+    return event.headline if event.kind == UPDATE and event.headline else event.fire.status
+
+
+def _event_card(event: Event, config: Config, facts: _Facts | None = None) -> str:
+    """One event's card: the whole of a single alert, or one block of a digest."""
+    fire = event.fire
+    facts = facts or _Facts.of(fire)
+    card, (man, terrain, aerial, aquatic) = _card_templates(_palette_key(event), event.kind)
+
+    matched = "no raio monitorizado" if fire.matched_by == "radius" else "numa localidade monitorizada"
+    _, _, place = fire.matched_by.partition(":")
+    if place:
+        matched += f" ({place})"
+
+    return card.render(
+        place=_escape(facts.place),
+        headline=_escape(_headline(event)),
+        distance=_escape(facts.distance),
+        started=_escape(facts.started),
+        natureza=_escape(fire.natureza or "natureza desconhecida"),
+        changes=_changes_block(event),
+        man=_stat_cell(man, fire.man),
+        terrain=_stat_cell(terrain, fire.terrain),
+        aerial=_stat_cell(aerial, fire.aerial),
+        aquatic=_stat_cell(aquatic, fire.aquatic),
+        details=_detail_rows(fire, facts),
+        detail_url=html.escape(fire.detail_url),
+        map_url=html.escape(fire.map_url),
+        matched=_escape(matched),
+        poll_minutes=str(config.poll_minutes),
+    )
+
+
+_PAGE = _Template.parse("""<!DOCTYPE html>
+<html lang="pt"><head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<meta name="color-scheme" content="light">
+<title>{{title}}</title>
+</head>
+<body style="margin:0;padding:0;background:#F2F4F7;">
+<div style="display:none;max-height:0;overflow:hidden;opacity:0;">{{preheader}}</div>
+<table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#F2F4F7;padding:24px 12px;">
+<tr><td align="center">
+  {{cards}}
 </td></tr>
 </table>
-</body></html>"""
+</body></html>""")
 
+_CARD_SPACER = '\n  <div style="height:16px;line-height:16px;">&nbsp;</div>\n  '
+
+
+def _page(title: str, preheader: str, cards: list[str]) -> str:
+    return _PAGE.render(title=html.escape(title), preheader=html.escape(preheader), cards=_CARD_SPACER.join(cards))
+
+
+def _html(event: Event, config: Config, subject: str, facts: _Facts) -> str:
+    return _page(
+        subject,
+        f"{facts.place} · {_headline(event)} · {facts.distance}",
+        [_event_card(event, config, facts)],
+    )
+
+
+def build_html(event: Event, config: Config) -> str:
+    return _html(event, config, build_subject(event), _Facts.of(event.fire))
 
-def build_text(event: Event, config: Config) -> str:
-    fire = event.fire
-    until = int(time.time()) if event.kind != RESOLVED else None
 
+def _text(event: Event, config: Config, facts: _Facts) -> str:
+    fire = event.fire
     lines = [
-        f"{EVENT_LABEL[event.kind].upper()} — {fire.full_place}",
+        f"{EVENT_LABEL[event.kind].upper()} — {facts.place}",
         "=" * 48,
         f"Estado      : {fire.status}",
-        f"Distância   : {_distance_text(fire)}",
+        f"Distância   : {facts.distance}",
         f"Natureza    : {fire.natureza or '—'}",
         f"Local       : {fire.detail_location or '—'}",
-        f"Início      : {fire.started_display}  (duração {_duration(fire.started_at, until)})",
+        f"Início      : {facts.started}  (duração {facts.duration})",
         "",
         f"Operacionais: {fire.man}   Terrestres: {fire.terrain}   "
         f"Aéreos: {fire.aerial}   Aquáticos: {fire.aquatic}",
@@ -255,61 +399,118 @@ def build_text(event: Event, config: Config) -> str:
     return "\n".join(lines)
 
 
+def build_text(event: Event, config: Config) -> str:
+    return _text(event, config, _Facts.of(event.fire))
+
+
 def build_message(event: Event, config: Config) -> Message:
+    """Subject, HTML and text for one event, sharing one pass over its fields."""
+    facts = _Facts.of(event.fire)
+    subject = build_subject(event)
     return Message(
-        subject=build_subject(event),
-        html_body=build_html(event, config),
-        text_body=build_text(event, config),
+        subject=subject,
+        html_body=_html(event, config, subject, facts),
+        text_body=_text(event, config, facts),
     )
 
 
-def build_status_message(config: Config, tracked: list[Fire], title: str, note: str) -> Message:
-    """Heartbeat / startup email: proof the watcher is alive and what it sees."""
-    active = [fire for fire in tracked if not fire.is_cooling]
-    subject = f"📋 {title} · {len(active)} ativo(s), {len(tracked)} em vigilância"
+def _count(n: int, one: str, many: str) -> str:
+    return f"{n} {one if n == 1 else many}"
 
-    if tracked:
-        rows = "".join(
-            f"""
+
+def build_digest(events: list[Event], config: Config) -> Message:
+    """Several events in one email, one card each, worst first."""
+    order = {NEW: 0, UPDATE: 1, RESOLVED: 2}
+    ranked = sorted(events, key=lambda e: (-SEVERITY_RANK.get(_palette_key(e), 0), order[e.kind]))
+    facts = [_Facts.of(event.fire) for event in ranked]
+    counts = {kind: sum(1 for e in events if e.kind == kind) for kind in (NEW, UPDATE, RESOLVED)}
+    parts = [
+        _count(counts[NEW], "novo", "novos"),
+        _count(counts[UPDATE], "atualizado", "atualizados"),
+        _count(counts[RESOLVED], "terminado", "terminados"),
+    ]
+    worst = ranked[0]
+    _, _, icon = PALETTE[_palette_key(worst)]
+    summary = ", ".join(part for part, n in zip(parts, counts.values()) if n)
+    subject = f"{icon} {_count(len(events), 'alteração', 'alterações')} · {summary}"
+
+    html_body = _page(
+        subject,
+        " · ".join(e.fire.place for e in ranked),
+        [_event_card(event, config, fact) for event, fact in zip(ranked, facts)],
+    )
+    texts = [_text(event, config, fact) for event, fact in zip(ranked, facts)]
+    text_body = f"\n\n{'#' * 48}\n\n".join([subject, *texts])
+    return Message(subject=subject, html_body=html_body, text_body=text_body)
+
+
+_STATUS_ROW = _Template.parse("""
         <tr>
           <td style="padding:8px 0;border-bottom:1px solid #F2F4F7;font:600 13px/1.4 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#101828;">
-            {html.escape(fire.full_place)}
-            <div style="font-weight:400;color:#667085;padding-top:2px;">{html.escape(fire.status)} · {html.escape(_distance_text(fire))} · {html.escape(_resource_summary(fire) or 'sem meios')}</div>
+            {{place}}
+            <div style="font-weight:400;color:#667085;padding-top:2px;">{{status}} · {{distance}} · {{resources}}</div>
           </td>
           <td align="right" style="padding:8px 0;border-bottom:1px solid #F2F4F7;">
-            <a href="{html.escape(fire.detail_url)}" style="font:600 12px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#175CD3;text-decoration:none;">detalhe</a>
+            <a href="{{detail_url}}" style="font:600 12px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#175CD3;text-decoration:none;">detalhe</a>
           </td>
-        </tr>"""
-            for fire in tracked
-        )
-        table = f'<table role="presentation" width="100%" cellpadding="0" cellspacing="0">{rows}</table>'
-        text_lines = [
-            f"- {f.full_place} — {f.status}, {_distance_text(f)}, {_resource_summary(f) or 'sem meios'}"
-            for f in tracked
-        ]
-    else:
-        table = '<div style="font:400 14px/1.6 -apple-system,BlinkMacSystemFont,\'Segoe UI\',Arial,sans-serif;color:#475467;">Sem ocorrências na área monitorizada.</div>'
-        text_lines = ["Sem ocorrências na área monitorizada."]
+        </tr>""")
 
-    scope = ", ".join(config.locations) or f"raio de {config.max_distance_km:g} km"
+_STATUS_EMPTY = '<div style="font:400 14px/1.6 -apple-system,BlinkMacSystemFont,\'Segoe UI\',Arial,sans-serif;color:#475467;">Sem ocorrências na área monitorizada.</div>'
 
-    html_body = f"""<!DOCTYPE html>
-<html lang="pt"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1"><meta name="color-scheme" content="light"><title>{html.escape(subject)}</title></head>
+_STATUS_PAGE = _Template.parse("""<!DOCTYPE html>
+<html lang="pt"><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1"><meta name="color-scheme" content="light"><title>{{subject}}</title></head>
 <body style="margin:0;padding:0;background:#F2F4F7;">
 <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background:#F2F4F7;padding:24px 12px;">
 <tr><td align="center">
   <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="max-width:560px;background:#FFFFFF;border-radius:14px;overflow:hidden;box-shadow:0 1px 3px rgba(16,24,40,.1);">
     <tr><td style="background:#344054;padding:18px 24px;">
       <div style="font:700 12px/1 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;text-transform:uppercase;letter-spacing:1.2px;opacity:.75;">FogosPT Alerts</div>
-      <div style="font:700 22px/1.25 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;padding-top:6px;">{html.escape(title)}</div>
+      <div style="font:700 22px/1.25 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#FFFFFF;padding-top:6px;">{{title}}</div>
     </td></tr>
-    <tr><td style="padding:16px 24px 4px;font:400 13px/1.6 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#475467;">{html.escape(note)}</td></tr>
-    <tr><td style="padding:8px 24px 20px;">{table}</td></tr>
+    <tr><td style="padding:16px 24px 4px;font:400 13px/1.6 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#475467;">{{note}}</td></tr>
+    <tr><td style="padding:8px 24px 20px;">{{table}}</td></tr>
     <tr><td style="padding:14px 24px;background:#F9FAFB;border-top:1px solid #EAECF0;font:400 11px/1.6 -apple-system,BlinkMacSystemFont,'Segoe UI',Arial,sans-serif;color:#98A2B3;">
-      A monitorizar {html.escape(scope)}, a cada {config.poll_minutes} min. Se estes resumos pararem, o serviço parou.
+      A monitorizar {{scope}}, a cada {{poll_minutes}} min. Se estes resumos pararem, o serviço parou.
     </td></tr>
   </table>
-</td></tr></table></body></html>"""
+</td></tr></table></body></html>""")
+
+
+def build_status_message(config: Config, tracked: list[Fire], title: str, note: str) -> Message:
+    """Heartbeat / startup email: proof the watcher is alive and what it sees."""
+    active = [fire for fire in tracked if not fire.is_cooling]
+    subject = f"📋 {title} · {len(active)} ativo(s), {len(tracked)} em vigilância"
+
+    if tracked:
+        summaries = [(fire, _distance_text(fire), _resource_summary(fire) or "sem meios") for fire in tracked]
+        rows = "".join(
+            _STATUS_ROW.render(
+                place=_escape(fire.full_place),
+                status=_escape(fire.status),
+                distance=_escape(distance),
+                resources=_escape(resources),
+                detail_url=html.escape(fire.detail_url),
+            )
+            for fire, distance, resources in summaries
+        )
+        table = f'<table role="presentation" width="100%" cellpadding="0" cellspacing="0">{rows}</table>'
+        text_lines = [
+            f"- {fire.full_place} — {fire.status}, {distance}, {resources}" for fire, distance, resources in summaries
+        ]
+    else:
+        table = _STATUS_EMPTY
+        text_lines = ["Sem ocorrências na área monitorizada."]
+
+    scope = ", ".join(config.locations) or f"raio de {config.max_distance_km:g} km"
+
+    html_body = _STATUS_PAGE.render(
+        subject=html.escape(subject),
+        title=html.escape(title),
+        note=html.escape(note),
+        table=table,
+        scope=html.escape(scope),
+        poll_minutes=str(config.poll_minutes),
+    )
 
     text_body = "\n".join([title, "=" * 48, note, ""] + text_lines + ["", f"Âmbito: {scope}"])
     return Message(subject=subject, html_body=html_body, text_body=text_body)
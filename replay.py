@@ -0,0 +1,217 @@
+"""Replay an archive of upstream payloads through the pipeline, offline.
+
+Every payload FOGOS_ARCHIVE recorded goes through the same code a live
+cycle runs: parse, geofence, detect, render. Delivery goes to a dry-run
+mailer that only counts. The clock is faked from the archive timestamps,
+so first-seen times, heartbeats and durations in the emails come out as
+they would have then. A season replays in minutes.
+
+Configuration comes from the environment as usual, so a threshold change
+can be checked against real data before it goes live:
+
+    python3 replay.py /data/archive --mails > before.txt
+    FOGOS_MIN_SEVERITY=major python3 replay.py /data/archive --mails > after.txt
+    diff before.txt after.txt
+
+State is kept in a scratch directory and thrown away. SMTP and
+FOGOS_STATE_DIR are never touched, and nothing goes over the network. Like
+a fresh container, the first payload seeds the state without alerting.
+Only cycles that brought a new payload are replayed. Heartbeats and digest
+windows therefore move on at those moments rather than at every poll.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from typing import Iterator
+
+import httpx
+
+import archive
+import config as config_module
+import fogos
+import FogosPtAlerts as app
+import sources
+import subscribers as subscribers_module
+from mailer import Mailer
+from subscribers import Registry
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+# Payloads archived this close together were fetched by the same cycle.
+STEP_SECONDS = 30
+
+# Sources are served from here; the host never resolves, nothing listens.
+REPLAY_URL = "http://replay.invalid/"
+
+
+class FakeClock:
+    """Stands in for time.time and time.monotonic while installed."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    @contextmanager
+    def installed(self) -> Iterator[None]:
+        real = time.time, time.monotonic
+        time.time = time.monotonic = self.time
+        try:
+            yield
+        finally:
+            time.time, time.monotonic = real
+
+
+class ReplayMailer(Mailer):
+    """A dry-run mailer that keeps what it would have sent, instead of logging it."""
+
+    def __init__(self, name: str, clock: FakeClock, sent: list[tuple[float, str, str]], **kwargs) -> None:
+        super().__init__(dry_run=True, **kwargs)
+        self.name = name
+        self.clock = clock
+        self.sent = sent
+
+    def deliver(self, mail: EmailMessage, to: list[str] | None = None) -> None:
+        self.sent.append((self.clock.now, self.name, str(mail["Subject"])))
+
+
+def steps(payloads: list[archive.Payload]) -> Iterator[list[archive.Payload]]:
+    """The archive regrouped into the cycles that fetched it."""
+    step: list[archive.Payload] = []
+    for payload in payloads:
+        if step and (payload.at - step[0].at > STEP_SECONDS or any(p.source == payload.source for p in step)):
+            yield step
+            step = []
+        step.append(payload)
+    if step:
+        yield step
+
+
+def _timestamp(day: str | None, default: float) -> float:
+    if not day:
+        return default
+    moment = datetime.fromisoformat(day)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _environment(scratch: str, names: list[str]) -> None:
+    """Point the configuration at the archive and the scratch directory, whatever the environment says."""
+    extra = [name for name in names if name != "fogos"]
+    os.environ.update(
+        FOGOS_STATE_DIR=scratch,
+        FOGOS_DRY_RUN="true",
+        FOGOS_OUTBOX="false",
+        FOGOS_ARCHIVE="false",
+        FOGOS_ENGINE="threads",
+        FOGOS_METRICS_PORT="0",
+        FOGOS_API_URL=REPLAY_URL + "fogos",
+        FOGOS_EXTRA_SOURCES=",".join(f"{name}={REPLAY_URL}{name}" for name in extra),
+    )
+    os.environ.setdefault("EMAIL_TO", "replay@example.invalid")
+
+
+def replay(directory: str, since: float, until: float, show_mails: bool) -> int:
+    if not os.path.isdir(directory):
+        logger.error("No archive at %s", directory)
+        return 1
+    payloads = list(archive.payloads(directory, since, until))
+    if not payloads:
+        logger.error("No archived payloads in %s for that period", directory)
+        return 1
+    names = sorted({payload.source for payload in payloads})
+
+    with tempfile.TemporaryDirectory(prefix="fogos-replay-") as scratch:
+        _environment(scratch, names)
+        try:
+            cfg = config_module.load()
+            clock = FakeClock()
+            sent: list[tuple[float, str, str]] = []
+            registry = Registry(
+                [
+                    dataclasses.replace(
+                        sub,
+                        mailer=ReplayMailer(sub.name, clock, sent, config=sub.config.smtp, pool=sub.mailer.pool),
+                    )
+                    for sub in subscribers_module.load(cfg)
+                ]
+            )
+        except config_module.ConfigError as exc:
+            logger.error("Configuration error: %s", exc)
+            return 2
+
+        # Each source keeps answering with its latest body, as upstream does.
+        bodies: dict[str, bytes] = {}
+
+        def serve(request: httpx.Request) -> httpx.Response:
+            body = bodies.get(request.url.path.strip("/"))
+            return httpx.Response(200, content=body) if body is not None else httpx.Response(404)
+
+        client = httpx.Client(transport=httpx.MockTransport(serve))
+        feed = sources.Feed(cfg)
+        cycles = size = 0
+        started = time.perf_counter()
+        with clock.installed(), client:
+            for step in steps(payloads):
+                clock.now = step[0].at
+                for payload in step:
+                    bodies[payload.source] = payload.read()
+                    size += len(bodies[payload.source])
+                cycles += 1
+                try:
+                    app.run_cycle(cfg, client, registry, feed)
+                except fogos.FogosApiError as exc:
+                    logger.warning("Cycle at %s failed: %s", _iso(clock.now), exc)
+        elapsed = time.perf_counter() - started
+
+    if show_mails:
+        for at, name, subject in sent:
+            print(f"{_iso(at)}\t{name}\t{subject}")
+
+    per_subscriber = {sub.name: sum(1 for _, name, _ in sent if name == sub.name) for sub in registry.subscribers}
+    print(
+        f"Replayed {len(payloads)} payload(s), {size / (1024 * 1024):.1f} MB, in {cycles} cycle(s) "
+        f"from {_iso(payloads[0].at)} to {_iso(payloads[-1].at)}: {len(sent)} email(s) "
+        f"({', '.join(f'{name} {count}' for name, count in per_subscriber.items())}) "
+        f"in {elapsed:.1f}s, {cycles / max(elapsed, 1e-9):.0f} cycles/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _iso(at: float) -> str:
+    return datetime.fromtimestamp(at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", help="FOGOS_STATE_DIR/archive, or a copy of it")
+    parser.add_argument("--since", help="first day to replay, as YYYY-MM-DD (UTC)")
+    parser.add_argument("--until", help="day to stop before, as YYYY-MM-DD (UTC)")
+    parser.add_argument("--mails", action="store_true", help="print every email: time, subscriber, subject")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log each cycle as the live loop would")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        stream=sys.stderr,
+    )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return replay(args.archive, _timestamp(args.since, 0.0), _timestamp(args.until, float("inf")), args.mails)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
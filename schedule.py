@@ -0,0 +1,215 @@
+"""Adaptive poll interval: faster while something nearby is burning hard.
+
+With FOGOS_ADAPTIVE_POLL on, the interval between cycles follows what the
+subscribers are tracking:
+
+- hot: a tracked fire is major, has just escalated, or is within
+  FOGOS_NEAR_KM of a subscriber's centre. Polls every
+  FOGOS_POLL_FLOOR_SECONDS.
+- normal: fires are tracked, none of them hot. Polls every
+  FOGOS_POLL_MINUTES.
+- quiet: nothing is tracked, or it is winter and nothing is hot. Polls
+  every FOGOS_POLL_QUIET_MINUTES.
+
+On top of that, the scheduler learns how often upstream refreshes from when
+its payload changes. It uses Last-Modified when sent. Otherwise it takes the
+midpoint of two polls close enough together to pin the change down. Once
+the refresh period is steady, polls are moved to just after each predicted
+refresh rather than landing at random within it. They are never moved
+closer together than the floor.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import random
+import statistics
+import time
+from email.utils import parsedate_to_datetime
+
+import metrics
+from config import SEVERITY_ORDER, Config
+from subscribers import Registry
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+HOT, NORMAL, QUIET = "hot", "normal", "quiet"
+
+# November to March: fires are rare and small, and a slow poll costs nothing.
+WINTER_MONTHS = frozenset({11, 12, 1, 2, 3})
+
+# A fire that escalated keeps the loop hot this long, even if the next
+# payloads show it holding steady.
+ESCALATION_HOLD_SECONDS = 30 * 60
+
+# Refresh times remembered, and how many gaps between them it takes to trust
+# a period. The period is trusted only if most gaps are within this fraction
+# of the median, so a missed refresh (a gap twice as long) breaks it.
+CADENCE_SAMPLES = 12
+CADENCE_MIN_GAPS = 4
+CADENCE_TOLERANCE = 0.15
+
+# A change seen between two polls further apart than this says too little
+# about when upstream refreshed to learn from.
+CADENCE_RESOLUTION_SECONDS = 120
+
+# How long after a predicted refresh to poll, plus up to as much again at
+# random, so a fleet of these does not hit upstream on the same second.
+ALIGN_LAG_SECONDS = 15
+
+# Aligned polls in a row that found nothing new before the period is dropped.
+ALIGN_MISSES = 2
+
+
+class Cadence:
+    """Upstream's refresh period, learnt from the times its payload changed."""
+
+    def __init__(self) -> None:
+        self.updates: collections.deque[float] = collections.deque(maxlen=CADENCE_SAMPLES)
+
+    def observe(self, updated_at: float) -> None:
+        if self.updates and updated_at <= self.updates[-1]:
+            return
+        self.updates.append(updated_at)
+
+    def reset(self) -> None:
+        self.updates.clear()
+
+    @property
+    def period(self) -> float | None:
+        """Seconds between refreshes, or None until they have been steady for a while."""
+        times = list(self.updates)
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        if len(gaps) < CADENCE_MIN_GAPS:
+            return None
+        median = statistics.median(gaps)
+        steady = sum(1 for gap in gaps if abs(gap - median) <= median * CADENCE_TOLERANCE)
+        return median if steady * 4 >= len(gaps) * 3 else None
+
+    def next_poll(self, now: float, delay: float, floor: float) -> float | None:
+        """The delay landing just after a refresh, as close to `delay` as allows, never under `floor`."""
+        period = self.period
+        if period is None:
+            return None
+        last = self.updates[-1] + ALIGN_LAG_SECONDS
+        # The last refresh-aligned moment before the delay runs out...
+        target = last + ((now + delay - last) // period) * period
+        # ...unless that would mean polling sooner than the floor allows.
+        while target < now + floor:
+            target += period
+        return target - now
+
+
+class Scheduler:
+    """Picks the next interval from what the last cycle left behind."""
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.cadence = Cadence()
+        self.mode = NORMAL
+        self._ranks: dict[str, tuple[int, int]] = {}
+        self._escalated_at = 0.0
+        self._polled_at: float | None = None
+        self._aligned = False
+        self._misses = 0
+
+    def interval(self) -> int:
+        """Seconds until the next cycle, before jitter and failure backoff."""
+        if not self.config.adaptive_poll or self.mode == NORMAL:
+            return self.config.poll_seconds
+        if self.mode == HOT:
+            return self.config.poll_floor_seconds
+        return self.config.poll_quiet_minutes * 60
+
+    def align(self, delay: float) -> float:
+        """`delay`, moved to just after upstream's next predicted refresh once that is known."""
+        self._aligned = False
+        if not self.config.adaptive_poll:
+            return delay
+        aligned = self.cadence.next_poll(time.time(), delay, self.config.poll_floor_seconds)
+        if aligned is None:
+            return delay
+        self._aligned = True
+        return aligned + random.uniform(0, ALIGN_LAG_SECONDS)
+
+    def observe(self, registry: Registry, changed: bool, last_modified: str | None) -> None:
+        """Take in a cycle that went through: what is tracked now, and whether upstream had changed."""
+        if not self.config.adaptive_poll:
+            return
+        now = time.time()
+        if changed:
+            self._learn(now, last_modified)
+            self._misses = 0
+        elif self._aligned:
+            self._misses += 1
+            if self._misses >= ALIGN_MISSES:
+                logger.info("Upstream did not refresh when expected — relearning its cadence")
+                self.cadence.reset()
+                self._misses = 0
+        self._polled_at = now
+
+        mode, reason = self._mode(registry, now)
+        if mode != self.mode:
+            self.mode = mode
+            logger.info("Polling every %ds (%s): %s", self.interval(), mode, reason)
+        metrics.POLL_INTERVAL_SECONDS.set(self.interval())
+
+    def _learn(self, now: float, last_modified: str | None) -> None:
+        updated_at = _timestamp(last_modified)
+        if updated_at is None and self._polled_at is not None:
+            window = now - self._polled_at
+            if window <= CADENCE_RESOLUTION_SECONDS:
+                updated_at = now - window / 2
+        if updated_at is None:
+            return
+        period = self.cadence.period
+        self.cadence.observe(updated_at)
+        if period is None and self.cadence.period is not None:
+            logger.info("Upstream refreshes every %.0fs — aligning polls to it", self.cadence.period)
+
+    def _mode(self, registry: Registry, now: float) -> tuple[str, str]:
+        ranks: dict[str, tuple[int, int]] = {}
+        hot = ""
+        tracked = 0
+        for sub in registry.subscribers:
+            # What the cycle just left in memory. A subscriber whose cycle
+            # failed has none until it next loads from disk, and sits this one out.
+            st = sub.store.current
+            if st is None:
+                continue
+            for fire in st.fires.values():
+                if fire.is_cooling:
+                    continue
+                tracked += 1
+                # Ground crews come and go by the hour; a worse band or more
+                # aircraft is what marks a fire getting away.
+                rank = ranks[fire.id] = (SEVERITY_ORDER.index(fire.severity), fire.aerial)
+                previous = self._ranks.get(fire.id)
+                if previous is not None and (rank[0] > previous[0] or rank[1] > previous[1]):
+                    self._escalated_at = now
+                    hot = hot or f"fire {fire.id} escalated"
+                if fire.severity == "major":
+                    hot = hot or f"fire {fire.id} is major"
+                elif self.config.near_km and fire.distance_km is not None and fire.distance_km <= self.config.near_km:
+                    hot = hot or f"fire {fire.id} is {fire.distance_km:g} km from {sub.name}"
+        self._ranks = ranks
+
+        if hot:
+            return HOT, hot
+        if now - self._escalated_at < ESCALATION_HOLD_SECONDS:
+            return HOT, "a fire escalated in the last half hour"
+        if not tracked:
+            return QUIET, "no active fires tracked"
+        if time.localtime(now).tm_mon in WINTER_MONTHS:
+            return QUIET, f"winter, {tracked} active fire(s) tracked"
+        return NORMAL, f"{tracked} active fire(s) tracked"
+
+
+def _timestamp(http_date: str | None) -> float | None:
+    if not http_date:
+        return None
+    try:
+        return parsedate_to_datetime(http_date).timestamp()
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,194 @@
+"""Several fogos.pt feeds read as one.
+
+FOGOS_API_URL is the primary feed. Every endpoint in FOGOS_EXTRA_SOURCES is
+fetched alongside it, over the same connection pool and at the same time,
+so a cycle takes as long as the slowest feed rather than all of them added
+up. Records from every feed are merged by occurrence id: the first feed to
+report a field wins, and later ones fill in whatever it left empty, so an
+occurrence seen by two feeds becomes one Fire carrying what both know.
+
+A feed that fails is not a cycle that fails. Its last good records stand in
+for it until it recovers: dropping them would turn every occurrence only it
+reports into a RESOLVED alert. The cycle only fails as an upstream outage
+when every feed fails, or the primary does before it ever answered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import httpx
+
+import archive
+import fogos
+from config import Config
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+PRIMARY = "fogos"
+
+
+@dataclass
+class Source:
+    name: str
+    url: str
+    upstream: fogos.Upstream = field(default_factory=fogos.Upstream)
+    # The last payload this feed sent, parsed. Stands in while it is unchanged or down.
+    records: list[dict] | None = None
+    failures: int = 0
+    succeeded_at: float = 0.0
+
+
+def merge(batches: list[list[dict]]) -> list[dict]:
+    """One record per occurrence id, in first-seen order; earlier batches win per field."""
+    merged: dict[str, dict] = {}
+    copied: set[str] = set()
+    anonymous: list[dict] = []
+    for records in batches:
+        for raw in records:
+            key = fogos.occurrence_id(raw)
+            if not key:
+                anonymous.append(raw)
+                continue
+            have = merged.get(key)
+            if have is None:
+                merged[key] = raw
+                continue
+            missing = {k: v for k, v in raw.items() if have.get(k) in (None, "") and v not in (None, "")}
+            if missing:
+                # Records are cached per feed between cycles; never write into them.
+                if key not in copied:
+                    have = merged[key] = dict(have)
+                    copied.add(key)
+                have.update(missing)
+    return [*merged.values(), *anonymous]
+
+
+class Feed:
+    """Every configured source, fetched concurrently and merged. Stands where one Upstream did."""
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.sources = [Source(PRIMARY, config.api_url)] + [
+            Source(name, url) for name, url in config.extra_sources
+        ]
+        if config.archive:
+            store = archive.Archive(config.archive_dir, config.archive_days)
+            for source in self.sources:
+                source.upstream.recorder = functools.partial(store.record, source.name)
+        # Whether the primary sent a payload it had not sent before this cycle,
+        # and its Last-Modified. A payload retried after failed sends is not new.
+        self.changed = False
+        self.last_modified: str | None = None
+        self._digest: str | None = None
+
+    def commit(self) -> None:
+        for source in self.sources:
+            source.upstream.commit()
+
+    def _settle(self, results: list[list[dict] | None | Exception]) -> list[dict] | None:
+        """Merge this cycle's results, standing in cached records for unchanged or failed feeds."""
+        primary = results[0]
+        # The primary feed defines what is burning; without even a stale copy
+        # of it, a cycle would mistake everything it reports for resolved.
+        if isinstance(primary, Exception) and self.sources[0].records is None:
+            raise primary
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(results):
+            raise primary  # type: ignore[misc]
+
+        self._primary_changed(primary)
+        changed = False
+        batches: list[list[dict]] = []
+        now = time.monotonic()
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                source.failures += 1
+                if source.records is None:
+                    logger.warning("Source %s failed and has nothing to fall back on: %s", source.name, result)
+                    continue
+                logger.warning(
+                    "Source %s failed (%d in a row), using its records from %.0f min ago: %s",
+                    source.name,
+                    source.failures,
+                    (now - source.succeeded_at) / 60,
+                    result,
+                )
+            else:
+                source.failures = 0
+                source.succeeded_at = now
+                if result is not None:
+                    source.records = result
+                    changed = True
+            if source.records is not None:
+                batches.append(source.records)
+
+        if not changed:
+            upstream = self.sources[0].upstream
+            logger.info(
+                "Upstream unchanged — skipping cycle (%d not modified, %d identical, %d fetched; %s)",
+                upstream.not_modified,
+                upstream.unchanged,
+                upstream.fetched,
+                self._transferred(),
+            )
+            return None
+        if len(batches) == 1:
+            return batches[0]
+        records = merge(batches)
+        logger.info(
+            "Merged %d occurrences from %d source(s) (%s)",
+            len(records),
+            len(batches),
+            self._transferred(),
+        )
+        return records
+
+    def _primary_changed(self, result: list[dict] | None | Exception) -> None:
+        pending = self.sources[0].upstream.staged
+        self.changed = False
+        if isinstance(result, list) and pending is not None and pending[2] != self._digest:
+            self.changed = True
+            self.last_modified = pending[1]
+            self._digest = pending[2]
+
+    def _transferred(self) -> str:
+        """This cycle's body bytes across every source, as sent and as decoded."""
+        transfers = [source.upstream.transfer for source in self.sources if source.upstream.transfer is not None]
+        wire = sum(transfer.wire for transfer in transfers)
+        decoded = sum(transfer.decoded for transfer in transfers)
+        if not decoded:
+            return f"{fogos.human_bytes(wire)} on the wire"
+        saved = 1 - wire / decoded
+        return f"{fogos.human_bytes(wire)} on the wire for {fogos.human_bytes(decoded)} decoded, {saved:.0%} saved"
+
+    def fetch(self, client: httpx.Client) -> list[dict] | None:
+        """Like fogos.fetch, across every source. None when none of them changed."""
+        if len(self.sources) == 1:
+            return self._settle([self._fetch_one(client, self.sources[0])])
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="source") as pool:
+            results = list(pool.map(lambda source: self._fetch_one(client, source), self.sources))
+        return self._settle(results)
+
+    def _fetch_one(self, client: httpx.Client, source: Source) -> list[dict] | None | Exception:
+        try:
+            return fogos.fetch(self.config, client, source.upstream, source.url)
+        except fogos.FogosApiError as exc:
+            return exc
+
+    async def fetch_async(self, client: httpx.AsyncClient) -> list[dict] | None:
+        """`fetch` for the asyncio engine."""
+        results = await asyncio.gather(
+            *(fogos.fetch_async(self.config, client, source.upstream, source.url) for source in self.sources),
+            return_exceptions=True,
+        )
+        for result in results:
+            # Anything but an upstream error is a bug, and should fail the cycle as one.
+            if isinstance(result, BaseException) and not isinstance(result, fogos.FogosApiError):
+                raise result
+        return self._settle(list(results))  # type: ignore[arg-type]
@@ -9,7 +9,9 @@ from __future__ import annotations
 import json
 import logging
 import os
+import sqlite3
 import tempfile
+import threading
 import time
 from dataclasses import dataclass, field
 
@@ -19,23 +21,42 @@ logger = logging.getLogger(f"fogosptalerts.{__name__}")
 
 SCHEMA_VERSION = 2
 
+# Journal mode folds the journal back into a full snapshot once it grows past
+# either bound, which caps both replay time at startup and disk use.
+JOURNAL_MAX_BYTES = 1024 * 1024
+JOURNAL_MAX_AGE = 6 * 3600
+
 
 @dataclass
 class State:
     fires: dict[str, Fire] = field(default_factory=dict)
     first_seen: dict[str, int] = field(default_factory=dict)
     threads: dict[str, str] = field(default_factory=dict)
+    # Emails sent about each fire since it was first seen; numbers their Message-IDs.
+    mailed: dict[str, int] = field(default_factory=dict)
     last_heartbeat: int = 0
     initialized: bool = False
 
     def thread_id(self, fire_id: str, domain: str) -> str:
-        """Stable Message-ID for a fire, so mail clients group its updates."""
-        return self.threads.setdefault(fire_id, f"<fogo-{fire_id}@{domain}>")
+        """Message-ID of a fire's thread root, so mail clients group its updates.
+
+        Derived from the fire and when this sighting of it began, so the same
+        alert rebuilt after a crash gets the same root, and the outbox sends
+        it once. An occurrence id that comes back after resolving is a new
+        sighting and starts a new thread: reusing the old root would have the
+        outbox, and mail clients after it, drop the new alert as a copy of one
+        already delivered.
+        """
+        root = self.threads.get(fire_id)
+        if root is None:
+            root = self.threads[fire_id] = f"<{fire_id}.{self.first_seen[fire_id]}@{domain}>"
+        return root
 
     def prune(self, live_ids: set[str]) -> None:
         for fire_id in set(self.first_seen) - live_ids:
             self.first_seen.pop(fire_id, None)
             self.threads.pop(fire_id, None)
+            self.mailed.pop(fire_id, None)
 
 
 def load(path: str) -> State:
@@ -66,6 +87,7 @@ def load(path: str) -> State:
         fires=fires,
         first_seen={k: int(v) for k, v in (raw.get("first_seen") or {}).items()},
         threads=dict(raw.get("threads") or {}),
+        mailed={k: int(v) for k, v in (raw.get("mailed") or {}).items()},
         last_heartbeat=int(raw.get("last_heartbeat") or 0),
         initialized=bool(raw.get("initialized")),
     )
@@ -80,6 +102,7 @@ def save(path: str, state: State) -> None:
         "last_heartbeat": state.last_heartbeat,
         "first_seen": state.first_seen,
         "threads": state.threads,
+        "mailed": state.mailed,
         "fires": {fire_id: fire.to_dict() for fire_id, fire in state.fires.items()},
     }
 
@@ -98,3 +121,407 @@ def save(path: str, state: State) -> None:
     except OSError:
         os.unlink(handle.name)
         raise
+
+
+def touch(path: str) -> None:
+    """Mark the snapshot fresh without rewriting it.
+
+    Cycles that find nothing new skip the save, but the Docker healthcheck
+    reads this file's mtime as proof of life.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _stamp(path: str) -> tuple[int, int, int] | None:
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
+
+def journal_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".journal"
+
+
+def _copy(state: State) -> State:
+    # Fires are replaced each cycle, never mutated, so a shallow copy suffices.
+    return State(
+        fires=dict(state.fires),
+        first_seen=dict(state.first_seen),
+        threads=dict(state.threads),
+        mailed=dict(state.mailed),
+        last_heartbeat=state.last_heartbeat,
+        initialized=state.initialized,
+    )
+
+
+def _delta(before: State, after: State) -> dict:
+    """One journal entry turning `before` into `after`; empty if they match.
+
+    Every field is an absolute value, never an increment, so replaying an
+    entry twice — say, over a snapshot that already includes it — is harmless.
+    """
+    entry: dict = {}
+    fires = {fid: fire.to_dict() for fid, fire in after.fires.items() if before.fires.get(fid) != fire}
+    if fires:
+        entry["fires"] = fires
+    if removed := [fid for fid in before.fires if fid not in after.fires]:
+        entry["fires_removed"] = removed
+
+    for name in ("first_seen", "threads", "mailed"):
+        old, new = getattr(before, name), getattr(after, name)
+        if changed := {key: value for key, value in new.items() if old.get(key) != value}:
+            entry[name] = changed
+        if removed := [key for key in old if key not in new]:
+            entry[f"{name}_removed"] = removed
+
+    if before.last_heartbeat != after.last_heartbeat:
+        entry["last_heartbeat"] = after.last_heartbeat
+    if before.initialized != after.initialized:
+        entry["initialized"] = after.initialized
+    return entry
+
+
+def _apply(state: State, entry: dict) -> None:
+    # Decode everything before touching `state`, so a bad entry changes nothing.
+    fires = {fid: Fire.from_dict(payload) for fid, payload in (entry.get("fires") or {}).items()}
+    first_seen = {key: int(value) for key, value in (entry.get("first_seen") or {}).items()}
+    threads = {key: str(value) for key, value in (entry.get("threads") or {}).items()}
+    mailed = {key: int(value) for key, value in (entry.get("mailed") or {}).items()}
+
+    state.fires.update(fires)
+    for fid in entry.get("fires_removed") or ():
+        state.fires.pop(fid, None)
+    state.first_seen.update(first_seen)
+    for key in entry.get("first_seen_removed") or ():
+        state.first_seen.pop(key, None)
+    state.threads.update(threads)
+    for key in entry.get("threads_removed") or ():
+        state.threads.pop(key, None)
+    state.mailed.update(mailed)
+    for key in entry.get("mailed_removed") or ():
+        state.mailed.pop(key, None)
+    if "last_heartbeat" in entry:
+        state.last_heartbeat = int(entry["last_heartbeat"])
+    if "initialized" in entry:
+        state.initialized = bool(entry["initialized"])
+
+
+def _replay(path: str, state: State) -> tuple[int, int | None, bool]:
+    """Apply a journal over a snapshot: (entries applied, first entry time, clean).
+
+    Stops at the first entry that does not parse — in practice the torn tail
+    of a write a crash interrupted. That loses at most the last cycle, which
+    is no worse than crashing just before a full save.
+    """
+    applied, since = 0, None
+    try:
+        handle = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return 0, None, True
+
+    with handle:
+        for number, line in enumerate(handle, start=1):
+            try:
+                entry = json.loads(line)
+                _apply(state, entry)
+            except (ValueError, TypeError, AttributeError) as exc:
+                logger.warning("Journal %s: stopping at unreadable entry %d (%s)", path, number, exc)
+                return applied, since, False
+            applied += 1
+            since = since or int(entry.get("t") or 0) or None
+    return applied, since, True
+
+
+class Store:
+    """One state file, read once and then served from memory.
+
+    This process is the file's only writer, so re-reading it every cycle only
+    ever returns what we last wrote. A stat per cycle still catches the rare
+    hand edit or restore from backup: a changed inode, mtime or size means
+    someone else wrote it, and the next `load` picks their version up.
+
+    In journal mode a save appends only what changed since the last one, as a
+    single JSON line with a single fsync, next to the snapshot. The journal is
+    compacted into a fresh snapshot once it is JOURNAL_MAX_BYTES or
+    JOURNAL_MAX_AGE old. Stop the service before editing the snapshot by hand:
+    the journal is replayed over it.
+    """
+
+    def __init__(self, path: str, journal: bool = False) -> None:
+        self.path = path
+        self.journal = journal_path(path) if journal else None
+        self._state: State | None = None
+        self._stamp: tuple[int, int, int] | None = None
+        self._shadow = State()
+        self._journal_since = 0.0
+        self._must_compact = False
+
+    def load(self) -> State:
+        stamp = _stamp(self.path)
+        if self._state is None or stamp != self._stamp:
+            if self._state is not None:
+                logger.warning("State file %s changed on disk — reloading it", self.path)
+            state = load(self.path)
+            self._journal_since = time.time()
+            if self.journal:
+                applied, since, clean = _replay(self.journal, state)
+                if applied:
+                    logger.info("Replayed %d journal entr%s from %s", applied, "y" if applied == 1 else "ies", self.journal)
+                self._journal_since = since or self._journal_since
+                # Appending after a torn line would glue the two together and
+                # hide everything after it from the next replay.
+                self._must_compact = not clean
+            self._state = state
+            self._shadow = _copy(state)
+            self._stamp = stamp
+        return self._state
+
+    def _should_compact(self) -> bool:
+        if self._must_compact or self._stamp is None:
+            return True
+        try:
+            size = os.path.getsize(self.journal)  # type: ignore[arg-type]
+        except FileNotFoundError:
+            return False
+        return size >= JOURNAL_MAX_BYTES or time.time() - self._journal_since >= JOURNAL_MAX_AGE
+
+    def _compact(self) -> None:
+        save(self.path, self._state)  # type: ignore[arg-type]
+        # Once the snapshot is durable the journal is redundant; if we die
+        # before the unlink, replaying it over the new snapshot is a no-op.
+        try:
+            os.unlink(self.journal)  # type: ignore[arg-type]
+        except FileNotFoundError:
+            pass
+        self._journal_since = time.time()
+        self._must_compact = False
+
+    def _append(self, entry: dict) -> None:
+        entry["t"] = int(time.time())
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            with open(self.journal, "a", encoding="utf-8") as handle:  # type: ignore[arg-type]
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+        except OSError:
+            self._must_compact = True
+            raise
+        # The healthcheck watches the snapshot's mtime, not the journal's.
+        touch(self.path)
+
+    def save(self) -> None:
+        if self._state is None:
+            return
+        if self.journal is None:
+            save(self.path, self._state)
+        elif self._should_compact():
+            self._compact()
+        elif entry := _delta(self._shadow, self._state):
+            self._append(entry)
+        else:
+            touch(self.path)
+        self._shadow = _copy(self._state)
+        self._stamp = _stamp(self.path)
+
+    def touch(self) -> None:
+        touch(self.path)
+        self._stamp = _stamp(self.path)
+
+    @property
+    def current(self) -> State | None:
+        """The state in memory, without checking the disk; None until loaded, or once invalidated."""
+        return self._state
+
+    def invalidate(self) -> None:
+        """Drop the in-memory copy; the next `load` goes back to disk."""
+        self._state = None
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS fires (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS first_seen (id TEXT PRIMARY KEY, at INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS threads (id TEXT PRIMARY KEY, message_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS mailed (id TEXT PRIMARY KEY, count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS history (fire_id TEXT NOT NULL, at INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS history_fire_at ON history (fire_id, at);
+CREATE INDEX IF NOT EXISTS history_at ON history (at);
+"""
+
+
+def _encode(fire: Fire) -> str:
+    return json.dumps(fire.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteStore:
+    """The same load/save/touch/invalidate contract as Store, kept in SQLite.
+
+    Current fires, first-seen stamps, threads and email counts mirror the JSON snapshot.
+    On top, every version of a fire we persist is appended to `history`,
+    indexed by (fire_id, at), so what a fire looked like hours ago is a
+    single index lookup. Each save is one transaction holding only what
+    changed since the last one.
+
+    An empty database next to a v2 `state.json` is seeded from it on first
+    open; the JSON file is then renamed aside so it is not mistaken for live
+    state later.
+
+    With `history_days` set, versions older than that are deleted once a UTC
+    day, except each tracked fire's newest, which `as_of` still needs.
+
+    The asyncio engine loads and saves from worker threads, so the one
+    connection is shared across threads, with a lock serialising every use
+    of it.
+    """
+
+    def __init__(self, path: str, legacy_path: str | None = None, history_days: int = 0) -> None:
+        self.path = path
+        self.legacy_path = legacy_path
+        self.history_days = history_days
+        self._pruned: str | None = None
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._state: State | None = None
+        self._shadow = State()
+        self._version = -1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.executescript(_SQLITE_SCHEMA)
+            if db.execute("SELECT 1 FROM meta WHERE key = 'version'").fetchone() is None:
+                self._migrate(db)
+            self._db = db
+        return self._db
+
+    def _migrate(self, db: sqlite3.Connection) -> None:
+        legacy = None
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            legacy = load(self.legacy_path)
+        with db:
+            db.execute("INSERT INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            if legacy is not None:
+                self._write(db, State(), legacy)
+        if legacy is not None:
+            os.replace(self.legacy_path, self.legacy_path + ".migrated")  # type: ignore[arg-type]
+            logger.info(
+                "Migrated %d tracked fire(s) from %s into %s", len(legacy.fires), self.legacy_path, self.path
+            )
+
+    def _read(self, db: sqlite3.Connection) -> State:
+        meta = dict(db.execute("SELECT key, value FROM meta"))
+        fires: dict[str, Fire] = {}
+        for fire_id, data in db.execute("SELECT id, data FROM fires"):
+            try:
+                fires[fire_id] = Fire.from_dict(json.loads(data))
+            except (TypeError, ValueError) as exc:
+                logger.warning("Dropping unreadable state entry %s: %s", fire_id, exc)
+
+        logger.info("Loaded %d tracked fire(s) from %s", len(fires), self.path)
+        return State(
+            fires=fires,
+            first_seen=dict(db.execute("SELECT id, at FROM first_seen")),
+            threads=dict(db.execute("SELECT id, message_id FROM threads")),
+            mailed=dict(db.execute("SELECT id, count FROM mailed")),
+            last_heartbeat=int(meta.get("last_heartbeat") or 0),
+            initialized=meta.get("initialized") == "1",
+        )
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, before: State, after: State) -> None:
+        entry = _delta(before, after)
+        now = int(time.time())
+
+        fires = [(fid, _encode(after.fires[fid])) for fid in entry.get("fires", ())]
+        db.executemany("INSERT OR REPLACE INTO fires VALUES (?, ?)", fires)
+        db.executemany("INSERT INTO history VALUES (?, ?, ?)", [(fid, now, data) for fid, data in fires])
+        db.executemany("DELETE FROM fires WHERE id = ?", [(fid,) for fid in entry.get("fires_removed", ())])
+
+        db.executemany("INSERT OR REPLACE INTO first_seen VALUES (?, ?)", (entry.get("first_seen") or {}).items())
+        db.executemany("DELETE FROM first_seen WHERE id = ?", [(k,) for k in entry.get("first_seen_removed", ())])
+        db.executemany("INSERT OR REPLACE INTO threads VALUES (?, ?)", (entry.get("threads") or {}).items())
+        db.executemany("DELETE FROM threads WHERE id = ?", [(k,) for k in entry.get("threads_removed", ())])
+        db.executemany("INSERT OR REPLACE INTO mailed VALUES (?, ?)", (entry.get("mailed") or {}).items())
+        db.executemany("DELETE FROM mailed WHERE id = ?", [(k,) for k in entry.get("mailed_removed", ())])
+
+        meta = {"updated_at": now}
+        if "last_heartbeat" in entry:
+            meta["last_heartbeat"] = entry["last_heartbeat"]
+        if "initialized" in entry:
+            meta["initialized"] = int(entry["initialized"])
+        db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        now = time.time()
+        today = time.strftime("%Y-%m-%d", time.gmtime(now))
+        if not self.history_days or today == self._pruned:
+            return
+        deleted = db.execute(
+            "DELETE FROM history WHERE at < ? AND rowid NOT IN "
+            "(SELECT MAX(rowid) FROM history WHERE fire_id IN (SELECT id FROM fires) GROUP BY fire_id)",
+            (int(now) - self.history_days * 86400,),
+        ).rowcount
+        self._pruned = today
+        if deleted:
+            logger.info("Pruned %d fire version(s) older than %d day(s) from %s", deleted, self.history_days, self.path)
+
+    def load(self) -> State:
+        with self._lock:
+            db = self._connect()
+            # data_version moves only when another connection commits, which is
+            # this store's equivalent of a hand-edited JSON file.
+            version = db.execute("PRAGMA data_version").fetchone()[0]
+            if self._state is None or version != self._version:
+                if self._state is not None:
+                    logger.warning("State database %s changed on disk — reloading it", self.path)
+                self._state = self._read(db)
+                self._shadow = _copy(self._state)
+                self._version = version
+            return self._state
+
+    def save(self) -> None:
+        with self._lock:
+            if self._state is None:
+                return
+            db = self._connect()
+            with db:
+                self._write(db, self._shadow, self._state)
+                self._prune(db)
+            self._shadow = _copy(self._state)
+            self._version = db.execute("PRAGMA data_version").fetchone()[0]
+
+    def touch(self) -> None:
+        touch(self.path)
+
+    @property
+    def current(self) -> State | None:
+        """The state in memory, without querying the database; None until loaded, or once invalidated."""
+        return self._state
+
+    def invalidate(self) -> None:
+        """Drop the in-memory copy; the next `load` goes back to the database."""
+        self._state = None
+
+    def history(self, fire_id: str, since: int = 0) -> list[tuple[int, Fire]]:
+        """Every persisted version of a fire since `since`, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT at, data FROM history WHERE fire_id = ? AND at >= ? ORDER BY at, rowid", (fire_id, since)
+            ).fetchall()
+        return [(at, Fire.from_dict(json.loads(data))) for at, data in rows]
+
+    def as_of(self, fire_id: str, at: int) -> Fire | None:
+        """The last version of a fire persisted at or before `at`; None if there was none."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM history WHERE fire_id = ? AND at <= ? ORDER BY at DESC, rowid DESC LIMIT 1",
+                (fire_id, at),
+            ).fetchone()
+        return Fire.from_dict(json.loads(row[0])) if row else None
@@ -0,0 +1,234 @@
+"""Many watched areas served from a single upstream fetch.
+
+Without a subscribers file the service watches the one area described by the
+environment, exactly as before. With FOGOS_SUBSCRIBERS_FILE pointing at a JSON
+list, every entry gets its own centre, radius, locations, severity threshold,
+recipients and state file, and one process replaces a container per area:
+
+    [
+      {"name": "sintra", "center_lat": 38.80, "center_lon": -9.38,
+       "max_distance_km": 15, "locations": ["Colares"],
+       "min_severity": "info", "recipients": ["ana@example.com"]}
+    ]
+
+Records are routed to subscribers through a lat/lng grid, so a fire is only
+distance-checked against the areas whose bounding box can contain it.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+import fogos
+import state as state_module
+from config import SEVERITY_ORDER, Config, ConfigError, compile_locations
+from geo import ROUNDING_SLACK_KM, GridIndex, normalize, normalize_cache_info
+from mailer import AsyncSmtpPool, Mailer, SmtpPool, build_async_pool
+from outbox import Outbox
+from trends import Tracker
+
+logger = logging.getLogger(f"fogosptalerts.{__name__}")
+
+# The subscriber built from the environment keeps the original state path.
+DEFAULT_NAME = "default"
+
+# Names become directory names under FOGOS_STATE_DIR.
+_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+class DigestWindow:
+    """When the oldest event held for a subscriber's digest was first held back."""
+
+    def __init__(self) -> None:
+        self.opened: float | None = None
+
+    def holds(self, minutes: int) -> bool:
+        """Open the window if it is not already; True until `minutes` have passed since."""
+        if self.opened is None:
+            self.opened = time.monotonic()
+        return time.monotonic() - self.opened < minutes * 60
+
+    def close(self) -> None:
+        self.opened = None
+
+
+@dataclass(frozen=True)
+class Subscriber:
+    name: str
+    config: Config
+    mailer: Mailer
+    store: state_module.Store | state_module.SqliteStore
+    # In memory only: after a restart, history builds up again from scratch.
+    trends: Tracker = field(default_factory=Tracker, compare=False)
+    # In memory only too: a restart sends what was held with the next cycle.
+    digest: DigestWindow = field(default_factory=DigestWindow, compare=False)
+
+
+def _number(entry: dict, key: str, where: str, default: float = 0.0) -> float:
+    value = entry.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ConfigError(f"{where}: {key} must be a number, got {value!r}")
+    return float(value)
+
+
+def _strings(entry: dict, key: str, where: str) -> list[str]:
+    value = entry.get(key) or []
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ConfigError(f"{where}: {key} must be a list of strings")
+    return [item.strip() for item in value if item.strip()]
+
+
+def _entry_config(base: Config, entry: object, position: int) -> tuple[str, Config]:
+    """Validate one subscribers-file entry into a Config derived from `base`."""
+    where = f"{base.subscribers_file} entry {position}"
+    if not isinstance(entry, dict):
+        raise ConfigError(f"{where}: must be an object")
+
+    name = str(entry.get("name") or "").strip().casefold()
+    if not _NAME.match(name) or name == DEFAULT_NAME:
+        raise ConfigError(f"{where}: name must be lowercase letters, digits, '-' or '_', not {name!r}")
+    where = f"{base.subscribers_file} [{name}]"
+
+    locations = _strings(entry, "locations", where)
+    max_distance = _number(entry, "max_distance_km", where)
+    if max_distance <= 0 and not locations:
+        raise ConfigError(f"{where}: set max_distance_km above 0, locations, or both")
+
+    center_lat = _number(entry, "center_lat", where)
+    center_lon = _number(entry, "center_lon", where)
+    if max_distance > 0 and center_lat == 0.0 and center_lon == 0.0:
+        raise ConfigError(f"{where}: max_distance_km is set but center_lat/center_lon are not")
+    if not -90 <= center_lat <= 90 or not -180 <= center_lon <= 180:
+        raise ConfigError(f"{where}: center point out of range: ({center_lat}, {center_lon})")
+
+    min_severity = str(entry.get("min_severity") or base.min_severity).casefold()
+    if min_severity not in SEVERITY_ORDER:
+        raise ConfigError(f"{where}: min_severity must be one of {SEVERITY_ORDER}")
+
+    recipients = _strings(entry, "recipients", where)
+    if not recipients:
+        raise ConfigError(f"{where}: recipients is required")
+
+    return name, dataclasses.replace(
+        base,
+        center_lat=center_lat,
+        center_lon=center_lon,
+        max_distance_km=max_distance,
+        locations=locations,
+        locations_normalized=[normalize(loc) for loc in locations],
+        location_matcher=compile_locations(locations),
+        min_severity=min_severity,
+        heartbeat_hours=_number(entry, "heartbeat_hours", where, base.heartbeat_hours),
+        state_dir=os.path.join(base.state_dir, "subscribers", name),
+        smtp=dataclasses.replace(base.smtp, recipients=recipients),
+    )
+
+
+def _store(config: Config) -> state_module.Store | state_module.SqliteStore:
+    if config.state_backend == "sqlite":
+        return state_module.SqliteStore(
+            config.state_db_file, legacy_path=config.state_file, history_days=config.history_days
+        )
+    return state_module.Store(config.state_file, journal=config.state_journal)
+
+
+def _subscriber(name: str, config: Config, pool: SmtpPool, async_pool: AsyncSmtpPool | None) -> Subscriber:
+    return Subscriber(
+        name=name,
+        config=config,
+        mailer=Mailer(
+            config.smtp,
+            dry_run=config.dry_run,
+            pool=pool,
+            outbox=Outbox(config.outbox_dir) if config.outbox else None,
+            async_pool=async_pool,
+        ),
+        store=_store(config),
+    )
+
+
+def load(base: Config) -> list[Subscriber]:
+    """Everyone to notify: the environment's own area, plus the subscribers file."""
+    subscribers: list[Subscriber] = []
+    # Everyone mails through the same server, so they share its connections.
+    pool = SmtpPool(base.smtp, size=base.dispatch_workers)
+    async_pool = build_async_pool(base.smtp, base.dispatch_workers) if base.engine == "asyncio" else None
+    if base.engine == "asyncio" and async_pool is None and not base.dry_run:
+        logger.info("aiosmtplib is not installed — the asyncio engine will send through worker threads")
+    if (base.max_distance_km > 0 or base.locations) and base.smtp.recipients:
+        subscribers.append(_subscriber(DEFAULT_NAME, base, pool, async_pool))
+
+    if base.subscribers_file:
+        try:
+            with open(base.subscribers_file, "r", encoding="utf-8") as handle:
+                entries = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            raise ConfigError(f"Cannot read FOGOS_SUBSCRIBERS_FILE: {exc}") from exc
+        if not isinstance(entries, list):
+            raise ConfigError("FOGOS_SUBSCRIBERS_FILE must hold a JSON list")
+
+        seen = {DEFAULT_NAME}
+        for position, entry in enumerate(entries, start=1):
+            name, config = _entry_config(base, entry, position)
+            if name in seen:
+                raise ConfigError(f"{base.subscribers_file}: duplicate subscriber {name!r}")
+            seen.add(name)
+            subscribers.append(_subscriber(name, config, pool, async_pool))
+
+    if not subscribers:
+        raise ConfigError("Nothing to monitor: no subscriber has both a geofence and recipients")
+    return subscribers
+
+
+class Registry:
+    """Routes each cycle's records to the subscribers whose area they fall in."""
+
+    def __init__(self, subscribers: list[Subscriber]) -> None:
+        self.subscribers = subscribers
+        self._grid = GridIndex()
+        # Name matching ignores distance, so these see every record.
+        self._by_name = [sub for sub in subscribers if sub.config.locations_normalized]
+        for sub in subscribers:
+            if sub.config.max_distance_km > 0:
+                self._grid.add(
+                    sub,
+                    sub.config.center_lat,
+                    sub.config.center_lon,
+                    sub.config.max_distance_km + ROUNDING_SLACK_KM,
+                )
+
+    def route(self, records: list[dict]) -> dict[str, list[fogos.Fire]]:
+        buckets: dict[str, list[dict]] = {sub.name: [] for sub in self.subscribers}
+        for raw in records:
+            lat, lng = fogos.coordinates(raw)
+            near = self._grid.query(lat, lng) if lat != 0.0 or lng != 0.0 else []
+            for sub in (*near, *self._by_name):
+                bucket = buckets[sub.name]
+                if not bucket or bucket[-1] is not raw:
+                    bucket.append(raw)
+
+        routed: dict[str, list[fogos.Fire]] = {}
+        for sub in self.subscribers:
+            routed[sub.name] = fogos.select(buckets[sub.name], sub.config)
+            logger.info(
+                "%s: %d inside geofence (%d candidate(s))",
+                sub.name,
+                len(routed[sub.name]),
+                len(buckets[sub.name]),
+            )
+
+        cache = normalize_cache_info()
+        logger.debug(
+            "normalize cache: %d hits, %d misses, %d/%d entries",
+            cache.hits,
+            cache.misses,
+            cache.currsize,
+            cache.maxsize,
+        )
+        return routed
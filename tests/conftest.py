@@ -0,0 +1,60 @@
+"""Shared fixtures. Run from the repository root: python3 -m pytest tests"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+from fogos import Fire
+
+
+@pytest.fixture
+def environment(tmp_path, monkeypatch):
+    """A dry-run configuration watching Lisbon, with its state in a scratch directory."""
+    for key in list(os.environ):
+        if key.startswith(("FOGOS_", "SMTP_", "EMAIL_")):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("EMAIL_TO", "alerts@example.com")
+    monkeypatch.setenv("FOGOS_DRY_RUN", "true")
+    monkeypatch.setenv("FOGOS_CENTER_LAT", "38.72")
+    monkeypatch.setenv("FOGOS_CENTER_LON", "-9.14")
+    monkeypatch.setenv("FOGOS_MAX_DISTANCE_KM", "30")
+    monkeypatch.setenv("FOGOS_STATE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def fire():
+    """Builds a Fire near the centre; keyword arguments override its fields."""
+
+    def build(fire_id: str = "2025010100001", **overrides) -> Fire:
+        fields = {
+            "id": fire_id,
+            "started_at": 1735689600,
+            "status": "Em Curso",
+            "status_code": 5,
+            "district": "Lisboa",
+            "concelho": "Sintra",
+            "freguesia": "Colares",
+            "detail_location": "",
+            "natureza": "Mato",
+            "lat": 38.80,
+            "lng": -9.38,
+            "distance_km": 22.5,
+            "bearing": "NO",
+            "man": 10,
+            "terrain": 3,
+            "aerial": 0,
+            "aquatic": 0,
+            "important": False,
+            "matched_by": "radius",
+        }
+        fields.update(overrides)
+        return Fire(**fields)
+
+    return build
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+import time
+
+import archive
+
+DAY = 86400
+
+
+def test_days_past_the_retention_are_pruned(tmp_path, monkeypatch):
+    now = time.time()
+    days = [time.strftime("%Y-%m-%d", time.gmtime(now - back * DAY)) for back in (10, 8, 7, 1)]
+    for day in days:
+        os.makedirs(tmp_path / day)
+        (tmp_path / day / "20250101T000000.000Z-fogos.json.gz").write_bytes(b"")
+    (tmp_path / "notes").mkdir()
+
+    monkeypatch.setattr(time, "time", lambda: now)
+    store = archive.Archive(str(tmp_path), keep_days=7)
+    store.record("fogos", [b'{"success": true, "data": []}'], "digest")
+
+    today = time.strftime("%Y-%m-%d", time.gmtime(now))
+    assert sorted(os.listdir(tmp_path)) == sorted([*days[2:], today, "notes"])
+    assert list(archive.payloads(str(tmp_path)))[-1].read() == b'{"success": true, "data": []}'
+
+
+def test_zero_days_keeps_everything(tmp_path):
+    old = time.strftime("%Y-%m-%d", time.gmtime(time.time() - 400 * DAY))
+    os.makedirs(tmp_path / old)
+    archive.Archive(str(tmp_path), keep_days=0).record("fogos", [b"{}"], "digest")
+    assert old in os.listdir(tmp_path)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+import config
+
+
+def test_slow_poll_without_adaptive_polling_still_loads(environment, monkeypatch):
+    # A configuration from before adaptive polling: the new bounds must not apply to it.
+    monkeypatch.setenv("FOGOS_POLL_MINUTES", "15")
+    cfg = config.load()
+    assert cfg.poll_minutes == 15
+    assert cfg.poll_quiet_minutes == 15
+
+
+def test_floor_out_of_range_is_ignored_without_adaptive_polling(environment, monkeypatch):
+    monkeypatch.setenv("FOGOS_POLL_FLOOR_SECONDS", "5")
+    assert config.load().poll_floor_seconds == 5
+
+
+def test_adaptive_polling_validates_its_bounds(environment, monkeypatch):
+    monkeypatch.setenv("FOGOS_ADAPTIVE_POLL", "true")
+    monkeypatch.setenv("FOGOS_POLL_MINUTES", "15")
+    assert config.load().poll_quiet_minutes == 15
+    monkeypatch.setenv("FOGOS_POLL_QUIET_MINUTES", "10")
+    with pytest.raises(config.ConfigError, match="FOGOS_POLL_QUIET_MINUTES"):
+        config.load()
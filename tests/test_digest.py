@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import config
+import FogosPtAlerts as app
+import subscribers
+
+MINUTE = 60
+
+
+@pytest.fixture
+def digest(environment, monkeypatch):
+    """A subscriber collecting a 60-minute digest, its sent subjects, and a clock to move."""
+    monkeypatch.setenv("FOGOS_OUTBOX", "false")
+    monkeypatch.setenv("FOGOS_DIGEST", "true")
+    monkeypatch.setenv("FOGOS_DIGEST_MINUTES", "60")
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    sub = subscribers.load(config.load())[0]
+    subjects: list[str] = []
+    monkeypatch.setattr(sub.mailer, "deliver", lambda mail, to=None: subjects.append(str(mail["Subject"])))
+
+    def advance(minutes: float) -> None:
+        clock[0] += minutes * MINUTE
+
+    app._process(sub, [])
+    subjects.clear()
+    return sub, subjects, advance
+
+
+def test_events_are_held_until_the_window_closes(digest, fire):
+    sub, subjects, advance = digest
+
+    assert app._process(sub, [fire("1")]) is False
+    advance(30)
+    assert app._process(sub, [fire("1"), fire("2", concelho="Mafra")]) is False
+    assert subjects == []
+    assert sub.store.load().fires == {}
+
+    advance(31)
+    assert app._process(sub, [fire("1"), fire("2", concelho="Mafra")]) is True
+    assert len(subjects) == 1
+    assert "2 alterações" in subjects[0]
+    assert set(sub.store.load().fires) == {"1", "2"}
+    assert sub.digest.opened is None
+
+
+def test_window_opens_at_the_first_held_event(digest, fire):
+    sub, subjects, advance = digest
+
+    # Quiet cycles before anything happens do not count towards the window.
+    advance(90)
+    app._process(sub, [])
+    app._process(sub, [fire("1")])
+    advance(59)
+    app._process(sub, [fire("1")])
+    assert subjects == []
+    advance(1)
+    app._process(sub, [fire("1")])
+    assert len(subjects) == 1
+
+
+def test_new_major_fire_bypasses_the_digest(digest, fire):
+    sub, subjects, advance = digest
+
+    app._process(sub, [fire("1"), fire("2", man=80, aerial=3)])
+    assert len(subjects) == 1
+    assert "NOVO INCÊNDIO" in subjects[0]
+    # The major fire is tracked at once; the other still waits for the digest.
+    assert set(sub.store.load().fires) == {"2"}
+
+    advance(61)
+    app._process(sub, [fire("1"), fire("2", man=80, aerial=3)])
+    assert len(subjects) == 2
+    assert set(sub.store.load().fires) == {"1", "2"}
+
+
+def test_each_subscriber_keeps_its_own_window(digest, environment, monkeypatch, fire):
+    _, _, advance = digest
+    areas = environment / "subscribers.json"
+    areas.write_text(
+        '[{"name": "mafra", "center_lat": 38.72, "center_lon": -9.14, "max_distance_km": 30,'
+        ' "recipients": ["mafra@example.com"]}]'
+    )
+    monkeypatch.setenv("FOGOS_SUBSCRIBERS_FILE", str(areas))
+    default, mafra = subscribers.load(config.load())
+    subjects: dict[str, list[str]] = {default.name: [], mafra.name: []}
+    for sub in (default, mafra):
+        sink = subjects[sub.name]
+        monkeypatch.setattr(sub.mailer, "deliver", lambda mail, to=None, sink=sink: sink.append(str(mail["Subject"])))
+        app._process(sub, [])
+
+    app._process(default, [fire("1")])
+    advance(50)
+    app._process(mafra, [fire("1")])
+    advance(15)
+    for sub in (default, mafra):
+        app._process(sub, [fire("1")])
+
+    # The default area's window has closed; Mafra's has 45 minutes to go.
+    assert ["1 alteração" in subject for subject in subjects[default.name]] == [True]
+    assert ["Monitorização iniciada" in subject for subject in subjects[mafra.name]] == [True]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import httpx
+
+import config
+import FogosPtAlerts as app
+import outbox
+import sources
+import state
+import subscribers
+from subscribers import Registry
+
+
+def _payload(*records: dict) -> bytes:
+    return json.dumps({"success": True, "data": list(records)}).encode("utf-8")
+
+
+def _record(man: int) -> dict:
+    return {
+        "id": "2025080100001",
+        "lat": "38.80",
+        "lng": "-9.38",
+        "status": "Em Curso",
+        "statusCode": 5,
+        "district": "Lisboa",
+        "concelho": "Sintra",
+        "freguesia": "Colares",
+        "man": man,
+        "terrain": 3,
+        "aerial": 0,
+    }
+
+
+def test_asyncio_engine_persists_sqlite_state(environment, monkeypatch):
+    monkeypatch.setenv("FOGOS_ENGINE", "asyncio")
+    monkeypatch.setenv("FOGOS_STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("FOGOS_OUTBOX", "false")
+    cfg = config.load()
+    registry = Registry(subscribers.load(cfg))
+    sub = registry.subscribers[0]
+    subjects: list[str] = []
+    monkeypatch.setattr(sub.mailer, "deliver", lambda mail, to=None: subjects.append(str(mail["Subject"])))
+
+    bodies = [_payload(), _payload(_record(10)), _payload(_record(40)), _payload(_record(40))]
+    served: list[bytes] = []
+
+    async def run() -> None:
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=served[-1]))
+        async with httpx.AsyncClient(transport=transport) as client:
+            feed = sources.Feed(cfg)
+            for body in bodies:
+                served.append(body)
+                await app.run_cycle_async(cfg, client, registry, feed)
+
+    asyncio.run(run())
+
+    assert len(subjects) == 3, subjects
+    assert "Monitorização iniciada" in subjects[0]
+    saved = state.SqliteStore(cfg.state_db_file).load()
+    assert saved.initialized
+    assert saved.fires["2025080100001"].man == 40
+
+
+def _delivered(environment, monkeypatch, engine: str) -> list[tuple[str, str]]:
+    """What each engine delivers through the outbox for the same run of payloads."""
+    monkeypatch.setenv("FOGOS_ENGINE", engine)
+    monkeypatch.setenv("FOGOS_OUTBOX", "true")
+    monkeypatch.setenv("FOGOS_STATE_DIR", str(environment / engine))
+    monkeypatch.setattr(time, "time", lambda: 1_750_000_000.0)
+    cfg = config.load()
+    registry = Registry(subscribers.load(cfg))
+    sub = registry.subscribers[0]
+    sent: list[tuple[str, str]] = []
+    monkeypatch.setattr(
+        sub.mailer, "deliver", lambda mail, to=None: sent.append((str(mail["Subject"]), str(mail["Message-ID"])))
+    )
+    bodies = [_payload(), _payload(_record(10)), _payload(_record(40), {**_record(3), "id": "2025080100002"}), _payload()]
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=served[-1]))
+    served: list[bytes] = []
+    feed = sources.Feed(cfg)
+
+    if engine == "threads":
+        courier = outbox.Courier([sub.mailer])
+        with httpx.Client(transport=transport) as client:
+            for body in bodies:
+                served.append(body)
+                app.run_cycle(cfg, client, registry, feed)
+                courier.flush()
+        return sent
+
+    async def run() -> None:
+        courier = outbox.AsyncCourier([sub.mailer])
+        async with httpx.AsyncClient(transport=transport) as client:
+            for body in bodies:
+                served.append(body)
+                await app.run_cycle_async(cfg, client, registry, feed)
+                await courier.flush()
+
+    asyncio.run(run())
+    return sent
+
+
+def test_both_engines_send_the_same_emails(environment, monkeypatch):
+    threads = _delivered(environment, monkeypatch, "threads")
+    tasks = _delivered(environment, monkeypatch, "asyncio")
+    assert len(threads) == 6, threads
+    # The startup summary alone has a random Message-ID.
+    assert [subject for subject, _ in tasks] == [subject for subject, _ in threads]
+    assert tasks[1:] == threads[1:]
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+
+import httpx
+import pytest
+
+import config
+import fogos
+import geo
+import jsonstream
+
+BODY = json.dumps(
+    {"data": [{"id": "2025080100001", "lat": "38.80", "lng": "-9.38", "kml": "<Polygon/>"}], "success": True}
+).encode("utf-8")
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Counts the streaming parser's runs."""
+    runs: list[int] = []
+    payload = jsonstream.Payload
+
+    def counted(*args, **kwargs) -> jsonstream.Payload:
+        runs.append(1)
+        return payload(*args, **kwargs)
+
+    monkeypatch.setattr(jsonstream, "Payload", counted)
+    return runs
+
+
+def test_identical_body_is_not_parsed(environment, scans):
+    cfg = config.load()
+    upstream = fogos.Upstream()
+    recorded: list[str] = []
+    upstream.recorder = lambda chunks, digest: recorded.append(digest)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+
+    with httpx.Client(transport=transport) as client:
+        assert fogos.fetch(cfg, client, upstream) == [{"id": "2025080100001", "lat": "38.80", "lng": "-9.38"}]
+        upstream.commit()
+        assert fogos.fetch(cfg, client, upstream) is None
+
+    assert len(scans) == 1
+    assert len(recorded) == 1
+    assert (upstream.fetched, upstream.unchanged) == (2, 1)
+
+
+def test_identical_body_is_not_parsed_over_an_async_client(environment, scans):
+    cfg = config.load()
+    upstream = fogos.Upstream()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+
+    async def fetch_twice() -> list[list[dict] | None]:
+        async with httpx.AsyncClient(transport=transport) as client:
+            first = await fogos.fetch_async(cfg, client, upstream)
+            upstream.commit()
+            return [first, await fogos.fetch_async(cfg, client, upstream)]
+
+    first, second = asyncio.run(fetch_twice())
+    assert first and second is None
+    assert len(scans) == 1
+
+
+def test_uncommitted_body_is_parsed_again(environment, scans):
+    # A cycle whose emails failed never commits, so the same body must be processed again.
+    cfg = config.load()
+    upstream = fogos.Upstream()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+
+    with httpx.Client(transport=transport) as client:
+        assert fogos.fetch(cfg, client, upstream)
+        assert fogos.fetch(cfg, client, upstream)
+
+    assert len(scans) == 2
+
+
+PLACES = ["Sintra", "SINTRA", "Óbidos", "obidos", "São João da Talha", "Sao Joao", "Lisboa", "Mafra", "Vila Nova", ""]
+
+
+def _records(count: int, seed: int = 11) -> list[dict]:
+    """Records scattered around the centre, thick at the edge of the radius, with assorted place names."""
+    rng = random.Random(seed)
+    records = []
+    for index in range(count):
+        bearing = rng.uniform(0, 2 * math.pi)
+        # Half of them within a few metres of the 30 km edge, where rounding decides.
+        km = 30 + rng.uniform(-0.02, 0.02) if index % 2 else rng.uniform(0, 120)
+        lat = 38.72 + math.degrees(km * math.cos(bearing) / geo.EARTH_RADIUS_KM)
+        lng = -9.14 + math.degrees(km * math.sin(bearing) / geo.EARTH_RADIUS_KM / math.cos(math.radians(38.72)))
+        record = {"id": f"2025080{index:06d}", "lat": str(lat), "lng": str(lng)}
+        if index % 7 == 0:
+            record["lat"] = record["lng"] = "0"
+        for key in fogos.LOCATION_KEYS:
+            if rng.random() < 0.6:
+                record[key] = rng.choice(PLACES)
+        records.append(record)
+    # Due north and south the box is tight: these round to 30.00 km from up to 5 m outside.
+    for index, metres in enumerate(range(-6, 7)):
+        for sign in (1, -1):
+            lat = 38.72 + sign * math.degrees((30 + metres / 1000) / geo.EARTH_RADIUS_KM)
+            records.append({"id": f"2025090{index:03d}{sign + 1}", "lat": repr(lat), "lng": "-9.14"})
+    return records
+
+
+def _full_match(records: list[dict], cfg: config.Config) -> list[fogos.Fire]:
+    """select() as it would be with no prefilter: every record goes through the exact check."""
+    fires = []
+    for raw in records:
+        lat, lng = fogos.coordinates(raw)
+        located = (lat, lng) != (0.0, 0.0)
+        distance = geo.haversine_km(cfg.center_lat, cfg.center_lon, lat, lng) if located else None
+        bearing = geo.bearing_label(cfg.center_lat, cfg.center_lon, lat, lng) if located else None
+        fire = fogos._build(raw, cfg, lat, lng, distance, bearing)
+        if fire and fire.id:
+            fires.append(fire)
+    return fires
+
+
+@pytest.mark.parametrize(
+    "radius, locations",
+    [
+        ("30", ""),
+        ("30", "Óbidos,sao joao"),
+        ("0", "Sintra,Vila Nova"),
+        # A location with the joint in it can only match across fields.
+        ("0", "lisboa | sintra,mafra"),
+        ("30", "sintra | colares"),
+    ],
+)
+def test_prefilter_never_rejects_what_the_full_match_accepts(environment, monkeypatch, radius, locations):
+    monkeypatch.setenv("FOGOS_MAX_DISTANCE_KM", radius)
+    monkeypatch.setenv("FOGOS_LOCATIONS", locations)
+    fogos._prefilter.cache_clear()
+    cfg = config.load()
+    records = _records(3000)
+
+    accepted = _full_match(records, cfg)
+    assert accepted, "the sample should match something"
+    prefilter = fogos._prefilter(cfg.center_lat, cfg.center_lon, cfg.max_distance_km, cfg.location_matcher)
+    kept = {fire.id for fire in accepted}
+    rejected = [raw for raw in records if raw["id"] in kept and not prefilter.admits(raw, *fogos.coordinates(raw))]
+    assert rejected == []
+    assert fogos.select(records, cfg) == accepted
+
+
+def test_pipe_location_matching_across_fields_is_kept(environment, monkeypatch):
+    monkeypatch.setenv("FOGOS_MAX_DISTANCE_KM", "0")
+    monkeypatch.setenv("FOGOS_LOCATIONS", "lisboa | sintra")
+    fogos._prefilter.cache_clear()
+    cfg = config.load()
+    record = {"id": "2025080100001", "district": "Lisboa", "concelho": "Sintra", "lat": "40.0", "lng": "-8.0"}
+
+    assert [fire.matched_by for fire in fogos.select([record], cfg)] == ["location:lisboa | sintra"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+import geo
+
+LISBON = (38.7223, -9.1393)
+
+
+def _scattered(count: int, seed: int = 7) -> tuple[list[float], list[float]]:
+    """Points from across Portugal out to the antipodes, poles and antimeridian included."""
+    rng = random.Random(seed)
+    lats = [rng.uniform(36.8, 42.2) for _ in range(count // 2)] + [rng.uniform(-90, 90) for _ in range(count // 2)]
+    lons = [rng.uniform(-9.6, -6.1) for _ in range(count // 2)] + [rng.uniform(-180, 180) for _ in range(count // 2)]
+    return lats + [90.0, -90.0, 0.0, -LISBON[0], *LISBON[:1]], lons + [0.0, 0.0, 180.0, 180 + LISBON[1], LISBON[1]]
+
+
+def _ties(lat: float, lon: float) -> tuple[list[float], list[float]]:
+    """Points whose distance lands on a .xx5 km rounding tie, and whose bearing sits on an octant boundary."""
+    lats: list[float] = []
+    lons: list[float] = []
+    # Along the meridian the distance is R * dphi, so pick dphi to put it on a tie.
+    for hundredths in range(1, 4000, 37):
+        dphi = (hundredths + 0.5) / 100 / geo.EARTH_RADIUS_KM
+        lats.append(math.degrees(math.radians(lat) + dphi))
+        lons.append(lon)
+    # At the equator, over a few hundred metres, the bearing is the plane angle.
+    for octant in range(8):
+        angle = math.radians(22.5 + 45 * octant)
+        lats.append(1e-3 * math.cos(angle))
+        lons.append(1e-3 * math.sin(angle))
+    return lats, lons
+
+
+def _scalar(lat: float, lon: float, lats: list[float], lons: list[float]) -> tuple[list[float], list[str]]:
+    return (
+        [geo.haversine_km(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)],
+        [geo.bearing_label(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)],
+    )
+
+
+def test_ties_are_actually_on_a_rounding_boundary():
+    lats, _ = _ties(*LISBON)
+    raw = [geo.EARTH_RADIUS_KM * (math.radians(lat2) - math.radians(LISBON[0])) * 100 for lat2 in lats[:-8]]
+    assert all(abs(value - math.floor(value) - 0.5) < 1e-6 for value in raw)
+
+
+@pytest.mark.parametrize("origin", [LISBON, (0.0, 0.0), (-33.9, 151.2), (89.9, 179.9)])
+def test_python_batch_is_bit_identical_to_the_scalar_functions(origin):
+    for lats, lons in (_scattered(400), _ties(*origin)):
+        assert geo._batch_python(*origin, lats, lons) == _scalar(*origin, lats, lons)
+
+
+@pytest.mark.parametrize("origin", [LISBON, (0.0, 0.0), (-33.9, 151.2), (89.9, 179.9)])
+def test_numpy_batch_equals_the_scalar_functions(origin):
+    pytest.importorskip("numpy")
+    for lats, lons in (_scattered(4000), _ties(*origin)):
+        assert geo._batch_numpy(*origin, lats, lons) == _scalar(*origin, lats, lons)
+
+
+def test_numpy_fallback_for_ties_is_the_scalar_path(monkeypatch):
+    pytest.importorskip("numpy")
+    # Everything counts as a tie, so every element takes the scalar path.
+    monkeypatch.setattr(geo, "_TIE_TOLERANCE", 1.0)
+    lats, lons = _scattered(200)
+    assert geo._batch_numpy(*LISBON, lats, lons) == _scalar(*LISBON, lats, lons)
+
+
+@pytest.mark.parametrize("count", [0, 1, geo.NUMPY_MIN_BATCH - 1, geo.NUMPY_MIN_BATCH, 1000])
+def test_batch_dispatch_equals_the_scalar_functions(count):
+    lats, lons = _scattered(count)
+    lats, lons = lats[:count], lons[:count]
+    assert geo.haversine_bearing_batch(*LISBON, lats, lons) == _scalar(*LISBON, lats, lons)
+
+
+def _naive(names: list[tuple[str, str]], text: str) -> str | None:
+    return next((label for pattern, label in names if pattern in text), None)
+
+
+def test_location_matcher_agrees_with_substring_search():
+    # A two-letter alphabet makes overlapping, nested and repeated names common.
+    rng = random.Random(3)
+    for _ in range(500):
+        names = [("".join(rng.choices("ab", k=rng.randint(1, 5))), f"label{i}") for i in range(rng.randint(1, 8))]
+        matcher = geo.LocationMatcher(names)
+        for _ in range(20):
+            text = "".join(rng.choices("ab |", k=rng.randint(0, 30)))
+            assert matcher.find(text) == _naive(names, text), (names, text)
+            assert (matcher.find(text) is not None) == any(pattern in text for pattern, _ in names)
+
+
+def test_location_matcher_returns_the_first_configured_label():
+    names = [("sintra", "Sintra"), ("colares", "Colares"), ("sintra", "SINTRA"), ("lisboa | sintra", "Lisboa | Sintra")]
+    matcher = geo.LocationMatcher(names)
+    # Colares ends first in the text, but Sintra was configured first.
+    assert matcher.find("colares | lisboa | sintra") == "Sintra"
+    assert matcher.find("lisboa | colares") == "Colares"
+    assert matcher.find("lisboa | sintr") is None
+
+
+def test_location_matcher_with_real_place_names():
+    places = ["Óbidos", "São João da Talha", "Vila Nova de Gaia", "Gaia", "Nova", "Sintra", "Mafra"]
+    names = [(geo.normalize(place), place) for place in places]
+    matcher = geo.LocationMatcher(names)
+    for text in ["vila nova de gaia | porto", "s. joao da talha", "sao joao da talha | loures", "obidos", "", "gaia"]:
+        haystack = geo.normalize(text)
+        assert matcher.find(haystack) == _naive(names, haystack), text
+
+
+def test_empty_location_matcher_matches_nothing():
+    assert not geo.LocationMatcher([])
+    assert geo.LocationMatcher([]).find("sintra") is None
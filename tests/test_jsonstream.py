@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import jsonstream
+
+FIELDS = frozenset({"id", "name", "lat", "man"})
+
+DOCUMENT = {
+    "data": [
+        {
+            "id": "2025010100001",
+            "name": 'Vila "Velha" \\ São \u00e9\u00e7 \U0001f525 \t',
+            "lat": -38.71234e0,
+            "man": 12,
+            "kml": '<Polygon><coordinates>-9.1,38.7 "quoted" \\</coordinates></Polygon>',
+            "geometry": {"rings": [[[-9.1, 38.7], [-9.2, 38.8]], [[-9.3, 38.9], [{"nested": ["[", "]", "{"]}]]]},
+        },
+        {"id": "2025010100002", "lat": 39.5, "man": 0, "history": [], "extra": {}},
+        {},
+        "not an object",
+    ],
+    "success": True,
+}
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def _scan(chunks: list[str]) -> tuple[list[object], jsonstream.Payload]:
+    payload = jsonstream.Payload(chunks, "data", FIELDS)
+    return list(payload.records()), payload
+
+
+def _expected(text: str) -> list[object]:
+    """What json.loads makes of the records, cut down to FIELDS."""
+    return [
+        {key: value for key, value in record.items() if key in FIELDS} if isinstance(record, dict) else record
+        for record in json.loads(text)["data"]
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 10_000])
+def test_records_match_json_loads_at_every_chunk_size(size):
+    text = json.dumps(DOCUMENT)
+    records, payload = _scan(_chunks(text, size))
+    assert records == _expected(text)
+    assert payload.meta == {"success": True}
+    assert payload.has_array
+
+
+def test_every_split_point_inside_strings_escapes_and_numbers():
+    # Unindented ASCII escapes put \" \\ \uXXXX and surrogate pairs right next
+    # to a split, and -38.71234 lets the split fall between any two digits.
+    text = json.dumps(DOCUMENT, ensure_ascii=True)
+    for split in range(1, len(text)):
+        records, _ = _scan([text[:split], text[split:]])
+        assert records == _expected(text), split
+
+
+def test_a_number_cut_by_the_boundary_is_not_taken_as_complete():
+    records, _ = _scan(['{"data": [{"man": 1', '23, "lat": 38.', '5}]}'])
+    assert records == [{"man": 123, "lat": 38.5}]
+
+
+def test_success_after_data_is_read_once_the_records_are():
+    text = '{"data": [{"id": "1", "kml": [[1, 2], [3, 4]]}], "success": false, "total": 1}'
+    payload = jsonstream.Payload(_chunks(text, 4), "data", FIELDS)
+    records = payload.records()
+    assert next(records) == {"id": "1"}
+    assert payload.meta == {}
+    assert list(records) == []
+    assert payload.meta == {"success": False, "total": 1}
+
+
+def test_success_before_data_is_read_first():
+    payload = jsonstream.Payload(['{"success": true, "data": []}'], "data", FIELDS)
+    assert list(payload.records()) == []
+    assert payload.meta == {"success": True}
+    assert payload.has_array
+
+
+def test_a_data_member_that_is_not_an_array_is_kept_as_meta():
+    records, payload = _scan(['{"data": null, "success": false}'])
+    assert records == []
+    assert payload.meta == {"data": None, "success": False}
+    assert not payload.has_array
+
+
+@pytest.mark.parametrize("cut", [1, 10, 40, 120, -20, -2, -1])
+def test_a_truncated_document_raises_value_error(cut):
+    text = json.dumps(DOCUMENT)
+    with pytest.raises(ValueError):
+        _scan(_chunks(text[:cut], 16))
+
+
+def test_a_malformed_document_raises_value_error():
+    with pytest.raises(ValueError):
+        _scan(['["data"]'])
+    with pytest.raises(ValueError):
+        _scan(['{"data": [{"id": "1" "man": 2}]}'])
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+import config
+import FogosPtAlerts as app
+import outbox
+import subscribers
+
+
+@pytest.fixture
+def queued(environment, monkeypatch):
+    """A fresh outbox subscriber, a way to restart it from disk, what it delivered, and a clock to move."""
+    monkeypatch.setenv("FOGOS_OUTBOX", "true")
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    sent: list[tuple[str, str]] = []
+
+    def start() -> tuple[subscribers.Subscriber, outbox.Courier]:
+        sub = subscribers.load(config.load())[0]
+        monkeypatch.setattr(
+            sub.mailer, "deliver", lambda mail, to=None: sent.append((str(mail["Subject"]), str(mail["Message-ID"])))
+        )
+        return sub, outbox.Courier([sub.mailer])
+
+    def advance(minutes: float) -> None:
+        clock[0] += minutes * 60
+
+    return start, sent, advance
+
+
+def test_fire_that_reappears_after_resolving_is_alerted_again(queued, fire):
+    start, sent, advance = queued
+    sub, courier = start()
+
+    for fires in ([], [fire()], [], [fire()]):
+        app._process(sub, fires)
+        courier.flush()
+        advance(5)
+
+    assert len(sent) == 4, sent
+    (_, first_root), (_, second_root) = sent[1], sent[3]
+    assert first_root != second_root
+    assert not sub.mailer.outbox.pending()
+
+
+def _crash(monkeypatch, sub: subscribers.Subscriber, fires: list) -> None:
+    """Process `fires` and die after queuing, before the state is saved."""
+    with monkeypatch.context() as patched:
+        patched.setattr(app, "_settle", lambda *args: (_ for _ in ()).throw(SystemExit("crash")))
+        with pytest.raises(SystemExit):
+            app._process(sub, fires)
+
+
+@pytest.mark.parametrize("before, after", [([], [{}]), ([{}], [{"aerial": 2}])])
+def test_an_email_rebuilt_after_a_crash_is_sent_once(queued, monkeypatch, fire, before, after):
+    start, sent, advance = queued
+    sub, courier = start()
+    app._process(sub, [])
+    for overrides in before:
+        app._process(sub, [fire(**overrides)])
+    courier.flush()
+    advance(5)
+    sent.clear()
+
+    fires = [fire(**overrides) for overrides in after]
+    _crash(monkeypatch, sub, fires)
+    assert len(sub.mailer.outbox.pending()) == 1
+
+    # The restarted service finds the event again, the same as before the crash.
+    sub, courier = start()
+    advance(5)
+    app._process(sub, fires)
+    assert len(sub.mailer.outbox.pending()) == 1
+    courier.flush()
+    assert len(sent) == 1, sent
+
+    # Once delivered, the ledger still knows it.
+    _crash(monkeypatch, sub, fires)
+    sub, courier = start()
+    app._process(sub, fires)
+    courier.flush()
+    assert len(sent) == 1, sent
+
+
+def test_a_change_that_recurs_is_a_new_email(queued, fire):
+    start, sent, advance = queued
+    sub, courier = start()
+    app._process(sub, [])
+
+    # Aircraft arrive, leave and arrive again: the first and last updates read the same.
+    for aerial in (0, 2, 0, 2):
+        app._process(sub, [fire(aerial=aerial)])
+        courier.flush()
+        advance(5)
+
+    assert len(sent) == 5, sent
+    assert len({message_id for _, message_id in sent}) == 5
+
+
+def test_an_email_out_of_attempts_is_moved_aside(queued, monkeypatch, fire, caplog):
+    start, _, advance = queued
+    monkeypatch.setattr(outbox, "MAX_ATTEMPTS", 3)
+    sub, courier = start()
+    app._process(sub, [])
+    courier.flush()
+
+    def reject(mail, to=None):
+        raise app.MailError("550 rejected")
+
+    monkeypatch.setattr(sub.mailer, "deliver", reject)
+    app._process(sub, [fire()])
+    for _ in range(outbox.MAX_ATTEMPTS):
+        courier.flush()
+        advance(outbox.BACKOFF_MAX * 2 / 60)
+
+    assert sub.mailer.outbox.pending() == []
+    [failed] = os.listdir(sub.mailer.outbox.failed_directory)
+    with open(os.path.join(sub.mailer.outbox.failed_directory, failed), encoding="utf-8") as handle:
+        assert json.load(handle)["attempts"] == outbox.MAX_ATTEMPTS
+    assert "Giving up" in caplog.text
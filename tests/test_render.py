@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+import render
+
+SOURCE = "<td style='{{style}}'>{{value}}</td>{{value}}<b>{{label}}</b>"
+VALUES = {"style": "color:red;", "value": "42", "label": "Operacionais"}
+
+
+def _substituted(source: str, values: dict[str, str]) -> str:
+    return render._SLOT.sub(lambda match: values[match.group(1)], source)
+
+
+@pytest.mark.parametrize("source", [SOURCE, "{{value}}", "no slots at all", "", "{{style}}{{value}}{{label}}"])
+def test_template_renders_as_plain_substitution(source):
+    values = {name: value for name, value in VALUES.items() if "{{" + name + "}}" in source}
+    assert render._Template.parse(source).render(**values) == _substituted(source, values)
+
+
+def test_partial_fills_some_slots_and_keeps_the_rest():
+    template = render._Template.parse(SOURCE).partial(label="Aéreos", value="7")
+    filled = {"label": "Aéreos", "value": "7"}
+    assert template.render(style="opacity:0.45;") == _substituted(SOURCE, {**filled, "style": "opacity:0.45;"})
+    assert template.partial(style="").render() == _substituted(SOURCE, {**filled, "style": ""})
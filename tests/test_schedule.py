@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+
+import config
+import FogosPtAlerts as app
+import schedule
+import subscribers
+from subscribers import Registry
+
+
+@pytest.fixture
+def adaptive(environment, monkeypatch):
+    monkeypatch.setenv("FOGOS_OUTBOX", "false")
+    monkeypatch.setenv("FOGOS_ADAPTIVE_POLL", "true")
+    monkeypatch.setenv("FOGOS_NEAR_KM", "5")
+    cfg = config.load()
+    registry = Registry(subscribers.load(cfg))
+    return schedule.Scheduler(cfg), registry, registry.subscribers[0]
+
+
+def test_mode_follows_the_fires_the_cycle_left_in_memory(adaptive, monkeypatch, fire):
+    scheduler, registry, sub = adaptive
+    app._process(sub, [])
+    app._process(sub, [fire()])
+
+    def unexpected() -> None:
+        raise AssertionError("the scheduler went back to the store")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(sub.store, "load", unexpected)
+        scheduler.observe(registry, changed=True, last_modified=None)
+    assert scheduler.mode in (schedule.NORMAL, schedule.QUIET)
+
+    app._process(sub, [fire(distance_km=2.0)])
+    scheduler.observe(registry, changed=True, last_modified=None)
+    assert scheduler.mode == schedule.HOT
+
+
+def test_a_subscriber_whose_cycle_failed_sits_the_mode_out(adaptive, fire):
+    scheduler, registry, sub = adaptive
+    app._process(sub, [])
+    app._process(sub, [fire(distance_km=2.0)])
+    sub.store.invalidate()
+
+    scheduler.observe(registry, changed=True, last_modified=None)
+    assert scheduler.mode != schedule.HOT
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+
+import state
+
+
+def _cycles(fire) -> list[tuple[dict, dict, int]]:
+    """Tracked fires, first-seen stamps and heartbeat after each of four cycles."""
+    return [
+        ({"1": fire("1")}, {"1": 100}, 0),
+        ({"1": fire("1", man=30), "2": fire("2", concelho="Mafra")}, {"1": 100, "2": 200}, 0),
+        ({"2": fire("2", concelho="Mafra", status="Em Resolução", status_code=7)}, {"2": 200}, 300),
+        ({"2": fire("2", concelho="Mafra", man=0, status="Conclusão", status_code=8), "3": fire("3")}, {"2": 200, "3": 400}, 300),
+    ]
+
+
+def _journaled(path: str, fire) -> list[state.State]:
+    """Runs the cycles through a journal Store; a copy of the state after each save."""
+    store = state.Store(path, journal=True)
+    saved: list[state.State] = []
+    for fires, first_seen, heartbeat in _cycles(fire):
+        st = store.load()
+        st.fires = fires
+        st.first_seen = first_seen
+        st.last_heartbeat = heartbeat
+        st.initialized = True
+        for fire_id in first_seen:
+            st.thread_id(fire_id, "example.com")
+        st.prune(set(first_seen))
+        store.save()
+        saved.append(state._copy(st))
+    return saved
+
+
+def test_journal_replays_to_the_last_saved_state(environment, fire):
+    path = str(environment / "state.json")
+    saved = _journaled(path, fire)
+
+    with open(state.journal_path(path), encoding="utf-8") as handle:
+        assert len(handle.readlines()) == 3
+    assert state.Store(path, journal=True).load() == saved[-1]
+
+
+def test_torn_journal_line_loses_only_the_last_cycle(environment, fire):
+    path = str(environment / "state.json")
+    saved = _journaled(path, fire)
+    journal = state.journal_path(path)
+
+    # A crash halfway through the last append.
+    with open(journal, "rb+") as handle:
+        lines = handle.readlines()
+        handle.truncate(sum(map(len, lines[:-1])) + len(lines[-1]) // 2)
+
+    store = state.Store(path, journal=True)
+    assert store.load() == saved[-2]
+
+    # The next save folds everything into a fresh snapshot rather than
+    # appending after the torn line.
+    store.load().last_heartbeat = 500
+    store.save()
+    assert not os.path.exists(journal)
+    reloaded = state.Store(path, journal=True).load()
+    assert reloaded.fires == saved[-2].fires
+    assert reloaded.last_heartbeat == 500
+
+
+def test_replaying_an_entry_twice_is_harmless(environment, fire):
+    path = str(environment / "state.json")
+    saved = _journaled(path, fire)
+    journal = state.journal_path(path)
+
+    with open(journal, encoding="utf-8") as handle:
+        lines = handle.readlines()
+    with open(journal, "a", encoding="utf-8") as handle:
+        handle.writelines(lines)
+
+    assert state.Store(path, journal=True).load() == saved[-1]
+
+
+def test_sqlite_store_migrates_a_v2_state_file(environment, fire):
+    legacy = str(environment / "state.json")
+    before = state.State(
+        fires={"1": fire("1"), "2": fire("2", man=40)},
+        first_seen={"1": 100, "2": 200},
+        threads={"1": "<root-1@example.com>", "2": "<root-2@example.com>"},
+        last_heartbeat=300,
+        initialized=True,
+    )
+    state.save(legacy, before)
+
+    store = state.SqliteStore(str(environment / "state.db"), legacy_path=legacy)
+    assert store.load() == before
+    assert not os.path.exists(legacy)
+    assert os.path.exists(legacy + ".migrated")
+    assert [version for _, version in store.history("2")] == [before.fires["2"]]
+
+    # Reopened, it reads the database and never looks at the old file again.
+    state.save(legacy, state.State())
+    assert state.SqliteStore(str(environment / "state.db"), legacy_path=legacy).load() == before
+
+
+def test_sqlite_history_keeps_only_the_configured_days(environment, monkeypatch, fire):
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(state.time, "time", lambda: clock[0])
+    store = state.SqliteStore(str(environment / "state.db"), history_days=2)
+
+    # One version a day for five days of a fire still tracked, and one of a fire long gone.
+    for day in range(5):
+        st = store.load()
+        st.fires = {"1": fire("1", man=10 + day)}
+        if day == 0:
+            st.fires["2"] = fire("2")
+        store.save()
+        clock[0] += 86400
+
+    assert [version.man for _, version in store.history("1")] == [12, 13, 14]
+    assert store.history("2") == []
+
+    # Untouched for a week, a tracked fire still keeps its newest version.
+    clock[0] += 7 * 86400
+    store.load().last_heartbeat = 1
+    store.save()
+    assert [version.man for _, version in store.history("1")] == [14]
+    assert store.as_of("1", int(clock[0])).man == 14
+
+
+def test_sqlite_history_is_unbounded_with_zero_days(environment, monkeypatch, fire):
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(state.time, "time", lambda: clock[0])
+    store = state.SqliteStore(str(environment / "state.db"))
+    for day in range(5):
+        store.load().fires = {"1": fire("1", man=10 + day)}
+        store.save()
+        clock[0] += 30 * 86400
+
+    assert len(store.history("1")) == 5
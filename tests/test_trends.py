@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import dataclasses
+import time
+
+import config
+import FogosPtAlerts as app
+import subscribers
+import trends
+
+MINUTE = 60
+
+
+def test_gradual_rise_held_by_a_digest_is_sent_when_it_closes(environment, monkeypatch, fire):
+    monkeypatch.setenv("FOGOS_OUTBOX", "false")
+    monkeypatch.setenv("FOGOS_TRENDS", "true")
+    monkeypatch.setenv("FOGOS_DIGEST", "true")
+    monkeypatch.setenv("FOGOS_DIGEST_MINUTES", "60")
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    sub = dataclasses.replace(subscribers.load(config.load())[0], trends=trends.Tracker(clock=lambda: clock[0]))
+    bodies: list[str] = []
+    monkeypatch.setattr(
+        sub.mailer, "deliver", lambda mail, to=None: bodies.append(mail.get_body(("plain",)).get_content())
+    )
+
+    # A creep of 7 over forty minutes, then a plateau: no single diff ever sees
+    # five more crew, even against the snapshot the digest holds back.
+    for man in (20, 21, 23, 25, 27, 28, 28, 28, 28, 28, 28, 28):
+        app._process(sub, [fire(man=man)])
+        clock[0] += 10 * MINUTE
+
+    assert len(bodies) == 2, bodies
+    assert "Operacionais: 21 -> 28" in bodies[1]
+
+
+def test_sent_rise_is_not_reported_again(environment, monkeypatch, fire):
+    monkeypatch.setenv("FOGOS_OUTBOX", "false")
+    monkeypatch.setenv("FOGOS_TRENDS", "true")
+    clock = [1_750_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    sub = dataclasses.replace(subscribers.load(config.load())[0], trends=trends.Tracker(clock=lambda: clock[0]))
+    sent: list[str] = []
+    monkeypatch.setattr(sub.mailer, "deliver", lambda mail, to=None: sent.append(str(mail["Subject"])))
+
+    for man in (20, 22, 24, 26, 28, 28, 28, 28):
+        app._process(sub, [fire(man=man)])
+        clock[0] += 10 * MINUTE
+
+    # The seed, then the rise once.
+    assert len(sent) == 2, sent
@@ -0,0 +1,182 @@
+"""Per-fire resource history, for escalations too gradual for one diff to see.
+
+changes._diff compares each payload with the one before it, so a fire that
+goes from 20 to 44 operacionais two at a time never moves enough in a single
+step to be reported. Each tracked fire here keeps its last samples in two
+fixed-size ring buffers, an array of times and one of resource counts.
+Running sums give a least-squares slope over the window. Checking a fire
+costs the same however long it has been burning, and memory per fire is
+capped.
+
+A rise is reported once the fitted line and the actual values have both
+moved by as much as changes requires of a single step. It keeps being
+reported, cycle after cycle, until an update about the fire has actually
+been sent or queued: a digest window holding it, or a failed send, must
+not lose it. Only then does the window restart from the values sent, so
+one rise is never delivered twice.
+"""
+
+from __future__ import annotations
+
+import time
+from array import array
+from collections.abc import Callable, Iterable
+
+from fogos import Fire
+
+# Samples kept per fire, and the oldest any of them may be. Samples are taken
+# when upstream changes, every few minutes in season, so a drift over the
+# last couple of hours fits in the ring.
+CAPACITY = 32
+WINDOW_SECONDS = 2 * 60 * 60
+
+# At least this many samples before a trend is believed.
+MIN_SAMPLES = 4
+
+# man, terrain, aerial and aquatic, with the labels changes._diff uses. One
+# row of `Series.values` holds one of each.
+RESOURCES = ("Operacionais", "Meios terrestres", "Meios aéreos", "Meios aquáticos")
+COLUMNS = len(RESOURCES)
+
+
+class Series:
+    """One fire's last samples, oldest first from `head`, with running regression sums.
+
+    Sample i's resources sit in `values[i * COLUMNS:(i + 1) * COLUMNS]`.
+    Times are kept relative to `base`, the first sample after the last reset,
+    so the sums stay small enough for floats to subtract exactly.
+    """
+
+    __slots__ = ("base", "count", "head", "sx", "sxx", "sxy", "sy", "times", "values")
+
+    def __init__(self) -> None:
+        self.base = 0.0
+        self.times = array("d", bytes(8 * CAPACITY))
+        self.values = array("i", bytes(4 * CAPACITY * COLUMNS))
+        self.head = 0
+        self.count = 0
+        self.sx = self.sxx = 0.0
+        self.sy = [0.0] * len(RESOURCES)
+        self.sxy = [0.0] * len(RESOURCES)
+
+    def _index(self, offset: int) -> int:
+        return (self.head + offset) % CAPACITY
+
+    def _pop(self) -> None:
+        index = self.head
+        x = self.times[index]
+        self.sx -= x
+        self.sxx -= x * x
+        row = index * COLUMNS
+        sy, sxy, values = self.sy, self.sxy, self.values
+        for channel in range(len(RESOURCES)):
+            value = values[row + channel]
+            sy[channel] -= value
+            sxy[channel] -= x * value
+        self.head = self._index(1)
+        self.count -= 1
+
+    def push(self, at: float, fire: Fire) -> None:
+        if self.count == 0:
+            self.base = at
+        if self.count == CAPACITY:
+            self._pop()
+        while self.count and at - self.base - self.times[self.head] > WINDOW_SECONDS:
+            self._pop()
+        index = self._index(self.count)
+        x = self.times[index] = at - self.base
+        self.sx += x
+        self.sxx += x * x
+        row = index * COLUMNS
+        sample = (fire.man, fire.terrain, fire.aerial, fire.aquatic)
+        self.values[row : row + COLUMNS] = array("i", sample)
+        sy, sxy = self.sy, self.sxy
+        for channel in range(len(RESOURCES)):
+            sy[channel] += sample[channel]
+            sxy[channel] += x * sample[channel]
+        self.count += 1
+
+    def reset(self) -> None:
+        """Keep only the newest sample: what was reported becomes the new baseline."""
+        if not self.count:
+            return
+        newest = self._index(self.count - 1)
+        row = newest * COLUMNS
+        sample = self.values[row : row + COLUMNS]
+        self.base += self.times[newest]
+        self.head, self.count = 0, 1
+        self.times[0] = 0.0
+        self.values[0:COLUMNS] = sample
+        self.sx = self.sxx = 0.0
+        self.sy = [float(value) for value in sample]
+        self.sxy = [0.0] * len(RESOURCES)
+
+    def span(self) -> float:
+        """Seconds from the oldest sample to the newest."""
+        return self.times[self._index(self.count - 1)] - self.times[self.head] if self.count else 0.0
+
+    def rises(self, threshold: Callable[[int], int]) -> list[tuple[int, int, int]]:
+        """(channel, oldest, newest) for each resource whose values and fitted line rose by `threshold(oldest)`."""
+        n = self.count
+        if n < MIN_SAMPLES:
+            return []
+        first = self.head * COLUMNS
+        last = self._index(n - 1) * COLUMNS
+        spread = n * self.sxx - self.sx * self.sx
+        if spread <= 0:
+            return []
+        found: list[tuple[int, int, int]] = []
+        for channel in range(len(RESOURCES)):
+            old, new = self.values[first + channel], self.values[last + channel]
+            needed = threshold(old)
+            # The endpoints are a cheap filter; the fit rules out a lucky pair.
+            if new - old < needed:
+                continue
+            slope = (n * self.sxy[channel] - self.sx * self.sy[channel]) / spread
+            if slope * self.span() >= needed:
+                found.append((channel, old, new))
+        return found
+
+
+class Tracker:
+    """A Series per tracked fire, dropped as soon as the fire is.
+
+    Samples are stamped with `clock()`, wall-clock seconds by default.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self.series: dict[str, Series] = {}
+
+    def observe(
+        self, fire: Fire, reported: bool, threshold: Callable[[int], int]
+    ) -> list[tuple[str, int, int, float]]:
+        """Record `fire`'s current values; the gradual rises it shows, as (label, old, new, hours).
+
+        A rise counts once both the values and the fitted line have grown by
+        `threshold(old)`. `reported` is whether this cycle's diff already
+        has a change for the fire; that update carries the news instead.
+        The window is left as it is until `delivered`.
+        """
+        series = self.series.get(fire.id)
+        if series is None:
+            series = self.series[fire.id] = Series()
+        series.push(self.clock(), fire)
+        if fire.is_cooling:
+            series.reset()
+            return []
+        if reported:
+            return []
+        return [(RESOURCES[channel], old, new, series.span() / 3600) for channel, old, new in series.rises(threshold)]
+
+    def delivered(self, fire_ids: Iterable[str]) -> None:
+        """Restart the window of each fire an update went out for, from the values it carried."""
+        for fire_id in fire_ids:
+            series = self.series.get(fire_id)
+            if series is not None:
+                series.reset()
+
+    def prune(self, live: set[str]) -> None:
+        if len(self.series) > len(live):
+            for fire_id in set(self.series) - live:
+                del self.series[fire_id]